@@ -0,0 +1,210 @@
+import heapq
+import logging
+from typing import List, Dict, Any, Tuple
+
+import numpy as np
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+def align_segments(
+    transcript_segments: List[Dict[str, Any]],
+    diarization_segments: List[Dict[str, Any]]
+) -> List[Dict[str, Any]]:
+    """
+    Assign a speaker to every transcript segment with a sweep over both inputs
+
+    Produces the same output as combine_transcript_with_diarization, but
+    sorts both inputs once and only looks at the speaker turns that are
+    active around each transcript segment, so the cost is O((N + M) log M)
+    plus the number of overlapping pairs instead of O(N x M).
+
+    Args:
+        transcript_segments: Segments from Whisper transcript
+        diarization_segments: Segments from speaker diarization
+
+    Returns:
+        Combined segments with text and speaker information, in transcript order
+    """
+    # Visit transcript segments by start time and speaker turns by start time
+    transcript_order = sorted(range(len(transcript_segments)), key=lambda i: transcript_segments[i]["start"])
+    turn_order = sorted(range(len(diarization_segments)), key=lambda i: diarization_segments[i]["start"])
+
+    speakers: List[str] = ["UNKNOWN"] * len(transcript_segments)
+    active: List[tuple] = []  # Heap of (turn end, turn index)
+    next_turn = 0
+
+    for seg_index in transcript_order:
+        trans_seg = transcript_segments[seg_index]
+        trans_start = trans_seg["start"]
+        trans_end = trans_seg["end"]
+
+        # Activate every turn that starts before this segment ends
+        while next_turn < len(turn_order):
+            turn_index = turn_order[next_turn]
+            if diarization_segments[turn_index]["start"] >= trans_end:
+                break
+            heapq.heappush(active, (diarization_segments[turn_index]["end"], turn_index))
+            next_turn += 1
+
+        # Turns ending before this segment starts cannot overlap any later segment
+        while active and active[0][0] <= trans_start:
+            heapq.heappop(active)
+
+        # Overlapping turns, in their original order so ties break the same way
+        overlapping = sorted(
+            turn_index for _, turn_index in active
+            if max(trans_start, diarization_segments[turn_index]["start"])
+            < min(trans_end, diarization_segments[turn_index]["end"])
+        )
+        if not overlapping:
+            continue
+
+        speaker_overlap: Dict[str, float] = {}
+        for turn_index in overlapping:
+            turn = diarization_segments[turn_index]
+            overlap = max(0, min(trans_end, turn["end"]) - max(trans_start, turn["start"]))
+            speaker_overlap[turn["speaker"]] = speaker_overlap.get(turn["speaker"], 0) + overlap
+
+        speakers[seg_index] = max(speaker_overlap.items(), key=lambda x: x[1])[0]
+
+    return [
+        {
+            "start": seg["start"],
+            "end": seg["end"],
+            "text": seg["text"],
+            "speaker": speaker
+        }
+        for seg, speaker in zip(transcript_segments, speakers)
+    ]
+
+
+def _speaker_coverage(turns: List[Dict[str, Any]]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Merge one speaker's turns into disjoint intervals with cumulative lengths
+
+    Returns:
+        Tuple of (starts, ends, cumulative length before each interval plus total)
+    """
+    intervals = sorted((turn["start"], turn["end"]) for turn in turns if turn["end"] > turn["start"])
+    merged: List[List[float]] = []
+    for start, end in intervals:
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+
+    bounds = np.array(merged, dtype=np.float64).reshape(-1, 2)
+    starts, ends = bounds[:, 0], bounds[:, 1]
+    cumulative = np.concatenate(([0.0], np.cumsum(ends - starts)))
+    return starts, ends, cumulative
+
+
+def _covered_time(times: np.ndarray, starts: np.ndarray, ends: np.ndarray, cumulative: np.ndarray) -> np.ndarray:
+    """Time covered by the intervals between 0 and each of the given times"""
+    count = np.searchsorted(starts, times, side="right")
+    # The last interval that started may still be running at that time
+    last = np.maximum(count - 1, 0)
+    unfinished = np.where(count > 0, np.maximum(ends[last] - times, 0.0), 0.0)
+    return cumulative[count] - unfinished
+
+
+def assign_word_speakers(
+    word_starts: np.ndarray,
+    word_ends: np.ndarray,
+    diarization_segments: List[Dict[str, Any]]
+) -> List[str]:
+    """
+    Assign the speaker with the most overlap to every word
+
+    The overlap of each word with each speaker is computed for all words at
+    once from that speaker's cumulative coverage, so the cost is
+    O(S x W log M) for S speakers, W words and M turns. Words that fall in a
+    gap between turns take the speaker of the closest preceding word.
+
+    Args:
+        word_starts: Start time of each word
+        word_ends: End time of each word
+        diarization_segments: Segments from speaker diarization
+
+    Returns:
+        Speaker label of each word
+    """
+    turns_by_speaker: Dict[str, List[Dict[str, Any]]] = {}
+    for turn in diarization_segments:
+        # Zero-length turns cover nothing, and a speaker with only those would have no intervals
+        if turn["end"] > turn["start"]:
+            turns_by_speaker.setdefault(turn["speaker"], []).append(turn)
+
+    if not turns_by_speaker or len(word_starts) == 0:
+        return ["UNKNOWN"] * len(word_starts)
+
+    labels = list(turns_by_speaker)
+    overlaps = np.empty((len(labels), len(word_starts)), dtype=np.float64)
+    for row, label in enumerate(labels):
+        starts, ends, cumulative = _speaker_coverage(turns_by_speaker[label])
+        overlaps[row] = (
+            _covered_time(word_ends, starts, ends, cumulative)
+            - _covered_time(word_starts, starts, ends, cumulative)
+        )
+
+    best = np.argmax(overlaps, axis=0)
+    has_speaker = overlaps[best, np.arange(len(word_starts))] > 0
+    if not has_speaker.any():
+        return ["UNKNOWN"] * len(word_starts)
+
+    # Forward-fill words in gaps from the previous word, back-fill leading ones
+    source = np.where(has_speaker, np.arange(len(word_starts)), -1)
+    source = np.maximum.accumulate(source)
+    source[source < 0] = np.argmax(has_speaker)
+    return [labels[index] for index in best[source]]
+
+
+def align_words(
+    transcript_segments: List[Dict[str, Any]],
+    diarization_segments: List[Dict[str, Any]]
+) -> List[Dict[str, Any]]:
+    """
+    Assign speakers per word and split segments where the speaker changes
+
+    Requires Whisper segments transcribed with word_timestamps=True; a
+    segment without word timings is treated as a single word.
+
+    Args:
+        transcript_segments: Segments from Whisper transcript, with "words"
+        diarization_segments: Segments from speaker diarization
+
+    Returns:
+        Segments with text and speaker information, split at speaker turns
+    """
+    words = []
+    segment_ids = []
+    for seg_index, seg in enumerate(transcript_segments):
+        seg_words = seg.get("words") or [{"word": seg["text"], "start": seg["start"], "end": seg["end"]}]
+        words.extend(seg_words)
+        segment_ids.extend([seg_index] * len(seg_words))
+
+    word_starts = np.fromiter((word["start"] for word in words), dtype=np.float64, count=len(words))
+    word_ends = np.fromiter((word["end"] for word in words), dtype=np.float64, count=len(words))
+    speakers = assign_word_speakers(word_starts, word_ends, diarization_segments)
+
+    # Start a new segment at every speaker change and every original segment boundary
+    result: List[Dict[str, Any]] = []
+    previous_key = None
+    for word, seg_index, speaker in zip(words, segment_ids, speakers):
+        key = (seg_index, speaker)
+        if key != previous_key:
+            result.append({
+                "start": word["start"],
+                "end": word["end"],
+                "text": word["word"],
+                "speaker": speaker
+            })
+            previous_key = key
+        else:
+            current = result[-1]
+            current["end"] = word["end"]
+            current["text"] += word["word"]
+
+    return result
@@ -0,0 +1,238 @@
+import os
+import time
+import uuid
+import logging
+import threading
+import subprocess
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+import numpy as np
+
+from app.core.config import settings
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Whisper and pyannote both work on 16 kHz mono audio
+SAMPLE_RATE = 16000
+
+# Bytes read from ffmpeg per chunk
+READ_CHUNK_BYTES = 1024 * 1024
+
+
+class DecodedAudio:
+    """
+    Audio decoded once to 16 kHz mono float32 PCM
+
+    Long recordings are spilled to a memory-mapped file instead of being
+    held in RAM. The samples array is shared by every engine that consumes
+    it, without copying. Audio loaded from the feature cache is mapped from
+    a cache file that outlives the request (owns_file=False), and carries
+    the upload hash so derived features can be cached too.
+    """
+
+    def __init__(
+        self,
+        samples: np.ndarray,
+        decode_seconds: float,
+        pcm_path: Optional[str] = None,
+        owns_file: bool = True,
+        audio_hash: Optional[str] = None
+    ):
+        self.samples = samples
+        self.sample_rate = SAMPLE_RATE
+        self.decode_seconds = decode_seconds
+        self.pcm_path = pcm_path
+        self.owns_file = owns_file
+        self.audio_hash = audio_hash
+
+    @property
+    def duration(self) -> float:
+        return len(self.samples) / self.sample_rate
+
+    @property
+    def is_memory_mapped(self) -> bool:
+        return self.pcm_path is not None
+
+    def spill(self):
+        """
+        Move in-memory samples to a file in UPLOAD_DIR and map them from there
+
+        Lets another process share the audio by path instead of receiving a
+        copy of every sample. Audio already backed by a file is left as is.
+        """
+        if self.pcm_path is not None:
+            return
+        pcm_path = os.path.join(settings.UPLOAD_DIR, f"{uuid.uuid4()}.pcm")
+        np.ascontiguousarray(self.samples, dtype=np.float32).tofile(pcm_path)
+        self.pcm_path = pcm_path
+        self.owns_file = True
+        self.samples = map_pcm(pcm_path)
+
+    def as_waveform(self):
+        """Samples as a (channel, time) torch tensor sharing the same memory"""
+        import torch
+        return torch.from_numpy(self.samples).unsqueeze(0)
+
+    def close(self):
+        """Release the buffer and delete the backing file, if this audio owns one"""
+        self.samples = np.zeros(0, dtype=np.float32)
+        if self.pcm_path and self.owns_file and os.path.exists(self.pcm_path):
+            os.remove(self.pcm_path)
+        self.pcm_path = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def map_pcm(path: str) -> np.ndarray:
+    """Map a raw float32 PCM file (or a cached .npy array) copy-on-write"""
+    if path.endswith(".npy"):
+        return np.load(path, mmap_mode="c")
+    if os.path.getsize(path) == 0:
+        # Empty files cannot be mapped
+        return np.zeros(0, dtype=np.float32)
+    return np.memmap(path, dtype=np.float32, mode="c")
+
+
+def decode_audio(file_path: str, memmap_min_bytes: Optional[int] = None) -> DecodedAudio:
+    """
+    Decode an audio file with ffmpeg into 16 kHz mono float32 PCM
+
+    Args:
+        file_path: Path to the audio file
+        memmap_min_bytes: Decoded size above which the PCM is spilled to a
+            memory-mapped file (defaults to settings.AUDIO_MEMMAP_MIN_MB)
+
+    Returns:
+        The decoded audio
+    """
+    logger.info(f"Decoding {Path(file_path).name}")
+    return _run_ffmpeg(["-nostdin", "-i", file_path], None, memmap_min_bytes)
+
+
+def decode_stream(chunks: Iterable[bytes], memmap_min_bytes: Optional[int] = None) -> DecodedAudio:
+    """
+    Decode audio piped into ffmpeg's stdin, without writing the input to disk
+
+    The chunks are fed to ffmpeg from a helper thread while the PCM is read
+    back, so input and output overlap. Only containers ffmpeg can read front
+    to back work this way (see app.services.ingest.needs_seeking).
+
+    Args:
+        chunks: Encoded audio, in order
+        memmap_min_bytes: Decoded size above which the PCM is spilled to a
+            memory-mapped file (defaults to settings.AUDIO_MEMMAP_MIN_MB)
+
+    Returns:
+        The decoded audio
+    """
+    logger.info("Decoding streamed audio")
+    return _run_ffmpeg(["-i", "pipe:0"], chunks, memmap_min_bytes)
+
+
+def _feed_stdin(process: subprocess.Popen, chunks: Iterable[bytes], errors: List[BaseException]):
+    """Write chunks to ffmpeg's stdin, recording why feeding stopped early"""
+    try:
+        for chunk in chunks:
+            process.stdin.write(chunk)
+    except BrokenPipeError:
+        # ffmpeg exited; its exit status explains why
+        pass
+    except BaseException as e:
+        errors.append(e)
+        process.kill()
+    finally:
+        try:
+            process.stdin.close()
+        except BrokenPipeError:
+            pass
+
+
+def _run_ffmpeg(
+    input_args: List[str],
+    chunks: Optional[Iterable[bytes]],
+    memmap_min_bytes: Optional[int]
+) -> DecodedAudio:
+    """Run ffmpeg on the given input and collect its PCM output"""
+    if memmap_min_bytes is None:
+        memmap_min_bytes = int(settings.AUDIO_MEMMAP_MIN_MB * 1024 ** 2)
+
+    start = time.perf_counter()
+
+    command = [
+        "ffmpeg", "-nostats", "-v", "error", "-threads", "0",
+        *input_args,
+        "-f", "f32le", "-ac", "1", "-ar", str(SAMPLE_RATE),
+        "-"
+    ]
+    try:
+        process = subprocess.Popen(
+            command,
+            stdin=subprocess.PIPE if chunks is not None else None,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE
+        )
+    except OSError as e:
+        raise RuntimeError(f"Failed to start ffmpeg: {str(e)}")
+
+    feed_errors: List[BaseException] = []
+    feeder = None
+    if chunks is not None:
+        feeder = threading.Thread(
+            target=_feed_stdin, args=(process, chunks, feed_errors), name="ffmpeg-stdin", daemon=True
+        )
+        feeder.start()
+
+    buffer = bytearray()
+    pcm_path = None
+    pcm_file = None
+    try:
+        while True:
+            chunk = process.stdout.read(READ_CHUNK_BYTES)
+            if not chunk:
+                break
+            if pcm_file is not None:
+                pcm_file.write(chunk)
+                continue
+            buffer.extend(chunk)
+            if len(buffer) > memmap_min_bytes:
+                # Too large to keep in RAM, continue on disk
+                pcm_path = os.path.join(settings.UPLOAD_DIR, f"{uuid.uuid4()}.pcm")
+                pcm_file = open(pcm_path, "wb")
+                pcm_file.write(buffer)
+                buffer = bytearray()
+
+        stderr = process.stderr.read()
+        returncode = process.wait()
+        if feeder is not None:
+            feeder.join()
+        if feed_errors:
+            # The input stream failed (e.g. the client disconnected)
+            raise feed_errors[0]
+        if returncode != 0:
+            raise RuntimeError(f"Failed to decode audio: {stderr.decode(errors='ignore').strip()}")
+    except BaseException:
+        process.kill()
+        if pcm_file is not None:
+            pcm_file.close()
+            os.remove(pcm_path)
+        raise
+
+    if pcm_file is not None:
+        pcm_file.close()
+        # Copy-on-write mapping: engines can read it as a normal array
+        samples = np.memmap(pcm_path, dtype=np.float32, mode="c")
+    else:
+        samples = np.frombuffer(buffer, dtype=np.float32)
+
+    decoded = DecodedAudio(samples, time.perf_counter() - start, pcm_path)
+    logger.info(
+        f"Decoded {decoded.duration:.1f}s of audio in {decoded.decode_seconds:.2f}s"
+        f"{' (memory-mapped)' if decoded.is_memory_mapped else ''}"
+    )
+    return decoded
@@ -1,6 +1,9 @@
+import os
+import time
 import requests
+import json
 import logging
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Callable, Iterator, Tuple
 
 logger = logging.getLogger(__name__)
 
@@ -20,14 +23,28 @@ class APIClient:
             logger.error(f"API health check failed: {e}")
             return {"status": "error", "message": str(e)}
     
-    def transcribe_audio(self, file_path: str, language: str, model: str) -> Optional[str]:
+    def transcribe_audio(
+        self,
+        file_path: str,
+        language: str,
+        model: str,
+        on_segment: Optional[Callable[[Dict[str, Any]], None]] = None,
+        engine: Optional[str] = None,
+        cascade: Optional[bool] = None
+    ) -> Optional[str]:
         """
         Send audio file to API for transcription
         
+        Uses the streaming endpoint, so the server reports progress while it
+        works and long files do not hit the read timeout.
+        
         Args:
             file_path: Path to the audio file
             language: Language of the audio
             model: Whisper model size to use
+            on_segment: Called with each transcript segment as it arrives
+            engine: Inference engine (whisper, faster-whisper or mock); the server default if None
+            cascade: Draft with a small model and re-decode only uncertain segments; the server default if None
             
         Returns:
             Transcribed text or None if request failed
@@ -36,15 +53,129 @@ class APIClient:
             with open(file_path, "rb") as f:
                 files = {"file": f}
                 params = {"language": language, "model": model}
+                if engine:
+                    params["engine"] = engine
+                if cascade is not None:
+                    params["cascade"] = cascade
                 response = requests.post(
-                    f"{self.base_url}/transcribe", 
+                    f"{self.base_url}/transcribe/stream", 
                     files=files, 
                     params=params,
-                    timeout=300  # Extended timeout for large files
+                    stream=True,
+                    timeout=300  # Longest wait between two events
                 )
             
             response.raise_for_status()
-            return response.json().get("transcript")
+            with response:
+                for event, data in self._read_events(response):
+                    if event == "segment" and on_segment is not None:
+                        on_segment(data)
+                    elif event == "summary":
+                        return data.get("transcript")
+                    elif event == "error":
+                        logger.error(f"Transcription failed: {data.get('detail')}")
+                        return None
+            
+            logger.error("Transcription stream ended without a result")
+            return None
         except requests.RequestException as e:
             logger.error(f"Transcription request failed: {e}")
             return None
+    
+    def upload_resumable(
+        self,
+        file_path: str,
+        task: str = "transcribe",
+        language: str = "English",
+        model: str = "base",
+        chunk_size: int = 16 * 1024 * 1024,
+        max_retries: int = 5,
+        engine: Optional[str] = None,
+        cascade: Optional[bool] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Upload a large file in chunks and queue it as a job
+        
+        A chunk that fails is retried from the offset the server reports, so
+        a dropped connection only costs the data in flight.
+        
+        Args:
+            file_path: Path to the audio file
+            task: Task to run (transcribe or diarize)
+            language: Language of the audio
+            model: Whisper model size to use
+            chunk_size: Bytes sent per request
+            max_retries: Consecutive failures tolerated before giving up
+            engine: Inference engine (whisper, faster-whisper or mock); the server default if None
+            cascade: Draft with a small model and re-decode only uncertain segments; the server default if None
+            
+        Returns:
+            The queued job or None if the upload failed
+        """
+        size = os.path.getsize(file_path)
+        try:
+            response = requests.post(
+                f"{self.base_url}/uploads",
+                params={"file_name": os.path.basename(file_path), "size": size}
+            )
+            response.raise_for_status()
+            upload_url = f"{self.base_url}/uploads/{response.json()['upload_id']}"
+            
+            offset = 0
+            failures = 0
+            with open(file_path, "rb") as f:
+                while offset < size:
+                    f.seek(offset)
+                    try:
+                        response = requests.put(
+                            upload_url, params={"offset": offset}, data=f.read(chunk_size), timeout=300
+                        )
+                        response.raise_for_status()
+                        offset = response.json()["received"]
+                        failures = 0
+                    except requests.RequestException as e:
+                        failures += 1
+                        if failures > max_retries:
+                            raise
+                        logger.warning(f"Upload chunk at byte {offset} failed, resuming: {e}")
+                        time.sleep(min(2 ** failures, 30))
+                        # Ask the server how much actually arrived
+                        progress = requests.get(upload_url, timeout=30)
+                        progress.raise_for_status()
+                        offset = progress.json()["received"]
+            
+            params = {"task": task, "language": language, "model": model}
+            if engine:
+                params["engine"] = engine
+            if cascade is not None:
+                params["cascade"] = cascade
+            for _ in range(max_retries + 1):
+                response = requests.post(f"{upload_url}/complete", params=params)
+                if response.status_code != 429:
+                    break
+                # Server is busy; the finished upload is kept until it accepts the job
+                time.sleep(int(response.headers.get("Retry-After", 5)))
+            response.raise_for_status()
+            return response.json()
+        except requests.RequestException as e:
+            logger.error(f"Resumable upload failed: {e}")
+            return None
+    
+    @staticmethod
+    def _read_events(response: requests.Response) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Parse a Server-Sent Events response into (event, data) pairs"""
+        event = "message"
+        data_lines = []
+        for line in response.iter_lines(decode_unicode=True):
+            if line:
+                field, _, value = line.partition(":")
+                if field == "event":
+                    event = value.strip()
+                elif field == "data":
+                    data_lines.append(value.strip())
+                continue
+            # A blank line ends the event
+            if data_lines:
+                yield event, json.loads("\n".join(data_lines))
+            event = "message"
+            data_lines = []
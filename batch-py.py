@@ -0,0 +1,205 @@
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+from functools import partial
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.services.jobs import job_manager
+from app.services.scheduler import QueueFullError, WorkCost
+from app.services.transcription import pin_whisper_model, unpin_whisper_model
+from app.services.engines import get_engine
+from app.services.uploads import remove_upload
+from app.services.workers import worker_supervisor
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Longest pause before retrying a file the scheduler turned away
+MAX_RETRY_SECONDS = 5.0
+
+
+class BatchItem:
+    """One file of a batch with the options it is processed with"""
+
+    def __init__(
+        self,
+        index: int,
+        file_name: str,
+        path: str,
+        audio_hash: str,
+        task: str,
+        language: str,
+        model: str,
+        options: Optional[Dict[str, Any]] = None
+    ):
+        self.index = index
+        self.file_name = file_name
+        self.path = path
+        self.audio_hash = audio_hash
+        self.task = task
+        self.language = language
+        self.model = model
+        self.options = options or {}
+        self.cost: Optional[WorkCost] = None
+
+    @property
+    def group(self) -> Tuple[str, str]:
+        return (self.model, self.language)
+
+
+def _result_line(item: BatchItem, job_id: Optional[str]) -> Dict[str, Any]:
+    """The NDJSON line reporting a finished item, without its status"""
+    return {
+        "type": "result",
+        "index": item.index,
+        "file_name": item.file_name,
+        "job_id": job_id,
+        "task": item.task,
+        "model": item.model,
+        "language": item.language,
+    }
+
+
+def group_items(items: List[BatchItem]) -> "OrderedDict[Tuple[str, str], List[BatchItem]]":
+    """
+    Group batch items by model and language, in order of first appearance
+
+    Args:
+        items: Items in upload order
+
+    Returns:
+        Items of each (model, language) group
+    """
+    groups: "OrderedDict[Tuple[str, str], List[BatchItem]]" = OrderedDict()
+    for item in items:
+        groups.setdefault(item.group, []).append(item)
+    return groups
+
+
+async def run_batch(
+    items: List[BatchItem],
+    tasks: Dict[str, Callable[..., Dict[str, Any]]],
+    max_in_flight: Optional[int] = None
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Run every item of a batch on the job pool and yield results as files finish
+
+    Files are submitted one (model, language) group after another, keeping
+    at most max_in_flight jobs queued or running, so the pool works through
+    one group while the next waits. Each group's Whisper model is pinned
+    from its first submission until its last file is done, so it stays
+    resident for the whole group and is loaded once; inference workers
+    keep their own models, so nothing is pinned in this process when they
+    run. A model that cannot be loaded fails its files without stopping the
+    batch. Files the scheduler turns away are retried once capacity frees up.
+
+    Args:
+        items: Items to process; their files are deleted once processed
+        tasks: Task functions by name, called as func(path, file_name, language, model, **options)
+        max_in_flight: Jobs submitted at once (defaults to settings.BATCH_MAX_IN_FLIGHT)
+
+    Yields:
+        One "result" line per file in completion order, then a "summary" line
+    """
+    if max_in_flight is None:
+        max_in_flight = settings.BATCH_MAX_IN_FLIGHT
+
+    loop = asyncio.get_running_loop()
+    start = time.perf_counter()
+    groups = group_items(items)
+    waiting = [item for group in groups.values() for item in group]
+    remaining = {model: sum(1 for item in items if item.model == model) for model in {item.model for item in items}}
+    pinned = set()
+    pin_errors: Dict[str, str] = {}
+    in_flight: Dict[asyncio.Future, Tuple[BatchItem, Any]] = {}
+    failed = 0
+    logger.info(f"Running batch of {len(items)} files in {len(groups)} model/language groups")
+
+    try:
+        while waiting or in_flight:
+            while waiting and len(in_flight) < max_in_flight:
+                item = waiting[0]
+                # Other engines and inference workers keep their own models
+                if (
+                    item.model not in pinned
+                    and not worker_supervisor.running
+                    and get_engine(item.options.get("engine")).name == "whisper"
+                ):
+                    if item.model not in pin_errors:
+                        try:
+                            await loop.run_in_executor(None, pin_whisper_model, item.model)
+                            pinned.add(item.model)
+                        except Exception as e:
+                            logger.error(f"Could not load {item.model} model for batch: {str(e)}")
+                            pin_errors[item.model] = str(e)
+                    if item.model in pin_errors:
+                        waiting.pop(0)
+                        remove_upload(item.path)
+                        remaining[item.model] -= 1
+                        failed += 1
+                        yield {**_result_line(item, None), "status": "failed", "error": pin_errors[item.model]}
+                        continue
+                if item.cost is None:
+                    item.cost = await loop.run_in_executor(None, WorkCost.for_file, item.path, item.model)
+
+                try:
+                    job = job_manager.submit(
+                        item.task,
+                        item.file_name,
+                        partial(tasks[item.task], audio_hash=item.audio_hash, **item.options),
+                        item.path,
+                        item.file_name,
+                        item.language,
+                        item.model,
+                        cost=item.cost,
+                        decode_path=item.path,
+                        audio_hash=item.audio_hash
+                    )
+                except QueueFullError as e:
+                    if in_flight:
+                        # Retry once one of our own jobs finishes
+                        break
+                    await asyncio.sleep(min(e.retry_after, MAX_RETRY_SECONDS))
+                    continue
+
+                waiting.pop(0)
+                in_flight[asyncio.wrap_future(job.future)] = (item, job)
+
+            if not in_flight:
+                # Every remaining file failed before submission
+                continue
+            done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+            for future in done:
+                item, job = in_flight.pop(future)
+                remove_upload(item.path)
+                remaining[item.model] -= 1
+                if remaining[item.model] == 0 and item.model in pinned:
+                    unpin_whisper_model(item.model)
+                    pinned.discard(item.model)
+
+                line = _result_line(item, job.job_id)
+                if future.exception() is None:
+                    line.update(status="completed", result=future.result())
+                else:
+                    failed += 1
+                    line.update(status="failed", error=str(future.exception()))
+                yield line
+
+        yield {
+            "type": "summary",
+            "files": len(items),
+            "completed": len(items) - failed,
+            "failed": failed,
+            "groups": [{"model": model, "language": language, "files": len(group)} for (model, language), group in groups.items()],
+            "seconds": time.perf_counter() - start,
+        }
+    finally:
+        # Reached early when the client disconnects; submitted jobs finish on their own
+        for item in waiting:
+            remove_upload(item.path)
+        for item, job in in_flight.values():
+            job.future.add_done_callback(lambda _, path=item.path: remove_upload(path))
+        for model in pinned:
+            unpin_whisper_model(model)
@@ -0,0 +1,181 @@
+import time
+import logging
+import threading
+import weakref
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Seconds without work after which a batcher's thread exits; it restarts on demand
+IDLE_SECONDS = 5.0
+
+# Batchers of the resident models, by model name; an evicted model takes its batcher with it
+_batchers: "weakref.WeakValueDictionary[str, EncoderBatcher]" = weakref.WeakValueDictionary()
+
+
+class EncoderBatcher:
+    """
+    Runs the encoder passes of concurrent requests on one model as a single batch
+
+    Whisper transcribes a recording one 30 s mel window at a time, and every
+    window starts with an encoder pass over a batch of one. The batcher
+    replaces the encoder's forward: each caller queues its window and waits,
+    while a serving thread gathers the windows that arrive within max_wait
+    of the oldest one (up to max_batch), runs them through the real encoder
+    together and hands each caller its slice of the output. Token decoding
+    stays per request, in the caller's thread.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        forward: Callable[[Any], Any],
+        max_batch: int,
+        max_wait: float
+    ):
+        self.name = name
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._forward = forward
+
+        # (mel, future, arrival time) of windows waiting for a batch
+        self._pending: Deque[Tuple[Any, Future, float]] = deque()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+        self.batches = 0
+        self.windows = 0
+        self.largest_batch = 0
+        self.wait_seconds = 0.0
+        self.encode_seconds = 0.0
+
+    def __call__(self, mel: Any) -> Any:
+        """Encode a mel batch from one request, sharing the pass with concurrent requests"""
+        future = Future()
+        with self._cond:
+            self._pending.append((mel, future, time.monotonic()))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._serve, name=f"{self.name}-batcher", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+        return future.result()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "batches": self.batches,
+                "windows": self.windows,
+                "mean_batch_size": self.windows / self.batches if self.batches else 0.0,
+                "largest_batch": self.largest_batch,
+                "mean_wait_ms": self.wait_seconds / self.windows * 1e3 if self.windows else 0.0,
+                "encode_seconds": self.encode_seconds,
+                "pending": len(self._pending),
+            }
+
+    def _next_batch(self) -> Optional[List[Tuple[Any, Future, float]]]:
+        """Wait for windows and take the next batch, or None once idle"""
+        with self._cond:
+            if not self._pending:
+                self._cond.wait(IDLE_SECONDS)
+                if not self._pending:
+                    self._thread = None
+                    return None
+
+            # The oldest window never waits more than max_wait for company
+            deadline = self._pending[0][2] + self.max_wait
+            while len(self._pending) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+
+            count = min(self.max_batch, len(self._pending))
+            return [self._pending.popleft() for _ in range(count)]
+
+    def _serve(self):
+        import torch
+
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+
+            # Windows can only be stacked if everything but the batch dimension matches
+            groups: Dict[Tuple[Any, ...], List[Tuple[Any, Future, float]]] = {}
+            for item in batch:
+                mel = item[0]
+                groups.setdefault((tuple(mel.shape[1:]), mel.dtype, mel.device), []).append(item)
+
+            for group in groups.values():
+                self._run(torch, group)
+
+    def _run(self, torch, group: List[Tuple[Any, Future, float]]):
+        start = time.monotonic()
+        try:
+            mels = torch.cat([mel for mel, _, _ in group]) if len(group) > 1 else group[0][0]
+            # Grad mode is per thread, so the callers' no_grad does not apply here
+            with torch.no_grad():
+                features = self._forward(mels)
+            parts = features.split([mel.shape[0] for mel, _, _ in group])
+        except Exception as e:
+            for _, future, _ in group:
+                future.set_exception(e)
+            return
+        elapsed = time.monotonic() - start
+
+        with self._cond:
+            self.batches += 1
+            self.windows += len(group)
+            self.largest_batch = max(self.largest_batch, len(group))
+            self.wait_seconds += sum(start - arrived for _, _, arrived in group)
+            self.encode_seconds += elapsed
+
+        for (_, future, _), part in zip(group, parts):
+            future.set_result(part)
+
+
+def enable_batching(
+    model: Any,
+    name: str,
+    max_batch: Optional[int] = None,
+    max_wait_ms: Optional[float] = None
+) -> EncoderBatcher:
+    """
+    Route a Whisper model's encoder passes through an EncoderBatcher
+
+    Args:
+        model: Loaded Whisper model
+        name: Model name, used in stats and thread names
+        max_batch: Most windows per encoder pass (defaults to settings.BATCHING_MAX_BATCH)
+        max_wait_ms: Longest a window waits for others (defaults to settings.BATCHING_MAX_WAIT_MS)
+
+    Returns:
+        The batcher now serving the model's encoder
+    """
+    if max_batch is None:
+        max_batch = settings.BATCHING_MAX_BATCH
+    if max_wait_ms is None:
+        max_wait_ms = settings.BATCHING_MAX_WAIT_MS
+
+    encoder = model.encoder
+    batcher = EncoderBatcher(name, encoder.forward, max_batch, max_wait_ms / 1000)
+    # An instance attribute shadows Module.forward, so encoder(mel) now goes through the batcher
+    encoder.forward = batcher
+    _batchers[name] = batcher
+    logger.info(f"Batching encoder passes of {name} (up to {max_batch} windows, {max_wait_ms:g} ms wait)")
+    return batcher
+
+
+def get_batching_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    Report batch counts and sizes of every resident model's batcher
+
+    Returns:
+        Dictionary of batcher statistics by model name
+    """
+    return {name: batcher.stats() for name, batcher in list(_batchers.items())}
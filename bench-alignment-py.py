@@ -0,0 +1,244 @@
+"""
+Benchmark for speaker alignment
+
+Compares the sweep-based align_segments against the reference
+combine_transcript_with_diarization on synthetic meetings of increasing
+length, after checking on many random inputs that both produce exactly
+the same speaker assignments. Word-level attribution is checked the same
+way against a brute-force reference, then timed (align_words) on a
+transcript with a large number of words. The same checks run with a
+fixed seed in tests/test_alignment.py.
+
+Usage (from the backend directory):
+    python benchmarks/alignment.py --hours 1 2 4 --trials 2000 --words 100000
+"""
+import os
+import sys
+import time
+import random
+import argparse
+from typing import List, Dict, Any, Tuple
+
+import numpy as np
+
+# Add parent directory to path so we can import the app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.services.alignment import align_segments, align_words, assign_word_speakers
+from app.services.diarization import combine_transcript_with_diarization
+
+
+def synthetic_meeting(
+    duration: float,
+    speakers: int = 6,
+    rng: random.Random = None
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Build Whisper-like segments and pyannote-like turns for a meeting
+
+    Args:
+        duration: Length of the meeting in seconds
+        speakers: Number of distinct speakers
+        rng: Random generator
+
+    Returns:
+        Tuple of (transcript segments, diarization segments)
+    """
+    rng = rng or random.Random(0)
+
+    transcript = []
+    t = 0.0
+    while t < duration:
+        length = rng.uniform(1.0, 8.0)
+        transcript.append({"start": t, "end": t + length, "text": f" segment {len(transcript)}"})
+        t += length + rng.uniform(0.0, 0.5)
+
+    turns = []
+    t = 0.0
+    while t < duration:
+        length = rng.uniform(0.5, 20.0)
+        turns.append({"start": t, "end": t + length, "speaker": f"SPEAKER_{rng.randrange(speakers):02d}"})
+        # Occasional overlapping speech
+        if rng.random() < 0.1:
+            overlap_start = t + rng.uniform(0.0, length)
+            turns.append({
+                "start": overlap_start,
+                "end": overlap_start + rng.uniform(0.5, 5.0),
+                "speaker": f"SPEAKER_{rng.randrange(speakers):02d}"
+            })
+        t += length + rng.uniform(0.0, 1.0)
+
+    return transcript, turns
+
+
+def add_words(transcript: List[Dict[str, Any]], total_words: int) -> List[Dict[str, Any]]:
+    """Split each segment into evenly spaced words until total_words are spread across the transcript"""
+    per_segment = max(1, total_words // max(len(transcript), 1))
+    with_words = []
+    for seg in transcript:
+        step = (seg["end"] - seg["start"]) / per_segment
+        words = [
+            {"word": f" w{i}", "start": seg["start"] + i * step, "end": seg["start"] + (i + 1) * step}
+            for i in range(per_segment)
+        ]
+        with_words.append({**seg, "words": words})
+    return with_words
+
+
+def random_case(rng: random.Random) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Small random inputs, on a coarse time grid so ties and touching edges are common"""
+    def interval():
+        start = rng.randrange(0, 40) / 2
+        return start, start + rng.randrange(0, 12) / 2
+
+    transcript = []
+    for i in range(rng.randrange(0, 15)):
+        start, end = interval()
+        transcript.append({"start": start, "end": end, "text": f" t{i}"})
+
+    turns = []
+    for _ in range(rng.randrange(0, 15)):
+        start, end = interval()
+        turns.append({"start": start, "end": end, "speaker": rng.choice("ABCD")})
+
+    return transcript, turns
+
+
+# Word-level inputs that random cases rarely produce: (words, turns)
+WORD_EDGE_CASES = [
+    # A speaker whose only turn has zero length
+    ([(0.0, 1.0), (1.0, 2.0)], [{"start": 0, "end": 2, "speaker": "A"}, {"start": 1, "end": 1, "speaker": "B"}]),
+]
+
+
+def _covered(start: float, end: float, turns: List[Dict[str, Any]]) -> float:
+    """Time between start and end covered by the union of the turns"""
+    clipped = sorted((max(start, turn["start"]), min(end, turn["end"])) for turn in turns)
+    covered = 0.0
+    reached = start
+    for clip_start, clip_end in clipped:
+        clip_start = max(clip_start, reached)
+        if clip_end > clip_start:
+            covered += clip_end - clip_start
+            reached = clip_end
+    return covered
+
+
+def reference_word_speakers(words: List[Tuple[float, float]], turns: List[Dict[str, Any]]) -> List[str]:
+    """Brute-force assign_word_speakers: every word against every speaker's turns"""
+    labels: List[str] = []
+    for turn in turns:
+        if turn["end"] > turn["start"] and turn["speaker"] not in labels:
+            labels.append(turn["speaker"])
+
+    best: List[str] = []
+    for start, end in words:
+        overlaps = [_covered(start, end, [turn for turn in turns if turn["speaker"] == label]) for label in labels]
+        best.append(labels[overlaps.index(max(overlaps))] if overlaps and max(overlaps) > 0 else None)
+
+    known = [label for label in best if label is not None]
+    if not known:
+        return ["UNKNOWN"] * len(words)
+    # Words in gaps take the previous word's speaker, leading ones the first known
+    filled = []
+    previous = known[0]
+    for label in best:
+        previous = label or previous
+        filled.append(previous)
+    return filled
+
+
+def random_word_case(rng: random.Random) -> Tuple[List[Tuple[float, float]], List[Dict[str, Any]]]:
+    """Random word timings and turns on the same coarse grid as random_case"""
+    transcript, turns = random_case(rng)
+    return [(seg["start"], seg["end"]) for seg in transcript], turns
+
+
+def _word_speakers(words: List[Tuple[float, float]], turns: List[Dict[str, Any]]) -> List[str]:
+    starts = np.array([start for start, _ in words], dtype=np.float64)
+    ends = np.array([end for _, end in words], dtype=np.float64)
+    return assign_word_speakers(starts, ends, turns)
+
+
+def check_equivalence(trials: int, seed: int) -> int:
+    """
+    Compare both implementations on random inputs, and word-level
+    attribution with its brute-force reference
+
+    Returns:
+        Number of mismatching cases
+    """
+    rng = random.Random(seed)
+    mismatches = 0
+    for trial in range(trials):
+        transcript, turns = random_case(rng)
+        expected = combine_transcript_with_diarization(transcript, turns)
+        actual = align_segments(transcript, turns)
+        if expected != actual:
+            mismatches += 1
+            if mismatches <= 3:
+                print(f"Mismatch in trial {trial}:\n  transcript={transcript}\n  turns={turns}")
+
+    word_cases = WORD_EDGE_CASES + [random_word_case(rng) for _ in range(trials)]
+    for trial, (words, turns) in enumerate(word_cases):
+        try:
+            matched = _word_speakers(words, turns) == reference_word_speakers(words, turns)
+        except Exception as e:
+            print(f"Word-level trial {trial} raised {e!r}")
+            matched = False
+        if not matched:
+            mismatches += 1
+            if mismatches <= 3:
+                print(f"Word-level mismatch in trial {trial}:\n  words={words}\n  turns={turns}")
+    return mismatches
+
+
+def time_call(func, *args, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hours", type=float, nargs="+", default=[0.5, 1, 2], help="Meeting lengths to benchmark")
+    parser.add_argument("--trials", type=int, default=2000, help="Random equivalence checks to run")
+    parser.add_argument("--words", type=int, default=100000, help="Words in the word-level benchmark")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--skip-reference-above", type=float, default=4.0,
+                        help="Do not time the O(NxM) reference for meetings longer than this many hours")
+    args = parser.parse_args()
+
+    mismatches = check_equivalence(args.trials, args.seed)
+    print(f"Equivalence: {mismatches} mismatches in {args.trials} segment-level and "
+          f"{args.trials + len(WORD_EDGE_CASES)} word-level cases")
+
+    print(f"{'hours':>6} {'segments':>9} {'turns':>7} {'reference':>11} {'sweep':>9} {'speedup':>8}")
+    for hours in args.hours:
+        transcript, turns = synthetic_meeting(hours * 3600, rng=random.Random(args.seed))
+        sweep = time_call(align_segments, transcript, turns)
+        if hours <= args.skip_reference_above:
+            reference = time_call(combine_transcript_with_diarization, transcript, turns, repeat=1)
+            if combine_transcript_with_diarization(transcript, turns) != align_segments(transcript, turns):
+                print(f"Mismatch on the {hours}h meeting")
+                mismatches += 1
+            speedup = f"{reference / sweep:7.1f}x"
+            reference_text = f"{reference * 1e3:9.1f}ms"
+        else:
+            speedup = "-"
+            reference_text = "-"
+        print(f"{hours:>6} {len(transcript):>9} {len(turns):>7} {reference_text:>11} {sweep * 1e3:7.1f}ms {speedup:>8}")
+
+    transcript, turns = synthetic_meeting(max(args.hours) * 3600, rng=random.Random(args.seed))
+    transcript = add_words(transcript, args.words)
+    word_count = sum(len(seg["words"]) for seg in transcript)
+    elapsed = time_call(align_words, transcript, turns)
+    print(f"Word-level: {word_count} words, {len(turns)} turns in {elapsed * 1e3:.1f}ms")
+
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
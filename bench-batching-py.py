@@ -0,0 +1,152 @@
+"""
+Throughput and latency benchmark for cross-request encoder batching
+
+Simulates concurrent clients transcribing short clips. Each request walks
+through its 30 s mel windows one after another, and every window costs one
+encoder pass followed by per-sequence decoding. The same workload runs on
+the per-request path and through EncoderBatcher, and the benchmark reports
+throughput and p50/p99 request latency for each client count.
+
+--model mock uses a small convolutional stand-in for the encoder plus a
+fixed decode cost, so it only needs torch. Any other value loads that
+Whisper model and decodes each window with whisper.decode.
+
+Usage (from the backend directory):
+    python benchmarks/batching.py --model mock --clients 1 4 8 16
+    python benchmarks/batching.py --model tiny --clients 4 8 --requests 5
+"""
+import os
+import sys
+import time
+import argparse
+import threading
+from typing import Any, Callable, List
+
+# Add parent directory to path so we can import the app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.services.batching import EncoderBatcher
+
+# Mel frames in one 30 s Whisper window
+WINDOW_FRAMES = 3000
+
+
+class MockWhisper:
+    """Encoder with Whisper's input shape and a decode step of fixed cost"""
+
+    def __init__(self, torch, n_mels: int = 80, width: int = 384, decode_ms: float = 20.0):
+        self.n_mels = n_mels
+        self.decode_seconds = decode_ms / 1000
+        self.encoder = torch.nn.Sequential(
+            torch.nn.Conv1d(n_mels, width, kernel_size=3, padding=1),
+            torch.nn.GELU(),
+            torch.nn.Conv1d(width, width, kernel_size=3, stride=2, padding=1),
+            torch.nn.GELU(),
+            torch.nn.Conv1d(width, width, kernel_size=3, padding=1),
+        ).eval()
+        self._torch = torch
+
+    def decode_window(self, mel):
+        with self._torch.no_grad():
+            self.encoder(mel)
+        # Token decoding is sequential per request and is not batched
+        time.sleep(self.decode_seconds)
+
+
+def whisper_decoder(model_name: str, sample_len: int) -> Any:
+    """A real Whisper model with decode_window running whisper.decode"""
+    import whisper
+
+    model = whisper.load_model(model_name)
+    model.n_mels = model.dims.n_mels
+    options = whisper.DecodingOptions(language="en", fp16=False, without_timestamps=True, sample_len=sample_len)
+    model.decode_window = lambda mel: whisper.decode(model, mel, options)
+    return model
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+
+def run_clients(
+    decode_window: Callable[[Any], Any],
+    mel: Any,
+    clients: int,
+    requests: int,
+    windows: int
+) -> List[float]:
+    """Run every client's requests concurrently and return each request's latency"""
+    latencies: List[float] = []
+    lock = threading.Lock()
+    barrier = threading.Barrier(clients)
+
+    def client():
+        barrier.wait()
+        for _ in range(requests):
+            start = time.perf_counter()
+            for _ in range(windows):
+                decode_window(mel)
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="mock", help="mock, or a Whisper model size")
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 4, 8], help="Concurrent client counts")
+    parser.add_argument("--requests", type=int, default=4, help="Requests per client")
+    parser.add_argument("--windows", type=int, default=1, help="30 s windows per request")
+    parser.add_argument("--max-batch", type=int, default=8)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    parser.add_argument("--decode-ms", type=float, default=20.0, help="Mock only: decode time per window")
+    parser.add_argument("--sample-len", type=int, default=16, help="Whisper only: tokens decoded per window")
+    args = parser.parse_args()
+
+    import torch
+
+    if args.model == "mock":
+        model = MockWhisper(torch, decode_ms=args.decode_ms)
+    else:
+        model = whisper_decoder(args.model, args.sample_len)
+    mel = torch.randn(1, model.n_mels, WINDOW_FRAMES)
+
+    # Warm up the kernels before timing
+    model.decode_window(mel)
+
+    print(f"Model: {args.model}, {args.requests} requests per client, {args.windows} windows per request")
+    print(f"{'clients':>7} {'mode':>11} {'req/s':>8} {'p50 ms':>9} {'p99 ms':>9} {'batch':>6}")
+    for clients in args.clients:
+        for mode in ("per-request", "batched"):
+            batcher = None
+            if mode == "batched":
+                batcher = EncoderBatcher(args.model, model.encoder.forward, args.max_batch, args.max_wait_ms / 1000)
+                model.encoder.forward = batcher
+
+            start = time.perf_counter()
+            latencies = run_clients(model.decode_window, mel, clients, args.requests, args.windows)
+            elapsed = time.perf_counter() - start
+
+            batch_size = "-"
+            if batcher is not None:
+                batch_size = f"{batcher.stats()['mean_batch_size']:.1f}"
+                # Back to Module.forward
+                del model.encoder.forward
+
+            print(
+                f"{clients:>7} {mode:>11} {len(latencies) / elapsed:8.2f} "
+                f"{percentile(latencies, 50) * 1e3:9.1f} {percentile(latencies, 99) * 1e3:9.1f} {batch_size:>6}"
+            )
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
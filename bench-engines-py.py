@@ -0,0 +1,147 @@
+"""
+Speed, memory and accuracy benchmark for the transcription engines
+
+Transcribes a fixed local corpus with each engine and reports:
+
+    load s   time to load the model
+    RTF      inference time / audio duration, lower is better
+    peak MB  peak resident memory of the process running the engine
+    WER      corpus word error rate against the reference transcripts
+
+The corpus is a directory of audio files, each with a reference transcript
+of the same name ending in .txt (meeting.wav and meeting.txt). Each engine
+runs in a fresh process, so peak memory covers only that engine's model
+and inference. Audio is decoded before timing, and long recordings are not
+chunked, so only inference is compared.
+
+Usage (from the backend directory):
+    python benchmarks/engines.py --corpus corpus/ --model base
+    python benchmarks/engines.py --corpus corpus/ --model small --engines whisper faster-whisper --language en
+"""
+import os
+import re
+import sys
+import time
+import resource
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+# Add parent directory to path so we can import the app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.core.config import settings
+from app.services.engines import ENGINES
+
+AUDIO_SUFFIXES = (".wav", ".mp3", ".flac", ".m4a", ".ogg", ".opus", ".webm")
+
+
+def load_corpus(directory: str) -> List[Tuple[str, str]]:
+    """(audio path, reference text) for every audio file with a reference transcript"""
+    corpus = []
+    for name in sorted(os.listdir(directory)):
+        stem, suffix = os.path.splitext(name)
+        reference = os.path.join(directory, f"{stem}.txt")
+        if suffix.lower() in AUDIO_SUFFIXES and os.path.exists(reference):
+            with open(reference, encoding="utf-8") as f:
+                corpus.append((os.path.join(directory, name), f.read()))
+    return corpus
+
+
+def normalize(text: str) -> List[str]:
+    """Lowercase words without punctuation, so formatting differences are not counted as errors"""
+    return re.sub(r"[^\w\s']", " ", text.lower()).split()
+
+
+def word_errors(reference: List[str], hypothesis: List[str]) -> int:
+    """Substitutions, deletions and insertions turning the reference into the hypothesis"""
+    previous = list(range(len(hypothesis) + 1))
+    for i, ref_word in enumerate(reference, 1):
+        current = [i]
+        for j, hyp_word in enumerate(hypothesis, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ref_word != hyp_word)
+            ))
+        previous = current
+    return previous[-1]
+
+
+def run_engine(engine_name: str, model: str, paths: List[str], language: Optional[str]) -> Dict[str, Any]:
+    """Load one engine's model and transcribe the corpus; runs in its own process"""
+    from app.services.audio import decode_audio
+    from app.services.engines import get_engine
+
+    settings.LONG_AUDIO_ENABLED = False
+    engine = get_engine(engine_name)
+
+    start = time.perf_counter()
+    engine.load(model)
+    load_seconds = time.perf_counter() - start
+
+    options = {"verbose": None, "fp16": False}
+    if language:
+        options["language"] = language
+
+    texts = []
+    audio_seconds = 0.0
+    inference_seconds = 0.0
+    for path in paths:
+        with decode_audio(path) as audio:
+            audio_seconds += audio.duration
+            start = time.perf_counter()
+            result = engine.transcribe(path, model, options, audio)
+            inference_seconds += time.perf_counter() - start
+        texts.append(result["text"])
+
+    return {
+        "load_seconds": load_seconds,
+        "audio_seconds": audio_seconds,
+        "inference_seconds": inference_seconds,
+        # Kilobytes on Linux
+        "peak_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "texts": texts,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", required=True, help="Directory of audio files with .txt reference transcripts")
+    parser.add_argument("--model", default="base", help="Whisper model size")
+    parser.add_argument("--engines", nargs="+", default=["whisper", "faster-whisper"], choices=sorted(ENGINES))
+    parser.add_argument("--language", default="en", help="Whisper language code (empty to detect)")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    if not corpus:
+        parser.error(f"No audio files with reference transcripts in {args.corpus}")
+    references = [normalize(text) for _, text in corpus]
+    reference_words = sum(len(words) for words in references)
+
+    print(f"Corpus: {len(corpus)} files, {reference_words} reference words, model {args.model}")
+    print(f"{'engine':>15} {'load s':>7} {'RTF':>7} {'peak MB':>8} {'WER':>7}")
+    for engine_name in args.engines:
+        # Spawn rather than fork: a fresh process per engine keeps the memory peaks apart
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+            try:
+                paths = [path for path, _ in corpus]
+                result = pool.submit(run_engine, engine_name, args.model, paths, args.language or None).result()
+            except Exception as e:
+                print(f"{engine_name:>15} failed: {e}")
+                continue
+
+        errors = sum(
+            word_errors(reference, normalize(text)) for reference, text in zip(references, result["texts"])
+        )
+        print(
+            f"{engine_name:>15} {result['load_seconds']:7.2f} "
+            f"{result['inference_seconds'] / result['audio_seconds']:7.3f} "
+            f"{result['peak_mb']:8.0f} {errors / reference_words:7.1%}"
+        )
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
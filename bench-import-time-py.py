@@ -0,0 +1,82 @@
+"""
+Import-time benchmark for the API process
+
+Runs `python -X importtime -c "import main"` in a fresh interpreter, prints
+the slowest imports and fails when the total import time exceeds the
+threshold or when a heavy ML package is imported at startup.
+
+Usage (from the backend directory):
+    python benchmarks/import_time.py --threshold 1.0
+"""
+import sys
+import argparse
+import subprocess
+from typing import List, Tuple
+
+# Packages that must only be imported inside the engines or during preload.
+# numpy is cheap enough to import eagerly and only counts towards the threshold.
+HEAVY_MODULES = ("torch", "torchaudio", "whisper", "pyannote", "faster_whisper", "ctranslate2")
+
+
+def measure_imports(module: str) -> List[Tuple[str, int, int]]:
+    """
+    Import a module in a fresh interpreter with -X importtime
+
+    Args:
+        module: Module to import
+
+    Returns:
+        List of (module name, self time in us, cumulative time in us)
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr}")
+
+    timings = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        timings.append((name.strip(), int(self_us), int(cumulative_us)))
+    return timings
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="main", help="Module to import (default: main)")
+    parser.add_argument("--threshold", type=float, default=1.0, help="Maximum total import time in seconds")
+    parser.add_argument("--top", type=int, default=15, help="Number of slowest imports to show")
+    args = parser.parse_args()
+
+    timings = measure_imports(args.module)
+
+    # Top-level imports are the ones without indentation in the report
+    total_us = sum(cumulative for name, _, cumulative in timings if not name.startswith(" "))
+    total = total_us / 1e6
+
+    print(f"Slowest imports for '{args.module}' (cumulative):")
+    for name, _, cumulative in sorted(timings, key=lambda t: t[2], reverse=True)[:args.top]:
+        print(f"  {cumulative / 1e3:9.1f} ms  {name.strip()}")
+    print(f"Total import time: {total:.3f}s (threshold {args.threshold:.3f}s)")
+
+    heavy = sorted(set(
+        name.strip() for name, _, _ in timings
+        if name.strip().split(".")[0] in HEAVY_MODULES
+    ))
+    failed = False
+    if heavy:
+        print(f"FAIL: heavy modules imported at startup: {', '.join(heavy[:10])}")
+        failed = True
+    if total > args.threshold:
+        print(f"FAIL: import time regressed past {args.threshold:.3f}s")
+        failed = True
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,156 @@
+"""
+Disk I/O and latency benchmark for zero-disk ingestion
+
+Takes an audio file through the two ingestion paths and reports, per path,
+the time from the first uploaded byte to decoded PCM and the bytes written
+to storage:
+
+    disk    save the upload to UPLOAD_DIR, then decode the saved file
+            (what the multipart endpoints do)
+    stream  pipe the upload into ffmpeg and keep the PCM in memory
+            (POST /ingest)
+
+Bytes written come from /proc/self/io (write_bytes, Linux only), so they
+include everything this process sent to the block layer. With --mbps the
+upload is paced like a client on a link of that speed, which is where
+streaming also overlaps the transfer with decoding. Settings are left at
+their defaults, so anything the ingest path writes to the feature cache is
+counted too.
+
+Usage (from the backend directory):
+    python benchmarks/ingest.py --file meeting.mp3
+    python benchmarks/ingest.py --file meeting.mp3 --mbps 100 --repeat 5
+"""
+import io
+import os
+import sys
+import time
+import argparse
+from typing import Dict, Iterator, List, Optional
+
+# Add parent directory to path so we can import the app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.services.audio import decode_audio
+from app.services.ingest import ingest_stream, needs_seeking, PROBE_BYTES
+from app.services.uploads import store_upload, remove_upload
+
+# Size of the chunks a request body arrives in
+BODY_CHUNK_BYTES = 64 * 1024
+
+
+def written_bytes() -> Optional[int]:
+    """Bytes this process has caused to be written to storage"""
+    try:
+        with open("/proc/self/io") as io_stats:
+            for line in io_stats:
+                if line.startswith("write_bytes:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def paced_chunks(data: bytes, mbps: float) -> Iterator[bytes]:
+    """Yield the upload in body-sized chunks, no faster than mbps megabits per second"""
+    start = time.perf_counter()
+    for offset in range(0, len(data), BODY_CHUNK_BYTES):
+        if mbps > 0:
+            delay = start + offset * 8 / (mbps * 1e6) - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        yield data[offset:offset + BODY_CHUNK_BYTES]
+
+
+class PacedReader(io.RawIOBase):
+    """File-like view of paced_chunks, as store_upload reads a multipart upload"""
+
+    def __init__(self, chunks: Iterator[bytes]):
+        self._chunks = chunks
+        self._pending = b""
+
+    def readable(self) -> bool:
+        return True
+
+    def read(self, size: int = -1) -> bytes:
+        while size < 0 or len(self._pending) < size:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            self._pending += chunk
+        if size < 0:
+            size = len(self._pending)
+        data, self._pending = self._pending[:size], self._pending[size:]
+        return data
+
+
+def ingest_via_disk(data: bytes, file_name: str, mbps: float) -> float:
+    path, _ = store_upload(PacedReader(paced_chunks(data, mbps)), file_name)
+    try:
+        with decode_audio(path) as audio:
+            return audio.duration
+    finally:
+        remove_upload(path)
+
+
+def ingest_via_stream(data: bytes, file_name: str, mbps: float) -> float:
+    upload = ingest_stream(paced_chunks(data, mbps), file_name)
+    if upload.spooled:
+        try:
+            with decode_audio(upload.path) as audio:
+                return audio.duration
+        finally:
+            remove_upload(upload.path)
+    with upload.audio as audio:
+        return audio.duration
+
+
+def measure(path_name: str, data: bytes, file_name: str, mbps: float, repeat: int) -> Dict[str, float]:
+    latencies: List[float] = []
+    writes: List[int] = []
+    run = ingest_via_disk if path_name == "disk" else ingest_via_stream
+    for _ in range(repeat):
+        before = written_bytes()
+        start = time.perf_counter()
+        duration = run(data, file_name, mbps)
+        latencies.append(time.perf_counter() - start)
+        # Make sure dirty pages are counted against this run
+        os.sync()
+        after = written_bytes()
+        if before is not None and after is not None:
+            writes.append(after - before)
+    latencies.sort()
+    return {
+        "audio_seconds": duration,
+        "median_seconds": latencies[len(latencies) // 2],
+        "min_seconds": latencies[0],
+        "written_mb": sum(writes) / len(writes) / 1024 ** 2 if writes else float("nan"),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--file", required=True, help="Audio file to ingest")
+    parser.add_argument("--mbps", type=float, default=0.0, help="Upload link speed to simulate (0 = unpaced)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per path")
+    args = parser.parse_args()
+
+    with open(args.file, "rb") as f:
+        data = f.read()
+    file_name = os.path.basename(args.file)
+
+    if needs_seeking(data[:PROBE_BYTES]):
+        print("Note: this container needs seeking, so the stream path spools it to disk")
+
+    print(f"{file_name}: {len(data) / 1024 ** 2:.1f} MB, link {'unpaced' if args.mbps <= 0 else f'{args.mbps:g} Mbit/s'}")
+    print(f"{'path':>7} {'audio s':>8} {'median s':>9} {'min s':>7} {'written MB':>11}")
+    for path_name in ("disk", "stream"):
+        result = measure(path_name, data, file_name, args.mbps, args.repeat)
+        print(
+            f"{path_name:>7} {result['audio_seconds']:8.1f} {result['median_seconds']:9.3f} "
+            f"{result['min_seconds']:7.3f} {result['written_mb']:11.1f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
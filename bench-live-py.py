@@ -0,0 +1,142 @@
+"""
+Caption latency benchmark for live transcription
+
+Replays an audio file at 1x speed in small PCM frames, as a microphone
+would, and measures end-to-end caption latency: the time from the moment
+the audio ending a caption was sent to the moment the caption arrived.
+Partial hypotheses and final segments are reported separately.
+
+By default the frames go straight into run_live_session in this process.
+With --url, they are sent to a running server's /live WebSocket instead
+(requires the websockets package).
+
+Usage (from the backend directory):
+    python benchmarks/live.py --file meeting.wav --model base
+    python benchmarks/live.py --file meeting.wav --url ws://localhost:8000/api/v1/live
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+# Add parent directory to path so we can import the app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.services.audio import decode_audio, SAMPLE_RATE
+from app.services.live import LiveTranscriber, run_live_session
+from app.services.transcription import get_whisper_model
+
+
+def pcm_frames(samples: np.ndarray, frame_ms: float) -> List[bytes]:
+    """Split float samples into 16-bit PCM frames"""
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767).astype(np.int16)
+    frame_length = int(SAMPLE_RATE * frame_ms / 1000)
+    return [pcm[i:i + frame_length].tobytes() for i in range(0, len(pcm), frame_length)]
+
+
+class Replay:
+    """Feeds frames on the 1x wall clock and records caption latencies"""
+
+    def __init__(self, frames: List[bytes], frame_ms: float):
+        self.frames = frames
+        self.frame_seconds = frame_ms / 1000
+        self.started_at: Optional[float] = None
+        self.sent = 0
+        self.latencies: Dict[str, List[float]] = {"partial": [], "final": []}
+        self.events: List[Dict[str, Any]] = []
+
+    async def next_frame(self) -> Optional[bytes]:
+        if self.started_at is None:
+            self.started_at = time.perf_counter()
+        if self.sent >= len(self.frames):
+            return None
+        # Frame i is fully "spoken" at (i + 1) * frame_seconds
+        delay = self.started_at + (self.sent + 1) * self.frame_seconds - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        frame = self.frames[self.sent]
+        self.sent += 1
+        return frame
+
+    async def on_event(self, event: Dict[str, Any]):
+        self.events.append(event)
+        if event["type"] in self.latencies:
+            spoken_at = self.started_at + event["end"]
+            self.latencies[event["type"]].append(time.perf_counter() - spoken_at)
+
+
+async def replay_local(replay: Replay, model: str, language: str):
+    transcriber = LiveTranscriber(model, language)
+    await run_live_session(transcriber, replay.next_frame, replay.on_event)
+
+
+async def replay_remote(replay: Replay, url: str, model: str, language: str):
+    import websockets
+
+    async with websockets.connect(f"{url}?model={model}&language={language}&format=s16le") as websocket:
+        # Wait until the server has the model loaded
+        while json.loads(await websocket.recv())["type"] != "ready":
+            pass
+
+        async def send_frames():
+            while True:
+                frame = await replay.next_frame()
+                if frame is None:
+                    await websocket.send("stop")
+                    return
+                await websocket.send(frame)
+
+        sender = asyncio.ensure_future(send_frames())
+        async for message in websocket:
+            event = json.loads(message)
+            await replay.on_event(event)
+            if event["type"] == "summary":
+                break
+        await sender
+
+
+def describe(latencies: List[float]) -> str:
+    if not latencies:
+        return "none"
+    values = np.array(latencies) * 1e3
+    return (
+        f"{len(values)} events, p50 {np.percentile(values, 50):.0f} ms, "
+        f"p95 {np.percentile(values, 95):.0f} ms, max {values.max():.0f} ms"
+    )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--file", required=True, help="Audio file to replay")
+    parser.add_argument("--model", default="base", help="Whisper model size")
+    parser.add_argument("--language", default="English", help="Language of the audio")
+    parser.add_argument("--frame-ms", type=float, default=20.0, help="Audio per frame")
+    parser.add_argument("--url", help="WebSocket URL of a running server's /live endpoint")
+    args = parser.parse_args()
+
+    with decode_audio(args.file) as audio:
+        frames = pcm_frames(audio.samples, args.frame_ms)
+        duration = audio.duration
+
+    replay = Replay(frames, args.frame_ms)
+    if args.url:
+        asyncio.run(replay_remote(replay, args.url, args.model, args.language))
+    else:
+        # Load outside the timed replay, like the server does before sending "ready"
+        get_whisper_model(args.model)
+        asyncio.run(replay_local(replay, args.model, args.language))
+
+    summary = next((event for event in replay.events if event["type"] == "summary"), {})
+    print(f"Replayed {duration:.1f}s of audio with {args.model} in {args.frame_ms:g} ms frames")
+    print(f"Partial captions: {describe(replay.latencies['partial'])}")
+    print(f"Final captions:   {describe(replay.latencies['final'])}")
+    print(f"Dropped audio:    {summary.get('dropped_seconds', 0.0):.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,72 @@
+"""
+Throughput benchmark for long-audio transcription
+
+Transcribes one local recording serially on a single model instance and
+then in parallel chunks with different worker counts, and reports the
+real-time factor (processing time / audio duration, lower is better).
+
+Usage (from the backend directory):
+    python benchmarks/long_audio.py --file meeting.wav --model base --workers 2 4 8
+"""
+import os
+import sys
+import time
+import argparse
+
+# Add parent directory to path so we can import the app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.core.config import settings
+from app.services.audio import decode_audio, DecodedAudio, SAMPLE_RATE
+from app.services.chunking import transcribe_long_audio, shutdown_pool
+from app.services.transcription import get_whisper_model
+
+# Seconds of audio per worker transcribed before timing, so model loading is excluded
+WARM_UP_SECONDS = 10
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--file", required=True, help="Audio file to transcribe")
+    parser.add_argument("--model", default="base", help="Whisper model size")
+    parser.add_argument("--language", default="en", help="Whisper language code")
+    parser.add_argument("--workers", type=int, nargs="+", default=[2, 4], help="Worker counts to try")
+    parser.add_argument("--threads-per-worker", type=int, default=settings.LONG_AUDIO_THREADS_PER_WORKER)
+    parser.add_argument("--chunk-seconds", type=float, default=settings.LONG_AUDIO_CHUNK_SECONDS)
+    parser.add_argument("--skip-serial", action="store_true", help="Do not run the serial baseline")
+    args = parser.parse_args()
+
+    options = {"verbose": False, "fp16": False, "language": args.language}
+    settings.LONG_AUDIO_THREADS_PER_WORKER = args.threads_per_worker
+
+    with decode_audio(args.file) as audio:
+        print(f"Audio: {audio.duration:.1f}s, decoded in {audio.decode_seconds:.2f}s")
+        print(f"{'mode':>18} {'seconds':>9} {'RTF':>7} {'segments':>9}")
+
+        if not args.skip_serial:
+            model = get_whisper_model(args.model)
+            start = time.perf_counter()
+            result = model.transcribe(audio.samples, **options)
+            elapsed = time.perf_counter() - start
+            print(f"{'serial':>18} {elapsed:9.1f} {elapsed / audio.duration:7.3f} {len(result['segments']):>9}")
+
+        for workers in args.workers:
+            settings.LONG_AUDIO_WORKERS = workers
+            shutdown_pool()
+            # One short chunk per worker, so every worker loads the model before timing
+            settings.LONG_AUDIO_CHUNK_SECONDS = WARM_UP_SECONDS
+            warm_up = DecodedAudio(audio.samples[:workers * WARM_UP_SECONDS * SAMPLE_RATE], 0.0)
+            transcribe_long_audio(warm_up, args.model, options)
+            settings.LONG_AUDIO_CHUNK_SECONDS = args.chunk_seconds
+
+            start = time.perf_counter()
+            result = transcribe_long_audio(audio, args.model, options)
+            elapsed = time.perf_counter() - start
+            label = f"{workers}x{args.threads_per_worker} threads"
+            print(f"{label:>18} {elapsed:9.1f} {elapsed / audio.duration:7.3f} {len(result['segments']):>9}")
+
+    shutdown_pool()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
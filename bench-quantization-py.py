@@ -0,0 +1,99 @@
+"""
+Float32 versus int8 benchmark for Whisper models
+
+Loads the float32 and the dynamically quantized int8 variant of a model
+through the Whisper model cache, transcribes the same files with each and
+reports what GET /api/v1/models reports once both variants have run:
+
+    MB       measured size of the weights
+    RTF      inference time / audio duration, lower is better
+    ratio    int8 / float32
+    changed  words of the int8 transcript that differ from the float32 one
+
+A server only serves the variant selected by WHISPER_QUANTIZE_MODELS and
+keeps its statistics in memory, so run this to decide per model size
+whether to list it. Quantized models are stored under
+WHISPER_QUANTIZED_DIR, where the server then finds them.
+
+Usage (from the backend directory):
+    python benchmarks/quantization.py --model base meeting.wav interview.mp3
+    python benchmarks/quantization.py --model small --output small.json meeting.wav
+"""
+import os
+import sys
+import json
+import argparse
+from difflib import SequenceMatcher
+from typing import Dict, List, Tuple
+
+# Add parent directory to path so we can import the app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.core.config import settings
+from app.services.audio import decode_audio, DecodedAudio
+from app.services.transcription import run_whisper, get_model_cache_stats
+
+VARIANTS = ("float32", "int8")
+
+
+def transcribe_all(model: str, audios: List[Tuple[str, DecodedAudio]], options: Dict, quantize: bool) -> List[str]:
+    """Transcribe every file with one variant; the first file is run once untimed to warm up"""
+    # The served variant is chosen per model size, exactly as in the server
+    settings.WHISPER_QUANTIZE_MODELS = [model] if quantize else []
+    run_whisper(audios[0][0], model, options, audio=audios[0][1], record_latency=False)
+    return [run_whisper(path, model, options, audio=audio)["text"] for path, audio in audios]
+
+
+def changed_words(reference: str, hypothesis: str) -> float:
+    """Fraction of the reference words not matched in the hypothesis"""
+    reference_words, hypothesis_words = reference.lower().split(), hypothesis.lower().split()
+    if not reference_words:
+        return 0.0
+    matcher = SequenceMatcher(None, reference_words, hypothesis_words, autojunk=False)
+    matched = sum(block.size for block in matcher.get_matching_blocks())
+    return 1 - matched / len(reference_words)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="+", help="Audio files to transcribe")
+    parser.add_argument("--model", default="base", help="Whisper model size")
+    parser.add_argument("--language", default="en", help="Whisper language code (empty to detect)")
+    parser.add_argument("--output", help="Also write the report to this JSON file")
+    args = parser.parse_args()
+
+    # Time whole-file inference only
+    settings.LONG_AUDIO_ENABLED = False
+    settings.BATCHING_ENABLED = False
+    options = {"verbose": None, "fp16": False}
+    if args.language:
+        options["language"] = args.language
+
+    audios = [(path, decode_audio(path)) for path in args.files]
+    print(f"Audio: {len(audios)} files, {sum(audio.duration for _, audio in audios):.1f}s, model {args.model}")
+
+    try:
+        texts = {variant: transcribe_all(args.model, audios, options, variant == "int8") for variant in VARIANTS}
+    finally:
+        for _, audio in audios:
+            audio.close()
+
+    report = dict(get_model_cache_stats()["quantization"][args.model])
+    report["changed_words"] = round(
+        sum(changed_words(reference, text) for reference, text in zip(texts["float32"], texts["int8"])) / len(audios),
+        4
+    )
+
+    print(f"{'variant':>8} {'MB':>8} {'RTF':>7}")
+    for variant in VARIANTS:
+        print(f"{variant:>8} {report[f'{variant}_bytes'] / 1024 ** 2:8.0f} {report[f'{variant}_rtf']:7.3f}")
+    print(f"{'ratio':>8} {report.get('bytes_ratio', 0):8.3f} {report.get('rtf_ratio', 0):7.3f}")
+    print(f"{'changed':>8} {report['changed_words']:8.1%}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({args.model: report}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
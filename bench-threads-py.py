@@ -0,0 +1,144 @@
+"""
+Aggregate real-time factor benchmark for the thread budget
+
+Runs 1, 2, 4 and 8 concurrent jobs, each in its own thread like the job
+pool does, and reports the aggregate real-time factor (wall seconds per
+second of audio processed by all jobs together; lower is better) for two
+ways of setting torch's thread count:
+
+    unmanaged  every job uses all available cores, so concurrent jobs
+               oversubscribe the CPU
+    budgeted   every job holds a thread budget lease and the cores are
+               split among the running jobs, rebalanced at every window
+
+--model mock runs a convolutional stand-in for the Whisper encoder over
+30 s mel windows, so it only needs torch. Any other value transcribes
+--file with that Whisper model.
+
+Usage (from the backend directory):
+    python benchmarks/threads.py --model mock --jobs 1 2 4 8
+    python benchmarks/threads.py --model base --file meeting.mp3 --jobs 1 2 4
+"""
+import os
+import sys
+import time
+import argparse
+import threading
+from typing import Callable, List
+
+# Add parent directory to path so we can import the app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.services.thread_budget import thread_budget, available_cpus, install_checkpoints
+
+# Mel frames in one 30 s Whisper window
+WINDOW_FRAMES = 3000
+WINDOW_SECONDS = 30.0
+
+
+def mock_job(torch, windows: int) -> Callable[[], float]:
+    """A job running an encoder-sized stack of convolutions over each window"""
+    encoder = torch.nn.Sequential(
+        torch.nn.Conv1d(80, 512, kernel_size=3, padding=1),
+        torch.nn.GELU(),
+        torch.nn.Conv1d(512, 512, kernel_size=3, stride=2, padding=1),
+        torch.nn.GELU(),
+        torch.nn.Conv1d(512, 512, kernel_size=3, padding=1),
+    ).eval()
+    mel = torch.randn(1, 80, WINDOW_FRAMES)
+
+    def run() -> float:
+        with torch.no_grad():
+            for _ in range(windows):
+                # Where whisper.transcribe calls model.decode
+                thread_budget.checkpoint()
+                encoder(mel)
+        return windows * WINDOW_SECONDS
+
+    return run
+
+
+def whisper_job(model_name: str, file_path: str) -> Callable[[], float]:
+    """A job transcribing the file with a real Whisper model"""
+    import whisper
+    from app.services.audio import decode_audio
+
+    model = whisper.load_model(model_name)
+    install_checkpoints(model)
+    with decode_audio(file_path) as audio:
+        samples = audio.samples.copy()
+    duration = len(samples) / 16000
+
+    def run() -> float:
+        model.transcribe(samples, fp16=False, verbose=None, condition_on_previous_text=False)
+        return duration
+
+    return run
+
+
+def run_jobs(job: Callable[[], float], jobs: int, budgeted: bool, total_threads: int) -> float:
+    """Run the jobs concurrently and return the aggregate real-time factor"""
+    import torch
+
+    audio_seconds: List[float] = []
+    lock = threading.Lock()
+    barrier = threading.Barrier(jobs)
+
+    def worker(index: int):
+        barrier.wait()
+        if budgeted:
+            with thread_budget.lease(f"job-{index}"):
+                seconds = job()
+        else:
+            torch.set_num_threads(total_threads)
+            seconds = job()
+        with lock:
+            audio_seconds.append(seconds)
+
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(jobs)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return (time.perf_counter() - start) / sum(audio_seconds)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="mock", help="mock, or a Whisper model size")
+    parser.add_argument("--file", help="Audio file to transcribe (Whisper models only)")
+    parser.add_argument("--jobs", type=int, nargs="+", default=[1, 2, 4, 8], help="Concurrent job counts")
+    parser.add_argument("--windows", type=int, default=4, help="Mock only: 30 s windows per job")
+    parser.add_argument("--threads", type=int, default=0, help="Cores to use (0 = what the affinity mask and CPU quota allow)")
+    parser.add_argument("--pin", action="store_true", help="Pin budgeted jobs to their own cores")
+    args = parser.parse_args()
+
+    import torch
+
+    total_threads = args.threads or available_cpus()
+    thread_budget.resize(total_threads)
+    thread_budget.pin = args.pin
+
+    if args.model == "mock":
+        job = mock_job(torch, args.windows)
+    elif args.file:
+        job = whisper_job(args.model, args.file)
+    else:
+        parser.error("--file is required with a Whisper model")
+
+    # Warm up the kernels before timing
+    torch.set_num_threads(total_threads)
+    job()
+
+    print(f"Model: {args.model}, {total_threads} cores{', pinned' if args.pin else ''}")
+    print(f"{'jobs':>5} {'unmanaged RTF':>14} {'budgeted RTF':>13} {'speedup':>8}")
+    for jobs in args.jobs:
+        unmanaged = run_jobs(job, jobs, False, total_threads)
+        budgeted = run_jobs(job, jobs, True, total_threads)
+        print(f"{jobs:>5} {unmanaged:14.4f} {budgeted:13.4f} {unmanaged / budgeted:7.2f}x")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
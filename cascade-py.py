@@ -0,0 +1,248 @@
+import math
+import time
+import logging
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.services.audio import DecodedAudio, decode_audio
+from app.services.engines import get_engine
+from app.services.quantization import quantized_key, is_quantized
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Characters of preceding text passed to the larger model as context for a re-decoded span
+PROMPT_CHARS = 200
+
+# Whisper decodes audio in windows of this length, padding shorter input to a full window
+WINDOW_SECONDS = 30.0
+
+
+def uses_cascade(model: str, cascade: bool) -> bool:
+    """Whether a request cascades: only a draft model other than the requested one changes anything"""
+    return bool(cascade) and model.lower() != settings.CASCADE_DRAFT_MODEL.lower()
+
+
+def cascade_key(engine_name: str) -> List[Any]:
+    """The settings a cascaded transcript depends on, for its result-cache key"""
+    draft = settings.CASCADE_DRAFT_MODEL.lower()
+    if get_engine(engine_name).name == "whisper" and is_quantized(draft):
+        draft = quantized_key(draft)
+    return [
+        draft,
+        settings.CASCADE_MIN_AVG_LOGPROB,
+        settings.CASCADE_MAX_NO_SPEECH_PROB,
+        settings.CASCADE_MAX_COMPRESSION_RATIO,
+        settings.CASCADE_PADDING_SECONDS,
+        settings.CASCADE_FULL_RERUN_FRACTION,
+    ]
+
+
+def needs_escalation(segment: Dict[str, Any]) -> bool:
+    """
+    Whether a draft segment is uncertain enough to re-decode with the larger model
+
+    Segments without confidence fields (e.g. from the mock engine) are kept.
+    """
+    avg_logprob = segment.get("avg_logprob")
+    no_speech_prob = segment.get("no_speech_prob")
+    compression_ratio = segment.get("compression_ratio")
+    return (
+        (avg_logprob is not None and avg_logprob < settings.CASCADE_MIN_AVG_LOGPROB)
+        or (no_speech_prob is not None and no_speech_prob > settings.CASCADE_MAX_NO_SPEECH_PROB)
+        # Repetitive text is a sign of a decoding loop
+        or (compression_ratio is not None and compression_ratio > settings.CASCADE_MAX_COMPRESSION_RATIO)
+    )
+
+
+def escalation_spans(segments: List[Dict[str, Any]], duration: float) -> List[Tuple[int, int, float, float]]:
+    """
+    Group consecutive uncertain draft segments into spans of audio to re-decode
+
+    Each span reaches into the silence around it by up to
+    CASCADE_PADDING_SECONDS, never into a kept segment, so words clipped by
+    the draft's timestamps are not lost.
+
+    Args:
+        segments: Draft segments in order
+        duration: Length of the audio in seconds
+
+    Returns:
+        (first segment index, last segment index + 1, start, end) per span
+    """
+    spans = []
+    index = 0
+    while index < len(segments):
+        if not needs_escalation(segments[index]):
+            index += 1
+            continue
+        first = index
+        while index < len(segments) and needs_escalation(segments[index]):
+            index += 1
+
+        previous_end = segments[first - 1]["end"] if first > 0 else 0.0
+        next_start = segments[index]["start"] if index < len(segments) else duration
+        start = max(previous_end, segments[first]["start"] - settings.CASCADE_PADDING_SECONDS, 0.0)
+        end = min(next_start, segments[index - 1]["end"] + settings.CASCADE_PADDING_SECONDS, duration)
+        spans.append((first, index, start, max(start, end)))
+    return spans
+
+
+def _shift(segment: Dict[str, Any], offset: float) -> Dict[str, Any]:
+    """A re-decoded segment moved from its span's timeline to the recording's"""
+    segment = {**segment, "start": segment["start"] + offset, "end": segment["end"] + offset}
+    if "words" in segment:
+        segment["words"] = [
+            {**word, "start": word["start"] + offset, "end": word["end"] + offset} for word in segment["words"]
+        ]
+    return segment
+
+
+def _windows(seconds: float) -> int:
+    """Whisper windows decoded for audio of this length"""
+    return max(1, math.ceil(seconds / WINDOW_SECONDS))
+
+
+def _measured_rtf(engine_name: str, model: str) -> Optional[float]:
+    """Real-time factor of a model measured on full-length runs (excerpts are not recorded)"""
+    engine = get_engine(engine_name)
+    inference = engine.stats().get("inference", {})
+    # The variant that is served, as the float32 and int8 ones run at different speeds
+    key = quantized_key(model) if engine.name == "whisper" and is_quantized(model) else model
+    return inference.get(key, {}).get("rtf")
+
+
+def transcribe_cascade(
+    file_path: str,
+    model: str,
+    options: Dict[str, Any],
+    audio: Optional[DecodedAudio] = None,
+    on_segment: Optional[Callable[[Dict[str, Any]], None]] = None,
+    engine: str = "whisper"
+) -> Dict[str, Any]:
+    """
+    Draft with a small model and re-decode only its low-confidence segments with the requested one
+
+    The draft model (CASCADE_DRAFT_MODEL) detects the language, when none
+    was given, and transcribes the whole recording. Runs of draft segments
+    whose avg_logprob, no_speech_prob or compression ratio fall outside the
+    CASCADE_* thresholds are transcribed again by the requested model, with
+    the preceding text as prompt, and replace the draft there. When most of
+    the audio needs escalating, the requested model simply runs on all of it.
+
+    Args:
+        file_path: Path to the audio file
+        model: Whisper model size the caller asked for
+        options: Whisper transcribe options
+        audio: Already decoded audio; decoded here if not given
+        on_segment: Called with each final segment, in order, once it is settled
+        engine: Transcription engine running both models
+
+    Returns:
+        Whisper result, with a "cascade" entry reporting what was escalated
+        and the estimated speedup over running the requested model alone
+    """
+    runner = get_engine(engine)
+    owns_audio = audio is None
+    if owns_audio:
+        audio = decode_audio(file_path)
+
+    try:
+        duration = audio.duration
+        draft_model = settings.CASCADE_DRAFT_MODEL
+
+        start = time.perf_counter()
+        draft = runner.transcribe(file_path, draft_model, options, audio)
+        draft_seconds = time.perf_counter() - start
+
+        # The requested model decodes in the language the draft model detected
+        options = {**options, "language": options.get("language") or draft.get("language")}
+        draft_segments = draft["segments"]
+        spans = escalation_spans(draft_segments, duration)
+        escalated_seconds = sum(span_end - span_start for _, _, span_start, span_end in spans)
+
+        start = time.perf_counter()
+        full_rerun = duration > 0 and escalated_seconds / duration > settings.CASCADE_FULL_RERUN_FRACTION
+        if full_rerun:
+            segments = runner.transcribe(file_path, model, options, audio, on_segment=on_segment)["segments"]
+            escalated_seconds = duration
+        else:
+            segments = []
+            position = 0
+            # A final empty span flushes the draft segments after the last real one
+            end_of_audio = (len(draft_segments), len(draft_segments), duration, duration)
+            for first, last, span_start, span_end in spans + [end_of_audio]:
+                # Degenerate timestamps leave nothing to cut; keep the draft there
+                keep_until = first if span_end > span_start else last
+                for segment in draft_segments[position:keep_until]:
+                    segments.append(segment)
+                    if on_segment is not None:
+                        on_segment(segment)
+                position = last
+                if span_end <= span_start:
+                    continue
+
+                span_options = dict(options)
+                context = "".join(segment["text"] for segment in segments)[-PROMPT_CHARS:]
+                if context and "initial_prompt" not in span_options:
+                    span_options["initial_prompt"] = context
+                sample_rate = audio.sample_rate
+                samples = audio.samples[int(span_start * sample_rate):int(span_end * sample_rate)]
+                # A span is padded to a whole window, so its latency says little about the model's speed
+                redone = runner.transcribe(
+                    file_path, model, span_options, DecodedAudio(samples, 0.0), record_latency=False
+                )
+                for segment in redone["segments"]:
+                    segments.append(_shift(segment, span_start))
+                    if on_segment is not None:
+                        on_segment(segments[-1])
+        escalation_seconds = time.perf_counter() - start
+    finally:
+        if owns_audio:
+            audio.close()
+
+    for index, segment in enumerate(segments):
+        segment["id"] = index
+
+    # Estimate what the requested model alone would have cost: measured when it
+    # ran on everything, else from its speed on full-length runs, else per
+    # decoded window, since every span costs at least a whole window
+    rtf = _measured_rtf(engine, model)
+    decoded_windows = sum(
+        _windows(span_end - span_start) for _, _, span_start, span_end in spans if span_end > span_start
+    )
+    if full_rerun:
+        full_seconds = escalation_seconds
+    elif rtf is not None:
+        full_seconds = rtf * duration
+    elif decoded_windows:
+        full_seconds = escalation_seconds / decoded_windows * _windows(duration)
+    else:
+        full_seconds = None
+    cascade_seconds = draft_seconds + escalation_seconds
+    speedup = full_seconds / cascade_seconds if full_seconds is not None and cascade_seconds > 0 else None
+
+    report = {
+        "draft_model": draft_model,
+        "language": options["language"],
+        "draft_segments": len(draft_segments),
+        "escalated_segments": len(draft_segments) if full_rerun else sum(last - first for first, last, _, _ in spans),
+        "escalated_seconds": escalated_seconds,
+        "escalated_fraction": escalated_seconds / duration if duration else 0.0,
+        "full_rerun": full_rerun,
+        "draft_seconds": draft_seconds,
+        "escalation_seconds": escalation_seconds,
+        "estimated_speedup": speedup,
+    }
+    logger.info(
+        f"Cascade on {Path(file_path).name}: {draft_model} drafted, {model} re-decoded "
+        f"{report['escalated_fraction']:.0%} of {duration:.1f}s"
+        + (f", about {speedup:.1f}x faster than {model} alone" if speedup is not None else "")
+    )
+    return {
+        "text": "".join(segment["text"] for segment in segments),
+        "segments": segments,
+        "language": options["language"],
+        "cascade": report,
+    }
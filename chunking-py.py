@@ -0,0 +1,347 @@
+import os
+import time
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.audio import DecodedAudio, SAMPLE_RATE
+from app.services.vad import detect_speech, silence_gaps
+from app.services.thread_budget import thread_budget
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Audio used for language detection when the language is not given
+LANGUAGE_DETECTION_SECONDS = 30
+
+# How often a stage waiting on the pool checks whether it has been cancelled
+CANCEL_POLL_SECONDS = 0.5
+
+# Worker processes, created on first use and kept so their models stay resident
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+class Chunk:
+    """
+    A piece of a long recording transcribed on its own
+
+    Audio between start and end is transcribed; only segments whose midpoint
+    falls between own_start and own_end are kept, so segments in the overlap
+    of two hard-cut chunks are not duplicated.
+    """
+
+    def __init__(self, start: float, end: float, own_start: float, own_end: float):
+        self.start = start
+        self.end = end
+        self.own_start = own_start
+        self.own_end = own_end
+
+    def __repr__(self):
+        return f"Chunk({self.start:.2f}-{self.end:.2f}, owns {self.own_start:.2f}-{self.own_end:.2f})"
+
+
+def plan_chunks(
+    audio: DecodedAudio,
+    chunk_seconds: float,
+    overlap_seconds: float,
+    search_seconds: Optional[float] = None
+) -> List[Chunk]:
+    """
+    Split a recording into chunks of about chunk_seconds at silence boundaries
+
+    Each boundary goes in the middle of the silent stretch closest to the
+    target position. If there is no silence within search_seconds of the
+    target, the audio is cut at the target and both neighbouring chunks
+    extend overlap_seconds past the cut.
+
+    Args:
+        audio: Decoded audio
+        chunk_seconds: Target chunk length
+        overlap_seconds: Overlap around hard cuts
+        search_seconds: How far from the target to look for silence
+
+    Returns:
+        Chunks covering the whole recording
+    """
+    if search_seconds is None:
+        search_seconds = chunk_seconds / 10
+
+    duration = audio.duration
+    if duration <= chunk_seconds:
+        return [Chunk(0.0, duration, 0.0, duration)]
+
+    gaps = silence_gaps(detect_speech(audio.samples, audio.sample_rate), duration)
+    gap_midpoints = np.array([(start + end) / 2 for start, end in gaps])
+
+    # (cut position, whether it is a hard cut through speech)
+    cuts: List[Tuple[float, bool]] = []
+    target = chunk_seconds
+    while target < duration - chunk_seconds / 4:
+        if len(gap_midpoints):
+            nearest = gap_midpoints[np.argmin(np.abs(gap_midpoints - target))]
+        else:
+            nearest = None
+        previous_cut = cuts[-1][0] if cuts else 0.0
+        if nearest is not None and abs(nearest - target) <= search_seconds and nearest > previous_cut:
+            cuts.append((float(nearest), False))
+        else:
+            cuts.append((target, True))
+        target = cuts[-1][0] + chunk_seconds
+
+    bounds = [(0.0, False)] + cuts + [(duration, False)]
+    chunks = []
+    for (own_start, start_is_hard), (own_end, end_is_hard) in zip(bounds[:-1], bounds[1:]):
+        start = max(0.0, own_start - overlap_seconds) if start_is_hard else own_start
+        end = min(duration, own_end + overlap_seconds) if end_is_hard else own_end
+        chunks.append(Chunk(start, end, own_start, own_end))
+
+    hard_cuts = sum(1 for _, is_hard in cuts if is_hard)
+    logger.info(f"Split {duration:.1f}s of audio into {len(chunks)} chunks ({hard_cuts} hard cuts)")
+    return chunks
+
+
+def _init_worker(threads: int):
+    """Give each worker process its own torch thread budget"""
+    import torch
+    # A worker transcribes one chunk at a time, so batching would only add waiting
+    settings.BATCHING_ENABLED = False
+    torch.set_num_threads(threads)
+    torch.set_num_interop_threads(1)
+
+
+def _load_samples(source: Union[np.ndarray, Tuple[str, int, int]]) -> np.ndarray:
+    """Samples sent to a worker, or a slice of the memory-mapped PCM file"""
+    if isinstance(source, tuple):
+        pcm_path, first, last = source
+        # Audio from the feature cache is an .npy file rather than raw PCM
+        if pcm_path.endswith(".npy"):
+            return np.load(pcm_path, mmap_mode="c")[first:last]
+        return np.memmap(pcm_path, dtype=np.float32, mode="c")[first:last]
+    return source
+
+
+def _detect_language(source: Union[np.ndarray, Tuple[str, int, int]], model: str) -> str:
+    """Detect the spoken language in a worker process"""
+    import whisper
+    from app.services.transcription import get_whisper_model
+
+    whisper_model = get_whisper_model(model)
+    samples = whisper.pad_or_trim(_load_samples(source))
+    mel = whisper.log_mel_spectrogram(samples, whisper_model.dims.n_mels).to(whisper_model.device)
+    _, probs = whisper_model.detect_language(mel)
+    return max(probs, key=probs.get)
+
+
+def _transcribe_chunk(source: Union[np.ndarray, Tuple[str, int, int]], model: str, options: Dict[str, Any]) -> Dict[str, Any]:
+    """Transcribe one chunk in a worker process, with its model cached per process"""
+    from app.services.transcription import get_whisper_model
+
+    return get_whisper_model(model).transcribe(_load_samples(source), **options)
+
+
+def get_pool() -> ProcessPoolExecutor:
+    """Create the worker pool on first use"""
+    global _pool
+
+    with _pool_lock:
+        if _pool is None:
+            threads = settings.LONG_AUDIO_THREADS_PER_WORKER
+            workers = settings.LONG_AUDIO_WORKERS or max(1, (os.cpu_count() or 1) // threads)
+            logger.info(f"Starting {workers} transcription worker processes with {threads} threads each")
+            # Spawn rather than fork: the parent already runs threads
+            _pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(threads,)
+            )
+        return _pool
+
+
+def shutdown_pool():
+    """Stop the worker processes"""
+    global _pool
+
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def _chunk_source(audio: DecodedAudio, chunk: Chunk) -> Union[np.ndarray, Tuple[str, int, int]]:
+    first = int(chunk.start * SAMPLE_RATE)
+    last = int(chunk.end * SAMPLE_RATE)
+    # Memory-mapped audio is read by the workers from the file instead of being pickled
+    if audio.pcm_path is not None:
+        return (audio.pcm_path, first, last)
+    return np.ascontiguousarray(audio.samples[first:last])
+
+
+def owned_segments(chunk: Chunk, result: Dict[str, Any], first_id: int = 0) -> List[Dict[str, Any]]:
+    """
+    Segments of one chunk's Whisper result that the chunk owns, on the global timeline
+
+    Args:
+        chunk: The chunk that was transcribed
+        result: Whisper result of the chunk
+        first_id: Id given to the first kept segment
+
+    Returns:
+        Segments whose midpoint falls in the chunk's owned range
+    """
+    segments = []
+    for segment in result["segments"]:
+        start = segment["start"] + chunk.start
+        end = segment["end"] + chunk.start
+        # Keep a segment only in the chunk that owns its midpoint
+        if not chunk.own_start <= (start + end) / 2 < chunk.own_end:
+            continue
+
+        segment = {**segment, "id": first_id + len(segments), "start": start, "end": end}
+        if "words" in segment:
+            segment["words"] = [
+                {**word, "start": word["start"] + chunk.start, "end": word["end"] + chunk.start}
+                for word in segment["words"]
+            ]
+        segments.append(segment)
+    return segments
+
+
+def _merged_result(segments: List[Dict[str, Any]], language: Optional[str]) -> Dict[str, Any]:
+    return {
+        "text": "".join(segment["text"] for segment in segments),
+        "segments": segments,
+        "language": language,
+    }
+
+
+def stitch_chunks(chunks: List[Chunk], results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Merge per-chunk Whisper results into one result on the global timeline
+
+    Args:
+        chunks: Chunks in timeline order
+        results: Whisper result of each chunk
+
+    Returns:
+        Whisper-style result with "text", "segments" and "language"
+    """
+    segments = []
+    for chunk, result in zip(chunks, results):
+        segments.extend(owned_segments(chunk, result, len(segments)))
+    return _merged_result(segments, results[0].get("language") if results else None)
+
+
+def transcribe_long_audio(
+    audio: DecodedAudio,
+    model: str,
+    options: Dict[str, Any],
+    on_segment: Optional[Callable[[Dict[str, Any]], None]] = None
+) -> Dict[str, Any]:
+    """
+    Transcribe a long recording as chunks in parallel worker processes
+
+    Args:
+        audio: Decoded audio
+        model: Whisper model size to use
+        options: Whisper transcribe options
+        on_segment: Called with each segment, in timeline order, as soon as its
+            chunk and every earlier chunk are done; chunks are then kept short
+            (settings.STREAM_CHUNK_SECONDS) so the first text arrives quickly
+
+    Returns:
+        Whisper-style result with "text", "segments" and "language"
+    """
+    start_time = time.perf_counter()
+    chunk_seconds = settings.LONG_AUDIO_CHUNK_SECONDS
+    if on_segment is not None:
+        chunk_seconds = min(chunk_seconds, settings.STREAM_CHUNK_SECONDS)
+    chunks = plan_chunks(audio, chunk_seconds, settings.LONG_AUDIO_OVERLAP_SECONDS)
+    pool = get_pool()
+
+    # Every chunk must use the same language, so detect it once up front
+    options = dict(options)
+    if not options.get("language"):
+        detection_chunk = Chunk(0.0, min(audio.duration, LANGUAGE_DETECTION_SECONDS), 0.0, 0.0)
+        options["language"] = pool.submit(_detect_language, _chunk_source(audio, detection_chunk), model).result()
+        logger.info(f"Detected language: {options['language']}")
+
+    futures = [
+        pool.submit(_transcribe_chunk, _chunk_source(audio, chunk), model, options)
+        for chunk in chunks
+    ]
+    segments: List[Dict[str, Any]] = []
+    try:
+        # The pool starts chunks in order, so waiting in order costs nothing
+        for chunk, future in zip(chunks, futures):
+            while True:
+                try:
+                    chunk_result = future.result(timeout=CANCEL_POLL_SECONDS)
+                    break
+                except TimeoutError:
+                    # Stop waiting (and drop the queued chunks) once the stage is cancelled
+                    thread_budget.checkpoint()
+            chunk_segments = owned_segments(chunk, chunk_result, len(segments))
+            segments.extend(chunk_segments)
+            if on_segment is not None:
+                for segment in chunk_segments:
+                    on_segment(segment)
+    except BaseException:
+        for future in futures:
+            future.cancel()
+        raise
+
+    result = _merged_result(segments, options["language"])
+    elapsed = time.perf_counter() - start_time
+    logger.info(
+        f"Transcribed {audio.duration:.1f}s in {len(chunks)} chunks in {elapsed:.1f}s "
+        f"(real-time factor {elapsed / max(audio.duration, 1e-9):.3f})"
+    )
+    return result
+
+
+def transcribe_incrementally(
+    audio: DecodedAudio,
+    model: str,
+    options: Dict[str, Any],
+    on_segment: Callable[[Dict[str, Any]], None]
+) -> Dict[str, Any]:
+    """
+    Transcribe a recording chunk by chunk in this process, reporting segments as they are produced
+
+    Chunks of about settings.STREAM_CHUNK_SECONDS are cut at silences and
+    transcribed in order on the resident model. Each chunk is prompted with
+    the text before it, so context carries across chunk boundaries like it
+    does across Whisper's own 30 s windows.
+
+    Args:
+        audio: Decoded audio
+        model: Whisper model size to use
+        options: Whisper transcribe options
+        on_segment: Called with each segment, in timeline order
+
+    Returns:
+        Whisper-style result with "text", "segments" and "language"
+    """
+    chunks = plan_chunks(audio, settings.STREAM_CHUNK_SECONDS, settings.LONG_AUDIO_OVERLAP_SECONDS)
+    options = dict(options)
+    segments: List[Dict[str, Any]] = []
+    for chunk in chunks:
+        result = _transcribe_chunk(_chunk_source(audio, chunk), model, options)
+        # Later chunks reuse the language of the first instead of detecting it again
+        options.setdefault("language", result.get("language"))
+        if options.get("condition_on_previous_text", True):
+            options["initial_prompt"] = result["text"] or options.get("initial_prompt")
+
+        chunk_segments = owned_segments(chunk, result, len(segments))
+        segments.extend(chunk_segments)
+        for segment in chunk_segments:
+            on_segment(segment)
+
+    return _merged_result(segments, options.get("language"))
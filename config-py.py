@@ -1,6 +1,7 @@
 from pydantic_settings import BaseSettings
 import os
 from pathlib import Path
+from typing import List
 
 
 class Settings(BaseSettings):
@@ -12,10 +13,104 @@ class Settings(BaseSettings):
     
     # Upload configuration
     UPLOAD_DIR: str = "uploads"
+    AUDIO_MEMMAP_MIN_MB: float = 256.0  # Decoded audio larger than this is memory-mapped from disk
+    UPLOAD_SESSION_TTL_SECONDS: int = 24 * 3600  # Resumable uploads idle this long are deleted
+    UPLOAD_PURGE_INTERVAL_SECONDS: int = 3600  # How often abandoned uploads are looked for
     
     # Whisper configuration
     DEFAULT_LANGUAGE: str = "English"
     DEFAULT_MODEL: str = "base"
+    MODEL_CACHE_BUDGET_GB: float = 12.0  # RAM allowed for resident Whisper models
+    WHISPER_QUANTIZE_MODELS: List[str] = []  # Model sizes served with int8 linear layers (CPU inference)
+    WHISPER_QUANTIZED_DIR: str = "cache/models"  # Quantized models stored for later startups
+    
+    # Engine configuration
+    TRANSCRIPTION_ENGINE: str = "whisper"  # whisper, faster-whisper or mock; requests may override it
+    FASTER_WHISPER_COMPUTE_TYPE: str = "int8"  # CTranslate2 weight type (int8, int8_float32, float32)
+    FASTER_WHISPER_BEAM_SIZE: int = 5
+    FASTER_WHISPER_MODEL_DIR: str = ""  # Where converted models are downloaded (empty = Hugging Face cache)
+    MOCK_ENGINE_SECONDS: float = 2.0  # Simulated processing time of the mock engine
+    
+    # Startup configuration
+    PRELOAD_MODELS: List[str] = ["base"]  # Whisper models loaded before serving traffic
+    PRELOAD_DIARIZATION: bool = False  # Requires HF_TOKEN
+    WARMUP_ENABLED: bool = True  # Run one inference on synthetic audio after loading
+    
+    # Inference configuration
+    TORCH_THREADS: int = 0  # Threads available to torch; 0 uses every core the CPU quota allows
+    PARALLEL_DIARIZATION: bool = True  # Run transcription and diarization concurrently
+    THREAD_PINNING: bool = False  # Pin each running stage to its own cores
+    
+    # Cascade configuration
+    CASCADE_ENABLED: bool = False  # Draft with a small model, re-decode only uncertain segments with the requested one
+    CASCADE_DRAFT_MODEL: str = "tiny"  # Also detects the language when none is given
+    CASCADE_MIN_AVG_LOGPROB: float = -0.5  # Draft segments below this are escalated
+    CASCADE_MAX_NO_SPEECH_PROB: float = 0.5  # Draft segments above this are escalated
+    CASCADE_MAX_COMPRESSION_RATIO: float = 2.4  # Draft segments above this (repetitive text) are escalated
+    CASCADE_PADDING_SECONDS: float = 0.5  # Silence around an escalated span re-decoded with it
+    CASCADE_FULL_RERUN_FRACTION: float = 0.6  # Escalating more than this runs the requested model on everything
+    
+    # Long audio configuration
+    LONG_AUDIO_ENABLED: bool = True
+    LONG_AUDIO_MIN_SECONDS: float = 600.0  # Recordings at least this long are chunked
+    LONG_AUDIO_CHUNK_SECONDS: float = 300.0  # Target chunk length, cut at silences
+    LONG_AUDIO_OVERLAP_SECONDS: float = 2.0  # Overlap around cuts that fall inside speech
+    LONG_AUDIO_WORKERS: int = 0  # Worker processes; 0 fills the cores
+    LONG_AUDIO_THREADS_PER_WORKER: int = 2
+    
+    # Voice activity detection configuration
+    VAD_MARGIN_DB: float = 12.0  # Energy above the noise floor treated as speech
+    VAD_FILTER_ENABLED: bool = False  # Skip silence before Whisper inference by default
+    
+    # Result cache configuration
+    RESULT_CACHE_ENABLED: bool = True
+    RESULT_CACHE_DIR: str = "cache/results"
+    RESULT_CACHE_MAX_MB: float = 1024.0
+    RESULT_CACHE_TTL_SECONDS: int = 7 * 24 * 3600
+    
+    # Encoder batching configuration (helps when JOB_WORKERS > 1)
+    BATCHING_ENABLED: bool = True
+    BATCHING_MAX_BATCH: int = 8  # Most 30 s windows per encoder pass
+    BATCHING_MAX_WAIT_MS: float = 5.0  # Longest a window waits for others to join
+    
+    # Feature cache configuration
+    FEATURE_CACHE_ENABLED: bool = True
+    FEATURE_CACHE_DIR: str = "cache/features"
+    FEATURE_CACHE_MAX_GB: float = 20.0  # Disk quota for cached PCM and log-mel frames
+    FEATURE_CACHE_TTL_SECONDS: int = 24 * 3600
+    
+    # Streaming configuration
+    STREAM_CHUNK_SECONDS: float = 30.0  # Audio transcribed before each batch of streamed segments
+    
+    # Live transcription configuration
+    LIVE_MAX_SESSIONS: int = 4
+    LIVE_WINDOW_SECONDS: float = 15.0  # Longest uncommitted audio before a hard cut
+    LIVE_STEP_SECONDS: float = 1.0  # New audio between partial hypotheses
+    LIVE_COMMIT_SILENCE_SECONDS: float = 0.6  # Pause after which speech is finalized
+    LIVE_MAX_BACKLOG_SECONDS: float = 30.0  # Unprocessed audio kept when transcription falls behind
+    
+    # Batch configuration
+    BATCH_MAX_IN_FLIGHT: int = 4  # Files of one batch queued or running at once
+    
+    # Decode pool configuration
+    DECODE_POOL_ENABLED: bool = True
+    DECODE_WORKERS: int = 2  # Processes decoding queued uploads ahead of inference
+    DECODE_QUEUE_DEPTH: int = 4  # Uploads decoding or decoded and waiting for an inference worker
+    
+    # Inference worker configuration
+    WORKER_PROCESSES: int = 0  # Pre-forked workers sharing the preloaded weights (0 = run jobs in the server process)
+    WORKER_THREADS: int = 0  # Torch threads per worker (0 = split the CPUs evenly)
+    WORKER_AFFINITY_MAX_QUEUE: int = 2  # Requests waiting on a warm worker before an idle cold one is used
+    
+    # Job configuration
+    JOB_WORKERS: int = 2  # With inference workers, keep this at least WORKER_PROCESSES
+    JOB_RESULT_TTL: int = 3600  # Seconds to keep finished job results
+    
+    # Admission control configuration
+    SCHEDULER_MEMORY_BUDGET_GB: float = 16.0
+    SCHEDULER_MAX_QUEUE: int = 32
+    SCHEDULER_FAST_LANE_SECONDS: float = 120.0  # Clips up to this long use the fast lane
+    SCHEDULER_FAST_LANE_RESERVE: int = 1  # Job workers kept free for the fast lane
     
     # Create upload directory if it doesn't exist
     def __init__(self, *args, **kwargs):
@@ -0,0 +1,205 @@
+import os
+import time
+import logging
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Deque, Dict, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.audio import DecodedAudio, decode_audio
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+def _decode_to_file(file_path: str) -> Tuple[Optional[str], float]:
+    """Decode an upload in a worker process, leaving the PCM in a file for the parent to map"""
+    # Spill everything to disk: the samples go back by file, not through a pipe
+    audio = decode_audio(file_path, memmap_min_bytes=0)
+    return audio.pcm_path, audio.decode_seconds
+
+
+class _Prefetch:
+    """One upload waiting for, going through, or done with decoding"""
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self.queued_at = time.perf_counter()
+        self.started_at: Optional[float] = None
+        self.future: Optional[Future] = None
+
+
+class DecodePool:
+    """
+    Decodes queued uploads in worker processes ahead of inference
+
+    Jobs register their upload when they are queued. Uploads are decoded in
+    submission order, and at most `depth` of them are decoding or decoded
+    and waiting at any time, which bounds the PCM held ahead of inference.
+    When an inference worker starts a job, it takes the decoded audio,
+    waiting only if decoding has not finished yet, and the next upload in
+    line starts decoding. Uploads that never got a slot are decoded inline.
+    """
+
+    def __init__(self, workers: int, depth: int):
+        self.workers = workers
+        self.depth = max(depth, workers)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._entries: Dict[str, _Prefetch] = {}
+        self._pending: Deque[_Prefetch] = deque()
+        self._slots_used = 0
+        self._lock = threading.Lock()
+
+        self.started = 0
+        self.ready = 0
+        self.waited = 0
+        self.missed = 0
+        self.failed = 0
+        self.decode_seconds = 0.0
+        self.queue_seconds = 0.0
+        self.wait_seconds = 0.0
+
+    def prefetch(self, file_path: str):
+        """Queue an upload for decoding ahead of its job"""
+        with self._lock:
+            if file_path in self._entries:
+                return
+            entry = _Prefetch(file_path)
+            self._entries[file_path] = entry
+            self._pending.append(entry)
+            self._dispatch()
+
+    def take(self, file_path: str) -> Optional[DecodedAudio]:
+        """
+        Decoded audio for an upload, waiting for its decode to finish if needed
+
+        Args:
+            file_path: Path the upload was prefetched under
+
+        Returns:
+            The decoded audio, or None if the upload was not decoded ahead
+            of time (or decoding failed) and must be decoded inline
+        """
+        with self._lock:
+            entry = self._entries.pop(file_path, None)
+            if entry is None:
+                return None
+            if entry.future is None:
+                # Never got a slot; decoding inline is as fast as waiting for one
+                self._pending.remove(entry)
+                self.missed += 1
+                return None
+            if entry.future.done():
+                self.ready += 1
+            else:
+                self.waited += 1
+
+        start = time.perf_counter()
+        try:
+            pcm_path, decode_seconds = entry.future.result()
+        except Exception as e:
+            logger.warning(f"Background decode of {os.path.basename(file_path)} failed, decoding inline: {e}")
+            with self._lock:
+                self.failed += 1
+                self._free_slot()
+            return None
+
+        with self._lock:
+            self.wait_seconds += time.perf_counter() - start
+            self.decode_seconds += decode_seconds
+            self._free_slot()
+
+        if pcm_path is None:
+            # ffmpeg produced no samples
+            return DecodedAudio(np.zeros(0, dtype=np.float32), decode_seconds)
+        samples = np.memmap(pcm_path, dtype=np.float32, mode="c")
+        return DecodedAudio(samples, decode_seconds, pcm_path)
+
+    def release(self, file_path: str):
+        """Drop an upload whose job finished or was rejected without taking its audio"""
+        with self._lock:
+            entry = self._entries.pop(file_path, None)
+            if entry is None:
+                return
+            if entry.future is None:
+                self._pending.remove(entry)
+                return
+
+        # Free the slot and the PCM file once the decode is over
+        entry.future.add_done_callback(self._discard_result)
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depths and average stage timings"""
+        with self._lock:
+            taken = self.ready + self.waited
+            return {
+                "workers": self.workers,
+                "depth": self.depth,
+                "pending": len(self._pending),
+                "decoding_or_ready": self._slots_used,
+                "taken_ready": self.ready,
+                "taken_waiting": self.waited,
+                "decoded_inline": self.missed,
+                "failed": self.failed,
+                "mean_queue_seconds": round(self.queue_seconds / self.started, 3) if self.started else None,
+                "mean_decode_seconds": round(self.decode_seconds / taken, 3) if taken else None,
+                "mean_wait_seconds": round(self.wait_seconds / taken, 3) if taken else None,
+            }
+
+    def shutdown(self):
+        """Stop the decode worker processes"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def _discard_result(self, future: Future):
+        try:
+            pcm_path, _ = future.result()
+            if pcm_path is not None and os.path.exists(pcm_path):
+                os.remove(pcm_path)
+        except Exception:
+            pass
+        with self._lock:
+            self._free_slot()
+
+    def _free_slot(self):
+        """Give a finished entry's slot to the next pending upload (lock held)"""
+        self._slots_used -= 1
+        self._dispatch()
+
+    def _dispatch(self):
+        """Start decoding pending uploads while slots are free (lock held)"""
+        while self._pending and self._slots_used < self.depth:
+            entry = self._pending[0]
+            try:
+                entry.future = self._get_executor().submit(_decode_to_file, entry.file_path)
+            except BrokenProcessPool as e:
+                # A worker died; start a fresh pool next time, the jobs decode inline meanwhile
+                logger.warning(f"Decode pool is broken, restarting it: {e}")
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+                return
+            self._pending.popleft()
+            entry.started_at = time.perf_counter()
+            self.queue_seconds += entry.started_at - entry.queued_at
+            self.started += 1
+            self._slots_used += 1
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            logger.info(f"Starting {self.workers} decode worker processes")
+            # Spawn rather than fork: the parent already runs threads
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+
+decode_pool = DecodePool(settings.DECODE_WORKERS, settings.DECODE_QUEUE_DEPTH)
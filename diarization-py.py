@@ -1,15 +1,21 @@
 import os
 import logging
-import numpy as np
+import threading
 from pathlib import Path
-import torch
-from pyannote.audio import Pipeline
-from pyannote.core import Segment
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Tuple, Optional
+from app.services.audio import DecodedAudio
+from app.services.thread_budget import thread_budget
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+class DiarizationCancelled(Exception):
+    """Raised inside the pipeline when a diarization run has been cancelled"""
+
+
+# Pretrained pyannote pipeline used for diarization
+DIARIZATION_MODEL = "pyannote/speaker-diarization-3.0"
+
 # Initialize the diarization pipeline (cached)
 _diarization_pipeline = None
 
@@ -23,6 +29,10 @@ def get_diarization_pipeline():
     global _diarization_pipeline
     
     if _diarization_pipeline is None:
+        # Heavy imports happen here so the API starts without loading torch
+        import torch
+        from pyannote.audio import Pipeline
+        
         # Check if HF_TOKEN environment variable is set
         hf_token = os.environ.get("HF_TOKEN")
         if not hf_token:
@@ -31,7 +41,7 @@ def get_diarization_pipeline():
         try:
             logger.info("Loading speaker diarization pipeline")
             _diarization_pipeline = Pipeline.from_pretrained(
-                "pyannote/speaker-diarization-3.0", 
+                DIARIZATION_MODEL, 
                 use_auth_token=hf_token
             )
             
@@ -46,12 +56,18 @@ def get_diarization_pipeline():
     
     return _diarization_pipeline
 
-def diarize_audio(file_path: str) -> List[Dict[str, Any]]:
+def diarize_audio(
+    file_path: str,
+    audio: Optional[DecodedAudio] = None,
+    cancel_event: Optional[threading.Event] = None
+) -> List[Dict[str, Any]]:
     """
     Perform speaker diarization on an audio file
     
     Args:
         file_path: Path to the audio file
+        audio: Already decoded audio; when given, the file is not decoded again
+        cancel_event: When set, the run is aborted at the next pipeline step
         
     Returns:
         List of speaker segments with start/end times and speaker labels
@@ -62,8 +78,19 @@ def diarize_audio(file_path: str) -> List[Dict[str, Any]]:
         # Get the diarization pipeline
         pipeline = get_diarization_pipeline()
         
-        # Run diarization
-        diarization = pipeline(file_path)
+        # Abort between pipeline steps once cancellation is requested, and
+        # pick up thread budget changes from jobs starting or finishing
+        def check_cancelled(*args, **kwargs):
+            if cancel_event is not None and cancel_event.is_set():
+                raise DiarizationCancelled("Diarization cancelled")
+            thread_budget.checkpoint()
+        
+        # Run diarization, passing the shared buffer as an in-memory waveform
+        if audio is not None:
+            source = {"waveform": audio.as_waveform(), "sample_rate": audio.sample_rate}
+        else:
+            source = file_path
+        diarization = pipeline(source, hook=check_cancelled)
         
         # Convert to a format we can use
         segments = []
@@ -77,6 +104,9 @@ def diarize_audio(file_path: str) -> List[Dict[str, Any]]:
         
         return segments
         
+    except DiarizationCancelled:
+        logger.info(f"Diarization of {Path(file_path).name} cancelled")
+        raise
     except Exception as e:
         logger.error(f"Error during diarization: {str(e)}")
         raise RuntimeError(f"Diarization failed: {str(e)}")
@@ -88,6 +118,10 @@ def combine_transcript_with_diarization(
     """
     Combine whisper transcript with speaker diarization
     
+    Reference implementation that checks every speaker turn for every
+    segment; the service uses alignment.align_segments, which returns the
+    same result in near-linear time.
+    
     Args:
         transcript_segments: Segments from Whisper transcript
         diarization_segments: Segments from speaker diarization
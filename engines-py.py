@@ -0,0 +1,274 @@
+import time
+import logging
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from app.core.config import settings
+from app.services.audio import DecodedAudio
+from app.services.model_registry import ModelRegistry
+from app.services.scheduler import MODEL_MEMORY_GB
+from app.services.thread_budget import thread_budget
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Resident size of an int8 CTranslate2 model relative to the float32 torch model
+INT8_MEMORY_FACTOR = 0.3
+
+# Text returned by the mock engine, as in the mock transcription module
+MOCK_TEXT = "[Simulated transcribed text would appear here]"
+
+
+class TranscriptionEngine:
+    """
+    A way of running Whisper inference
+
+    Engines take Whisper transcribe options and return results shaped like
+    whisper's: "text", "language" and "segments" with "start", "end", "text"
+    and, when word timestamps are requested, "words". Everything around
+    inference (voice activity detection, caching, diarization, alignment)
+    is shared by all engines.
+    """
+
+    name = ""
+
+    def load(self, model_name: str) -> Any:
+        """Load a model and keep it resident, e.g. before serving traffic"""
+        raise NotImplementedError
+
+    def transcribe(
+        self,
+        file_path: str,
+        model_name: str,
+        options: Dict[str, Any],
+        audio: Optional[DecodedAudio] = None,
+        on_segment: Optional[Callable[[Dict[str, Any]], None]] = None,
+        record_latency: bool = True
+    ) -> Dict[str, Any]:
+        """
+        Transcribe a file or a decoded buffer
+
+        Args:
+            file_path: Path to the audio file
+            model_name: Whisper model size to use
+            options: Whisper transcribe options
+            audio: Already decoded audio; when given, the file is not decoded again
+            on_segment: Called with each segment as soon as it is transcribed
+            record_latency: Count the run in the model's real-time factor; off
+                for excerpts and warm-ups, which Whisper pads to a full 30 s window
+
+        Returns:
+            Result with "text", "segments" and "language"
+        """
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, Any]:
+        """Model cache statistics of the engine"""
+        return {}
+
+
+class WhisperEngine(TranscriptionEngine):
+    """The reference openai-whisper implementation in PyTorch"""
+
+    name = "whisper"
+
+    def load(self, model_name: str) -> Any:
+        from app.services.transcription import get_whisper_model
+        return get_whisper_model(model_name)
+
+    def transcribe(
+        self,
+        file_path: str,
+        model_name: str,
+        options: Dict[str, Any],
+        audio: Optional[DecodedAudio] = None,
+        on_segment: Optional[Callable[[Dict[str, Any]], None]] = None,
+        record_latency: bool = True
+    ) -> Dict[str, Any]:
+        # Imported here: the transcription module dispatches to the engines
+        from app.services.transcription import run_whisper
+        return run_whisper(
+            file_path, model_name, options, audio, on_segment=on_segment, record_latency=record_latency
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        from app.services.transcription import get_model_cache_stats
+        return get_model_cache_stats()
+
+
+def _load_faster_whisper_model(model_name: str):
+    """Import faster-whisper on first use; it is an optional dependency"""
+    try:
+        from faster_whisper import WhisperModel
+    except ImportError:
+        raise RuntimeError("The faster-whisper engine requires the faster-whisper package")
+
+    # CTranslate2 fixes its thread pool at load time, so split the cores among the job workers up front;
+    # in an inference worker the budget is already that worker's slice of the machine
+    workers = max(1, settings.JOB_WORKERS)
+    return WhisperModel(
+        model_name,
+        device="cpu",
+        compute_type=settings.FASTER_WHISPER_COMPUTE_TYPE,
+        cpu_threads=max(1, thread_budget.total // workers),
+        num_workers=workers,
+        download_root=settings.FASTER_WHISPER_MODEL_DIR or None
+    )
+
+
+def _segment_dict(segment: Any) -> Dict[str, Any]:
+    """Convert a faster-whisper segment to whisper's segment dictionary"""
+    result = {
+        "id": segment.id,
+        "seek": segment.seek,
+        "start": segment.start,
+        "end": segment.end,
+        "text": segment.text,
+        "tokens": list(segment.tokens),
+        "temperature": segment.temperature,
+        "avg_logprob": segment.avg_logprob,
+        "compression_ratio": segment.compression_ratio,
+        "no_speech_prob": segment.no_speech_prob,
+    }
+    if segment.words is not None:
+        result["words"] = [
+            {"word": word.word, "start": word.start, "end": word.end, "probability": word.probability}
+            for word in segment.words
+        ]
+    return result
+
+
+class FasterWhisperEngine(TranscriptionEngine):
+    """
+    Whisper on CTranslate2 (faster-whisper), with int8 weights by default
+
+    Quantized weights and fused CPU kernels make this several times faster
+    than the PyTorch implementation on machines without a GPU, and the
+    models take a fraction of the memory. Segments come out of a generator,
+    so they are streamed as soon as each one is decoded.
+    """
+
+    name = "faster-whisper"
+
+    # Whisper transcribe options with a faster-whisper counterpart of the same name
+    PASSED_OPTIONS = ("language", "word_timestamps", "initial_prompt", "condition_on_previous_text", "temperature")
+
+    def __init__(self):
+        self._models = ModelRegistry(
+            "faster-whisper",
+            loader=_load_faster_whisper_model,
+            budget_bytes=int(settings.MODEL_CACHE_BUDGET_GB * 1024 ** 3),
+            size_estimator=lambda model_name: int(
+                MODEL_MEMORY_GB.get(model_name, MODEL_MEMORY_GB["large"]) * INT8_MEMORY_FACTOR * 1024 ** 3
+            )
+        )
+
+    def load(self, model_name: str) -> Any:
+        return self._models.get(model_name)
+
+    def transcribe(
+        self,
+        file_path: str,
+        model_name: str,
+        options: Dict[str, Any],
+        audio: Optional[DecodedAudio] = None,
+        on_segment: Optional[Callable[[Dict[str, Any]], None]] = None,
+        record_latency: bool = True
+    ) -> Dict[str, Any]:
+        model = self.load(model_name)
+        kwargs = {key: options[key] for key in self.PASSED_OPTIONS if key in options}
+        kwargs["beam_size"] = settings.FASTER_WHISPER_BEAM_SIZE
+
+        # Voice activity detection is handled by the service, not by faster-whisper's own filter
+        source = audio.samples if audio is not None else file_path
+        start = time.perf_counter()
+        segments, info = model.transcribe(source, vad_filter=False, **kwargs)
+
+        results: List[Dict[str, Any]] = []
+        for segment in segments:
+            # Decoding happens as the generator advances, so this runs once per window
+            thread_budget.checkpoint()
+            results.append(_segment_dict(segment))
+            if on_segment is not None:
+                on_segment(results[-1])
+        if audio is not None and record_latency:
+            self._models.record_inference(model_name, time.perf_counter() - start, audio.duration)
+
+        return {
+            "text": "".join(segment["text"] for segment in results),
+            "segments": results,
+            "language": info.language,
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return self._models.stats()
+
+
+class MockEngine(TranscriptionEngine):
+    """
+    Simulated transcription for testing, ported from the mock transcription module
+
+    Sleeps for MOCK_ENGINE_SECONDS and returns placeholder text, so the rest
+    of the service can be exercised without model weights.
+    """
+
+    name = "mock"
+
+    def load(self, model_name: str) -> Any:
+        return None
+
+    def transcribe(
+        self,
+        file_path: str,
+        model_name: str,
+        options: Dict[str, Any],
+        audio: Optional[DecodedAudio] = None,
+        on_segment: Optional[Callable[[Dict[str, Any]], None]] = None,
+        record_latency: bool = True
+    ) -> Dict[str, Any]:
+        logger.info(f"Simulating transcription for {Path(file_path).name} with {model_name} model")
+
+        # Simulate processing time
+        time.sleep(settings.MOCK_ENGINE_SECONDS)
+
+        segment = {
+            "id": 0,
+            "start": 0.0,
+            "end": audio.duration if audio is not None else 0.0,
+            "text": f" {MOCK_TEXT}",
+        }
+        if options.get("word_timestamps"):
+            segment["words"] = []
+        if on_segment is not None:
+            on_segment(segment)
+        return {"text": segment["text"], "segments": [segment], "language": options.get("language") or "en"}
+
+
+ENGINES: Dict[str, TranscriptionEngine] = {
+    engine.name: engine for engine in (WhisperEngine(), FasterWhisperEngine(), MockEngine())
+}
+
+
+def get_engine(name: Optional[str] = None) -> TranscriptionEngine:
+    """
+    Look up a transcription engine
+
+    Args:
+        name: Engine name (defaults to settings.TRANSCRIPTION_ENGINE)
+
+    Returns:
+        The engine
+
+    Raises:
+        ValueError: If no engine has that name
+    """
+    name = name or settings.TRANSCRIPTION_ENGINE
+    engine = ENGINES.get(name.lower())
+    if engine is None:
+        raise ValueError(f"Unknown engine: {name} (expected one of {', '.join(ENGINES)})")
+    return engine
+
+
+def get_engine_stats() -> Dict[str, Any]:
+    """Model cache statistics of every engine"""
+    return {name: engine.stats() for name, engine in ENGINES.items()}
@@ -0,0 +1,226 @@
+import time
+import logging
+import importlib
+import threading
+from typing import Optional
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.audio import DecodedAudio, decode_audio
+from app.services.decode_pool import decode_pool
+from app.services.result_cache import DiskCache
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Set once Whisper's transcribe accepts precomputed log-mel frames
+_mel_hook_installed = False
+_mel_hook_lock = threading.Lock()
+
+
+class FeatureCache(DiskCache):
+    """
+    On-disk cache of decoded PCM and log-mel frames, one .npy file per entry
+
+    Entries are keyed by the SHA-256 of the upload: "pcm-<hash>" holds the
+    16 kHz samples and "mel<n>-<hash>" the padded log-mel frames with n mel
+    bins. Both are memory-mapped when read, so a cached recording costs no
+    RAM until Whisper touches it. An evicted file that is still mapped stays
+    readable until the mapping is released.
+    """
+
+    suffix = ".npy"
+
+    def load(self, key: str) -> Optional[np.ndarray]:
+        """Memory-map the cached array for key, or return None"""
+        path = self._lookup(key)
+        if path is None:
+            return None
+        try:
+            # Copy-on-write mapping, like decoded audio spilled to disk
+            return np.load(path, mmap_mode="c")
+        except (OSError, ValueError) as e:
+            self._discard(key, e)
+            return None
+
+    def path(self, key: str) -> str:
+        """File holding the entry for key"""
+        return self._path(key)
+
+    def save(self, key: str, array: np.ndarray):
+        """Store an array, evicting old entries to stay within the quota"""
+        self._store(key, lambda f: np.save(f, array))
+
+
+feature_cache = FeatureCache(
+    settings.FEATURE_CACHE_DIR,
+    max_bytes=int(settings.FEATURE_CACHE_MAX_GB * 1024 ** 3),
+    ttl_seconds=settings.FEATURE_CACHE_TTL_SECONDS
+)
+
+
+def load_audio(file_path: str, audio_hash: Optional[str] = None) -> DecodedAudio:
+    """
+    Decoded audio for an upload, from the feature cache when possible
+
+    Args:
+        file_path: Path to the audio file
+        audio_hash: SHA-256 of the upload; without it the file is always decoded
+
+    Returns:
+        The decoded audio, tagged with audio_hash
+    """
+    if audio_hash is None or not settings.FEATURE_CACHE_ENABLED:
+        return _decode(file_path)
+
+    start = time.perf_counter()
+    key = f"pcm-{audio_hash}"
+    samples = feature_cache.load(key)
+    if samples is not None:
+        audio = DecodedAudio(
+            samples, time.perf_counter() - start, feature_cache.path(key),
+            owns_file=False, audio_hash=audio_hash
+        )
+        logger.info(f"Loaded {audio.duration:.1f}s of cached audio in {audio.decode_seconds:.3f}s")
+        return audio
+
+    audio = _decode(file_path)
+    audio.audio_hash = audio_hash
+    cache_audio(audio)
+    return audio
+
+
+def _decode(file_path: str) -> DecodedAudio:
+    """Audio decoded ahead of time by the decode pool, or decoded now"""
+    audio = decode_pool.take(file_path)
+    if audio is None:
+        audio = decode_audio(file_path)
+    return audio
+
+
+def prefetch_audio(file_path: str, audio_hash: Optional[str] = None):
+    """
+    Start decoding an upload on the decode pool before its job runs
+
+    Uploads whose PCM is already in the feature cache are skipped, as
+    loading them costs next to nothing.
+
+    Args:
+        file_path: Path to the audio file
+        audio_hash: SHA-256 of the upload, if known
+    """
+    if not settings.DECODE_POOL_ENABLED:
+        return
+    if audio_hash is not None and settings.FEATURE_CACHE_ENABLED and feature_cache.contains(f"pcm-{audio_hash}"):
+        return
+    decode_pool.prefetch(file_path)
+
+
+def release_audio(file_path: str):
+    """Drop a prefetched upload that its job did not use"""
+    decode_pool.release(file_path)
+
+
+def cache_audio(audio: DecodedAudio):
+    """Store decoded audio in the feature cache under its audio_hash"""
+    try:
+        feature_cache.save(f"pcm-{audio.audio_hash}", audio.samples)
+    except OSError as e:
+        logger.warning(f"Could not cache decoded audio: {e}")
+
+
+def log_mel_features(audio: DecodedAudio, n_mels: int) -> np.ndarray:
+    """
+    Log-mel frames of the audio as Whisper's transcribe computes them
+
+    The frames include the 30 seconds of padding transcribe appends, so
+    they can be passed to it unchanged. Every model with the same number of
+    mel bins shares one cache entry.
+
+    Args:
+        audio: Decoded audio, cached by its audio_hash when set
+        n_mels: Number of mel bins of the model
+
+    Returns:
+        Array of shape (n_mels, frames)
+    """
+    import whisper
+
+    key = f"mel{n_mels}-{audio.audio_hash}"
+    use_cache = audio.audio_hash is not None and settings.FEATURE_CACHE_ENABLED
+    if use_cache:
+        mel = feature_cache.load(key)
+        if mel is not None:
+            return mel
+
+    start = time.perf_counter()
+    mel = whisper.log_mel_spectrogram(audio.samples, n_mels, padding=whisper.audio.N_SAMPLES).numpy()
+    logger.info(f"Computed {mel.shape[1]} log-mel frames in {time.perf_counter() - start:.2f}s")
+    if use_cache:
+        try:
+            feature_cache.save(key, mel)
+        except OSError as e:
+            logger.warning(f"Could not cache log-mel features: {e}")
+    return mel
+
+
+class PrecomputedMel:
+    """Log-mel frames passed to Whisper's transcribe in place of audio"""
+
+    def __init__(self, mel: np.ndarray):
+        self.mel = mel
+
+
+def _install_mel_hook():
+    """
+    Let whisper.transcribe accept PrecomputedMel
+
+    transcribe always computes the mel spectrogram of its input first, so
+    its module-level log_mel_spectrogram is wrapped to return precomputed
+    frames unchanged. Any other input goes to the original function.
+    """
+    global _mel_hook_installed
+
+    with _mel_hook_lock:
+        if _mel_hook_installed:
+            return
+        import torch
+
+        # whisper.transcribe is the function; the module holds the reference it calls
+        transcribe_module = importlib.import_module("whisper.transcribe")
+        original = transcribe_module.log_mel_spectrogram
+
+        def log_mel_spectrogram(audio, n_mels=80, padding=0, device=None):
+            if isinstance(audio, PrecomputedMel):
+                mel = torch.from_numpy(audio.mel)
+                return mel.to(device) if device is not None else mel
+            return original(audio, n_mels, padding, device)
+
+        transcribe_module.log_mel_spectrogram = log_mel_spectrogram
+        _mel_hook_installed = True
+
+
+def precomputed_mel(audio: DecodedAudio, n_mels: int) -> PrecomputedMel:
+    """
+    Cached log-mel frames of the audio, ready to pass to a Whisper model's transcribe
+
+    Args:
+        audio: Decoded audio
+        n_mels: Number of mel bins of the model
+
+    Returns:
+        Wrapper accepted by transcribe in place of the audio
+    """
+    _install_mel_hook()
+    return PrecomputedMel(log_mel_features(audio, n_mels))
+
+
+def get_feature_cache_stats():
+    """
+    Report size, hits and misses of the feature cache
+
+    Returns:
+        Dictionary of cache statistics
+    """
+    return feature_cache.stats()
@@ -378,11 +378,12 @@ class DiarizerApp(tk.Tk):
             language = self.language_var.get()
             model = self.model_var.get()
             
-            # Call API
+            # Call API, showing segments as the server produces them
             transcript = self.api_client.transcribe_audio(
                 self.selected_file, 
                 language, 
-                model
+                model,
+                on_segment=lambda segment: self.after(0, self.show_segment, segment)
             )
             
             # Store result
@@ -395,6 +396,16 @@ class DiarizerApp(tk.Tk):
             # Update UI on main thread
             self.after(0, lambda: self.show_error(f"Processing failed: {str(e)}"))
 
+    def show_segment(self, segment):
+        """Append a segment received while the transcription is still running"""
+        self.progress_label.config(text="Transcribing...")
+        self.transcript_text.config(state="normal")
+        if self.transcript_text.get("1.0", "end-1c") == "Processing...":
+            self.transcript_text.delete("1.0", tk.END)
+        self.transcript_text.insert(tk.END, f"{segment['text']}\n")
+        self.transcript_text.see(tk.END)
+        self.transcript_text.config(state="disabled")
+
     def update_ui_after_processing(self):
         """Update UI after processing is complete"""
         # Stop progress
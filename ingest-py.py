@@ -0,0 +1,165 @@
+import os
+import uuid
+import asyncio
+import hashlib
+import logging
+import itertools
+import struct
+from pathlib import Path
+from typing import AsyncIterator, Iterable, Iterator, Optional
+
+from app.core.config import settings
+from app.services.audio import DecodedAudio, decode_stream
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Leading bytes inspected to decide whether the container can be piped
+PROBE_BYTES = 64 * 1024
+
+
+class IngestedUpload:
+    """
+    An upload taken in by ingest_stream
+
+    Streamable containers arrive decoded (audio is set and nothing touched
+    the disk). Containers that need seeking were spooled to path instead,
+    to be decoded from the file like a regular upload.
+    """
+
+    def __init__(
+        self,
+        file_name: str,
+        audio_hash: str,
+        size: int,
+        audio: Optional[DecodedAudio] = None,
+        path: Optional[str] = None
+    ):
+        self.file_name = file_name
+        self.audio_hash = audio_hash
+        self.size = size
+        self.audio = audio
+        self.path = path
+
+    @property
+    def spooled(self) -> bool:
+        return self.path is not None
+
+
+def needs_seeking(head: bytes) -> bool:
+    """
+    Whether ffmpeg must seek to read a container, judging from its first bytes
+
+    WAV, MP3, FLAC, Ogg and Matroska/WebM read fine front to back. MP4-family
+    files (MP4, M4A, MOV, 3GP) only do when the moov index comes before the
+    media data ("fast start"); recorders usually write it at the end.
+
+    Args:
+        head: Leading bytes of the file (PROBE_BYTES or the whole file)
+
+    Returns:
+        True if the file should be spooled before decoding
+    """
+    if head[4:8] != b"ftyp":
+        return False
+
+    # Walk the top-level boxes until the index or the media data shows up
+    position = 0
+    while position + 8 <= len(head):
+        size, box_type = struct.unpack(">I4s", head[position:position + 8])
+        if box_type == b"moov":
+            return False
+        if box_type == b"mdat":
+            return True
+        if size == 1:
+            if position + 16 > len(head):
+                break
+            size = struct.unpack(">Q", head[position + 8:position + 16])[0]
+        if size < 8:
+            # Box runs to the end of the file, or is corrupt
+            break
+        position += size
+    return True
+
+
+class _HashingStream:
+    """Passes chunks through, keeping a running SHA-256 and byte count"""
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = chunks
+        self.digest = hashlib.sha256()
+        self.size = 0
+
+    def __iter__(self) -> Iterator[bytes]:
+        for chunk in self._chunks:
+            if chunk:
+                self.digest.update(chunk)
+                self.size += len(chunk)
+                yield chunk
+
+
+def ingest_stream(chunks: Iterable[bytes], file_name: str) -> IngestedUpload:
+    """
+    Take in an upload as it arrives: decode it straight from the stream, or
+    spool it to UPLOAD_DIR if its container needs seeking
+
+    The upload is hashed on the way through either path. Decoded PCM is not
+    written to the feature cache, which would put several times the size of
+    the compressed upload on disk; log-mel frames are still cached under the
+    hash once the job runs Whisper.
+
+    Args:
+        chunks: Encoded audio, in order (blocking iterator; call off the event loop)
+        file_name: Original name of the file
+
+    Returns:
+        The ingested upload
+    """
+    chunks = iter(chunks)
+
+    # Read enough of the file to tell its container apart
+    head = bytearray()
+    for chunk in chunks:
+        head.extend(chunk)
+        if len(head) >= PROBE_BYTES:
+            break
+    head = bytes(head)
+
+    data = _HashingStream(itertools.chain([head], chunks))
+
+    if needs_seeking(head):
+        path = os.path.join(settings.UPLOAD_DIR, f"{uuid.uuid4()}_{Path(file_name).name}")
+        logger.info(f"Spooling {Path(file_name).name} to disk: container needs seeking")
+        try:
+            with open(path, "wb") as buffer:
+                for chunk in data:
+                    buffer.write(chunk)
+        except BaseException:
+            if os.path.exists(path):
+                os.remove(path)
+            raise
+        return IngestedUpload(file_name, data.digest.hexdigest(), data.size, path=path)
+
+    audio = decode_stream(data)
+    audio.audio_hash = data.digest.hexdigest()
+    logger.info(f"Decoded {data.size} bytes of {Path(file_name).name} straight from the stream")
+    return IngestedUpload(file_name, audio.audio_hash, data.size, audio=audio)
+
+
+def iterate_from_loop(stream: AsyncIterator[bytes], loop: asyncio.AbstractEventLoop) -> Iterator[bytes]:
+    """
+    Consume an async byte stream from a worker thread, chunk by chunk
+
+    Args:
+        stream: Async iterator owned by the event loop (e.g. a request body)
+        loop: The running event loop
+
+    Yields:
+        The stream's chunks
+    """
+    iterator = stream.__aiter__()
+    while True:
+        try:
+            yield asyncio.run_coroutine_threadsafe(iterator.__anext__(), loop).result()
+        except StopAsyncIteration:
+            return
@@ -0,0 +1,210 @@
+import os
+import time
+import uuid
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from app.core.config import settings
+from app.services.scheduler import scheduler, WorkCost
+from app.services.features import prefetch_audio, release_audio
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Job states
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+
+
+class Job:
+    """State of a single background processing job"""
+
+    def __init__(self, task: str, file_name: str):
+        self.job_id = str(uuid.uuid4())
+        self.task = task
+        self.file_name = file_name
+        self.status = JOB_QUEUED
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.future: Optional[Future] = None
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in (JOB_COMPLETED, JOB_FAILED)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Public view of the job, without the result payload"""
+        return {
+            "job_id": self.job_id,
+            "task": self.task,
+            "file_name": self.file_name,
+            "status": self.status,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class JobManager:
+    """
+    Runs audio processing jobs on a bounded worker pool so that long
+    inference runs never execute on the event loop
+    """
+
+    def __init__(self, max_workers: int = 2, result_ttl: float = 3600):
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="job-worker"
+        )
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self._result_ttl = result_ttl
+        self._max_workers = max_workers
+        self._started_at = time.time()
+        self._running = 0
+        self._busy_seconds = 0.0
+
+    def submit(
+        self,
+        task: str,
+        file_name: str,
+        func: Callable[..., Dict[str, Any]],
+        *args: Any,
+        cleanup_path: Optional[str] = None,
+        cost: Optional[WorkCost] = None,
+        decode_path: Optional[str] = None,
+        audio_hash: Optional[str] = None
+    ) -> Job:
+        """
+        Queue a job on the worker pool
+
+        Args:
+            task: Name of the task (e.g. "transcribe" or "diarize")
+            file_name: Original name of the uploaded file
+            func: Callable doing the work, returning the job result
+            *args: Arguments passed to func
+            cleanup_path: File to delete once the job has finished
+            cost: Estimated cost; when given the job goes through admission control
+            decode_path: Upload to decode on the decode pool while the job is queued
+            audio_hash: SHA-256 of that upload, to skip decoding audio already cached
+
+        Returns:
+            The queued job
+
+        Raises:
+            QueueFullError: If the scheduler cannot accept the job
+        """
+        self._purge_expired()
+
+        job = Job(task, file_name)
+        job.future = Future()
+
+        def start():
+            self._executor.submit(self._run, job, func, args, cleanup_path, cost, decode_path)
+
+        with self._lock:
+            self._jobs[job.job_id] = job
+
+        # Register before the job can start, so it finds its decode in flight
+        if decode_path is not None:
+            prefetch_audio(decode_path, audio_hash)
+
+        if cost is None:
+            start()
+        else:
+            try:
+                scheduler.submit(cost, start)
+            except Exception:
+                with self._lock:
+                    del self._jobs[job.job_id]
+                if decode_path is not None:
+                    release_audio(decode_path)
+                if cleanup_path and os.path.exists(cleanup_path):
+                    os.remove(cleanup_path)
+                raise
+
+        logger.info(f"Queued {task} job {job.job_id} for {file_name}")
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Look up a job by id"""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def stats(self) -> Dict[str, Any]:
+        """Worker occupancy: how much of the pool's time went into running jobs"""
+        with self._lock:
+            elapsed = time.time() - self._started_at
+            return {
+                "workers": self._max_workers,
+                "running": self._running,
+                "busy_seconds": round(self._busy_seconds, 1),
+                "utilization": round(self._busy_seconds / (elapsed * self._max_workers), 3) if elapsed > 0 else 0.0,
+            }
+
+    def shutdown(self, wait: bool = False):
+        """Stop accepting jobs and release the worker threads"""
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+    def _run(
+        self,
+        job: Job,
+        func: Callable[..., Dict[str, Any]],
+        args: tuple,
+        cleanup_path: Optional[str],
+        cost: Optional[WorkCost],
+        decode_path: Optional[str] = None
+    ):
+        job.status = JOB_RUNNING
+        job.started_at = time.time()
+        with self._lock:
+            self._running += 1
+        error: Optional[Exception] = None
+        try:
+            job.result = func(*args)
+            job.status = JOB_COMPLETED
+        except Exception as e:
+            logger.error(f"Job {job.job_id} failed: {str(e)}")
+            # Kept as raised, so callers waiting on the future can tell failures apart
+            error = e
+            job.error = str(e)
+            job.status = JOB_FAILED
+        finally:
+            job.finished_at = time.time()
+            with self._lock:
+                self._running -= 1
+                self._busy_seconds += job.finished_at - job.started_at
+            if decode_path is not None:
+                # No-op if the pipeline took the decoded audio
+                release_audio(decode_path)
+            if cleanup_path and os.path.exists(cleanup_path):
+                os.remove(cleanup_path)
+            if cost is not None:
+                scheduler.release(cost)
+
+        if job.status == JOB_COMPLETED:
+            job.future.set_result(job.result)
+        else:
+            job.future.set_exception(error)
+
+    def _purge_expired(self):
+        """Forget finished jobs older than the result TTL"""
+        cutoff = time.time() - self._result_ttl
+        with self._lock:
+            expired = [
+                job_id for job_id, job in self._jobs.items()
+                if job.is_finished and job.finished_at < cutoff
+            ]
+            for job_id in expired:
+                del self._jobs[job_id]
+
+
+job_manager = JobManager(settings.JOB_WORKERS, settings.JOB_RESULT_TTL)
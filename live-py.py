@@ -0,0 +1,419 @@
+import asyncio
+import logging
+import threading
+import subprocess
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.audio import SAMPLE_RATE
+from app.services.vad import detect_speech, frame_energy_db, MIN_SPEECH_DB
+from app.services.transcription import get_whisper_model, get_whisper_language
+from app.services.thread_budget import thread_budget
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Raw PCM formats decoded in process when sent at 16 kHz
+RAW_FORMATS = {"s16le": np.int16, "f32le": np.float32}
+
+# Containerized streams decoded with ffmpeg, by the name clients use
+CONTAINER_FORMATS = {"opus": "ogg", "ogg": "ogg", "webm": "matroska"}
+
+# Silence kept at the start of the buffer when nothing was said, so a word starting now is not clipped
+KEEP_SILENCE_SECONDS = 0.5
+
+# How far the session noise floor may rise per processing step, so it adapts to a noisier room
+NOISE_FLOOR_RISE_DB = 1.0
+
+# Characters of committed text passed to Whisper as context for the next commit
+PROMPT_CHARS = 200
+
+# Live sessions currently open
+_sessions = 0
+_sessions_lock = threading.Lock()
+
+
+def acquire_live_session() -> bool:
+    """Reserve a live session slot, returning False when settings.LIVE_MAX_SESSIONS are open"""
+    global _sessions
+
+    with _sessions_lock:
+        if _sessions >= settings.LIVE_MAX_SESSIONS:
+            return False
+        _sessions += 1
+        return True
+
+
+def release_live_session():
+    global _sessions
+
+    with _sessions_lock:
+        _sessions = max(0, _sessions - 1)
+
+
+class FFmpegStreamDecoder:
+    """
+    Decodes an audio stream that arrives in pieces with an ffmpeg subprocess
+
+    Bytes fed in are written to ffmpeg's stdin; a reader thread passes the
+    16 kHz mono float32 samples it produces to on_samples.
+    """
+
+    def __init__(self, input_args: List[str], on_samples: Callable[[np.ndarray], None]):
+        command = [
+            "ffmpeg", "-v", "error", "-fflags", "nobuffer",
+            *input_args, "-i", "pipe:0",
+            "-f", "f32le", "-ac", "1", "-ar", str(SAMPLE_RATE),
+            "pipe:1"
+        ]
+        try:
+            self._process = subprocess.Popen(
+                command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+            )
+        except OSError as e:
+            raise RuntimeError(f"Failed to start ffmpeg: {str(e)}")
+        self._on_samples = on_samples
+        self._reader = threading.Thread(target=self._read, name="live-decoder", daemon=True)
+        self._reader.start()
+
+    def feed(self, data: bytes):
+        self._process.stdin.write(data)
+        self._process.stdin.flush()
+
+    def close(self, timeout: float = 5.0):
+        """Finish the stream, waiting for the samples still inside ffmpeg"""
+        try:
+            self._process.stdin.close()
+        except OSError:
+            pass
+        self._reader.join(timeout)
+        if self._process.poll() is None:
+            self._process.kill()
+        self._process.wait()
+
+    def _read(self):
+        remainder = b""
+        while True:
+            chunk = self._process.stdout.read1(16384)
+            if not chunk:
+                return
+            chunk = remainder + chunk
+            usable = len(chunk) - len(chunk) % 4
+            remainder = chunk[usable:]
+            if usable:
+                self._on_samples(np.frombuffer(chunk[:usable], dtype=np.float32))
+
+
+class LiveTranscriber:
+    """
+    Incremental transcription of a live audio stream
+
+    Audio is buffered until it is committed. Every step_seconds of new audio,
+    the uncommitted buffer is transcribed again and reported as a partial
+    hypothesis. When voice activity detection finds a pause of at least
+    commit_silence_seconds, everything before the middle of the pause is
+    transcribed a last time, reported as final segments and dropped from the
+    buffer. The buffer never grows past window_seconds: without a pause it
+    is committed at a hard cut. Audio arriving faster than it can be
+    processed is dropped beyond max_backlog_seconds, so memory and latency
+    stay bounded however long the session runs.
+    """
+
+    def __init__(
+        self,
+        model: str,
+        language: str,
+        input_format: str = "s16le",
+        sample_rate: int = SAMPLE_RATE,
+        window_seconds: Optional[float] = None,
+        step_seconds: Optional[float] = None,
+        commit_silence_seconds: Optional[float] = None,
+        max_backlog_seconds: Optional[float] = None
+    ):
+        self.model = model
+        self.language = get_whisper_language(language)
+        self.window_seconds = window_seconds or settings.LIVE_WINDOW_SECONDS
+        self.step_seconds = step_seconds or settings.LIVE_STEP_SECONDS
+        self.commit_silence_seconds = commit_silence_seconds or settings.LIVE_COMMIT_SILENCE_SECONDS
+        self.max_backlog_seconds = max_backlog_seconds or settings.LIVE_MAX_BACKLOG_SECONDS
+
+        # Audio received but not yet processed, guarded by the lock
+        self._pending: List[np.ndarray] = []
+        self._pending_samples = 0
+        self._lock = threading.Lock()
+
+        # Uncommitted audio and its position in the stream; only touched while processing
+        self._buffer = np.zeros(0, dtype=np.float32)
+        self._offset = 0.0
+        # Start low, so a session that opens mid-sentence is not taken for silence
+        self._noise_floor = MIN_SPEECH_DB - settings.VAD_MARGIN_DB
+        self._prompt = ""
+        self._committed_segments = 0
+        self._dropped_seconds = 0.0
+
+        if sample_rate <= 0:
+            raise ValueError(f"Invalid sample rate: {sample_rate}")
+
+        self._raw_dtype = None
+        self._raw_remainder = b""
+        self._decoder: Optional[FFmpegStreamDecoder] = None
+        if input_format in RAW_FORMATS and sample_rate == SAMPLE_RATE:
+            self._raw_dtype = RAW_FORMATS[input_format]
+        elif input_format in RAW_FORMATS:
+            self._decoder = FFmpegStreamDecoder(
+                ["-f", input_format, "-ar", str(sample_rate), "-ac", "1"], self._add_samples
+            )
+        elif input_format in CONTAINER_FORMATS:
+            self._decoder = FFmpegStreamDecoder(["-f", CONTAINER_FORMATS[input_format]], self._add_samples)
+        else:
+            supported = ", ".join(sorted({*RAW_FORMATS, *CONTAINER_FORMATS}))
+            raise ValueError(f"Unsupported audio format: {input_format} (supported: {supported})")
+
+    @property
+    def feed_may_block(self) -> bool:
+        """Whether feed writes to ffmpeg, which blocks while its input pipe is full"""
+        return self._decoder is not None
+
+    @property
+    def pending_seconds(self) -> float:
+        with self._lock:
+            return self._pending_samples / SAMPLE_RATE
+
+    def feed(self, data: bytes):
+        """Add a frame of audio as received from the client"""
+        if self._decoder is not None:
+            self._decoder.feed(data)
+            return
+
+        # Frames may split a sample, so carry partial samples over
+        data = self._raw_remainder + data
+        sample_size = np.dtype(self._raw_dtype).itemsize
+        usable = len(data) - len(data) % sample_size
+        self._raw_remainder = data[usable:]
+        samples = np.frombuffer(data[:usable], dtype=self._raw_dtype)
+        if self._raw_dtype == np.int16:
+            samples = samples.astype(np.float32) / 32768.0
+        self._add_samples(samples)
+
+    def process(self) -> List[Dict[str, Any]]:
+        """
+        Handle the audio received since the last call
+
+        Returns:
+            Events to send: "final" segments, then a "partial" hypothesis
+        """
+        events = self._take_pending()
+        duration = len(self._buffer) / SAMPLE_RATE
+        if duration == 0:
+            return events
+
+        speech = self._detect_speech()
+        if not speech:
+            # Nothing said: drop the silence instead of transcribing it
+            self._drop(max(0.0, duration - KEEP_SILENCE_SECONDS))
+            return events
+
+        cut = self._commit_point(speech, duration)
+        if cut is None and duration >= self.window_seconds:
+            # No pause long enough; keep the last step so the word being spoken is not cut twice
+            cut = max(duration - self.step_seconds, duration / 2)
+            logger.info(f"Live buffer reached {duration:.1f}s without a pause, committing at a hard cut")
+        if cut is not None:
+            events.extend(self._commit(cut))
+
+        if len(self._buffer) and self._detect_speech():
+            result = self._transcribe(self._buffer)
+            text = result["text"].strip()
+            if text:
+                events.append({
+                    "type": "partial",
+                    "start": self._offset,
+                    "end": self._offset + len(self._buffer) / SAMPLE_RATE,
+                    "text": text,
+                })
+        return events
+
+    def flush(self) -> List[Dict[str, Any]]:
+        """
+        Commit everything left at the end of the stream
+
+        Returns:
+            Remaining "final" segments and a closing "summary" event
+        """
+        if self._decoder is not None:
+            self._decoder.close()
+            self._decoder = None
+
+        events = self._take_pending()
+        if len(self._buffer) and self._detect_speech():
+            events.extend(self._commit(len(self._buffer) / SAMPLE_RATE))
+        self._offset += len(self._buffer) / SAMPLE_RATE
+        self._buffer = np.zeros(0, dtype=np.float32)
+
+        events.append({
+            "type": "summary",
+            "duration": self._offset,
+            "segments": self._committed_segments,
+            "dropped_seconds": self._dropped_seconds,
+        })
+        return events
+
+    def close(self):
+        if self._decoder is not None:
+            self._decoder.close()
+            self._decoder = None
+
+    def _add_samples(self, samples: np.ndarray):
+        with self._lock:
+            self._pending.append(samples)
+            self._pending_samples += len(samples)
+
+    def _take_pending(self) -> List[Dict[str, Any]]:
+        """Move received audio into the buffer, dropping what is too far behind"""
+        with self._lock:
+            pending = self._pending
+            self._pending = []
+            self._pending_samples = 0
+
+        events = []
+        if not pending:
+            return events
+        new_audio = np.concatenate(pending)
+        max_backlog = int(self.max_backlog_seconds * SAMPLE_RATE)
+        if len(new_audio) > max_backlog:
+            # Transcription cannot keep up; skip ahead rather than fall further behind
+            skipped = len(new_audio) - max_backlog
+            new_audio = new_audio[skipped:]
+            self._offset += (len(self._buffer) + skipped) / SAMPLE_RATE
+            self._buffer = np.zeros(0, dtype=np.float32)
+            self._dropped_seconds += skipped / SAMPLE_RATE
+            events.append({"type": "dropped", "seconds": skipped / SAMPLE_RATE})
+            logger.warning(f"Live transcription is behind, dropped {skipped / SAMPLE_RATE:.1f}s of audio")
+
+        self._buffer = np.concatenate([self._buffer, new_audio])
+        return events
+
+    def _detect_speech(self) -> List[Any]:
+        """Speech regions of the buffer, against a noise floor tracked over the session"""
+        energy = frame_energy_db(self._buffer, SAMPLE_RATE)
+        if len(energy):
+            floor = float(np.percentile(energy, 10))
+            self._noise_floor = min(floor, self._noise_floor + NOISE_FLOOR_RISE_DB)
+        return detect_speech(
+            self._buffer, SAMPLE_RATE,
+            min_silence_seconds=self.commit_silence_seconds,
+            noise_floor_db=self._noise_floor
+        )
+
+    def _commit_point(self, speech: List[Any], duration: float) -> Optional[float]:
+        """Middle of the latest pause long enough to commit at, if any"""
+        if duration - speech[-1][1] >= self.commit_silence_seconds:
+            return (speech[-1][1] + duration) / 2
+        if len(speech) > 1:
+            # detect_speech only separates regions at pauses of at least commit_silence_seconds
+            return (speech[-2][1] + speech[-1][0]) / 2
+        return None
+
+    def _commit(self, cut: float) -> List[Dict[str, Any]]:
+        """Transcribe the buffer up to cut as final segments and drop it"""
+        samples = self._buffer[:int(cut * SAMPLE_RATE)]
+        result = self._transcribe(samples)
+        if self.language is None:
+            # Keep the language of the first utterance instead of detecting it every step
+            self.language = result.get("language")
+
+        events = []
+        for segment in result["segments"]:
+            text = segment["text"].strip()
+            if not text:
+                continue
+            events.append({
+                "type": "final",
+                "start": self._offset + segment["start"],
+                "end": self._offset + min(segment["end"], cut),
+                "text": text,
+            })
+        self._committed_segments += len(events)
+        self._prompt = (self._prompt + result["text"])[-PROMPT_CHARS:]
+        self._drop(cut)
+        return events
+
+    def _drop(self, seconds: float):
+        count = int(seconds * SAMPLE_RATE)
+        self._buffer = self._buffer[count:].copy()
+        self._offset += count / SAMPLE_RATE
+
+    def _transcribe(self, samples: np.ndarray) -> Dict[str, Any]:
+        options = {
+            "verbose": None,
+            "fp16": False,
+            # The prompt carries context between commits; within one, it would repeat hallucinations
+            "condition_on_previous_text": False,
+        }
+        if self.language:
+            options["language"] = self.language
+        if self._prompt:
+            options["initial_prompt"] = self._prompt
+        # Live sessions share the cores with the batch jobs
+        with thread_budget.lease("live"):
+            return get_whisper_model(self.model).transcribe(np.ascontiguousarray(samples), **options)
+
+
+async def run_live_session(
+    transcriber: LiveTranscriber,
+    receive: Callable[[], Awaitable[Optional[bytes]]],
+    send: Callable[[Dict[str, Any]], Awaitable[None]]
+):
+    """
+    Drive a live transcriber from an async source of audio frames
+
+    Frames are fed as they arrive; whenever step_seconds of new audio are
+    waiting and no transcription is running, the transcriber processes them
+    on a worker thread. Audio that arrives during a run is handled by the
+    next one, so a slow model lowers the update rate instead of queueing work.
+    Frames decoded by ffmpeg are written from a worker thread too, since the
+    write blocks while ffmpeg's input pipe is full.
+
+    Args:
+        transcriber: The session's transcriber
+        receive: Returns the next audio frame, or None at the end of the stream
+        send: Delivers an event to the client
+    """
+    loop = asyncio.get_running_loop()
+    new_audio = asyncio.Event()
+
+    async def receive_frames():
+        try:
+            while True:
+                frame = await receive()
+                if frame is None:
+                    return
+                if transcriber.feed_may_block:
+                    # Keep the event loop free while ffmpeg catches up; the next frame waits for this one
+                    await loop.run_in_executor(None, transcriber.feed, frame)
+                else:
+                    transcriber.feed(frame)
+                if transcriber.pending_seconds >= transcriber.step_seconds:
+                    new_audio.set()
+        finally:
+            new_audio.set()
+
+    receiver = asyncio.ensure_future(receive_frames())
+    try:
+        while True:
+            await new_audio.wait()
+            new_audio.clear()
+            if receiver.done():
+                break
+            for event in await loop.run_in_executor(None, transcriber.process):
+                await send(event)
+
+        # Raises if the client went away
+        receiver.result()
+        for event in await loop.run_in_executor(None, transcriber.flush):
+            await send(event)
+    finally:
+        receiver.cancel()
+        transcriber.close()
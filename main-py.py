@@ -1,6 +1,12 @@
 import uvicorn
 from app.api.routes import router
 from app.core.config import settings
+from app.services.jobs import job_manager
+from app.services.startup import start_preload
+from app.services.chunking import shutdown_pool
+from app.services.uploads import upload_sessions
+from app.services.decode_pool import decode_pool
+from app.services.workers import worker_supervisor
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -22,6 +28,34 @@ app.add_middleware(
 # Include routers
 app.include_router(router, prefix="/api/v1")
 
+
+@app.on_event("startup")
+def preload_models():
+    """Load and warm up the configured models without delaying startup"""
+    if settings.WORKER_PROCESSES > 0:
+        # Workers are forked from a process with the models already loaded
+        worker_supervisor.start(settings.WORKER_PROCESSES, settings.WORKER_THREADS)
+    else:
+        start_preload()
+
+
+@app.on_event("startup")
+def remove_stale_uploads():
+    """Delete uploads abandoned before the last shutdown, then keep checking while running"""
+    upload_sessions.purge_stale()
+    upload_sessions.start_purging(settings.UPLOAD_PURGE_INTERVAL_SECONDS)
+
+
+@app.on_event("shutdown")
+def shutdown_workers():
+    """Stop the worker pools when the server shuts down"""
+    upload_sessions.stop_purging()
+    job_manager.shutdown()
+    worker_supervisor.shutdown()
+    decode_pool.shutdown()
+    shutdown_pool()
+
+
 if __name__ == "__main__":
     uvicorn.run(
         "main:app",
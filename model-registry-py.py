@@ -0,0 +1,243 @@
+import time
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+def model_size_bytes(model: Any) -> int:
+    """
+    Measure the memory held by a model's weights
+
+    Args:
+        model: Loaded model (a torch module, or anything exposing parameters())
+
+    Returns:
+        Size of the parameters, buffers and packed quantized weights in bytes, or 0 if unknown
+    """
+    size = 0
+    for attr in ("parameters", "buffers"):
+        tensors = getattr(model, attr, None)
+        if tensors is None:
+            continue
+        for tensor in tensors():
+            size += tensor.numel() * tensor.element_size()
+
+    # Dynamically quantized layers keep their int8 weights packed, outside parameters()
+    modules = getattr(model, "modules", None)
+    if modules is not None:
+        for module in modules():
+            weight_bias = getattr(module, "_weight_bias", None)
+            if weight_bias is None:
+                continue
+            for tensor in weight_bias():
+                if tensor is not None:
+                    size += tensor.numel() * tensor.element_size()
+    return size
+
+
+class ModelRegistry:
+    """
+    Thread-safe LRU cache of loaded models with a memory budget
+
+    Each model is loaded at most once, even when many requests ask for it
+    at the same time: the first caller loads it and the others wait for
+    that load to finish. When the resident models exceed the budget, the
+    least recently used ones are evicted, except models pinned with pin().
+    Requests still holding an evicted model keep using it; its memory is
+    freed once they finish.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        loader: Callable[[str], Any],
+        budget_bytes: int,
+        size_estimator: Optional[Callable[[str], int]] = None
+    ):
+        self.name = name
+        self.budget_bytes = budget_bytes
+        self._loader = loader
+        self._size_estimator = size_estimator
+
+        self._models: "OrderedDict[str, Any]" = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self._loading: Dict[str, Future] = {}
+        self._pins: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.load_seconds: Dict[str, float] = {}
+        # Kept after eviction, so variants of a model can be compared
+        self.model_bytes: Dict[str, int] = {}
+        self._inference: Dict[str, Dict[str, float]] = {}
+
+    def get(self, key: str) -> Any:
+        """
+        Return a resident model, loading it on first use
+
+        Args:
+            key: Model name
+
+        Returns:
+            Loaded model
+        """
+        with self._lock:
+            if key in self._models:
+                self.hits += 1
+                self._models.move_to_end(key)
+                return self._models[key]
+
+            self.misses += 1
+            pending = self._loading.get(key)
+            if pending is None:
+                # This caller does the load, everyone else waits on it
+                pending = Future()
+                self._loading[key] = pending
+                is_loader = True
+            else:
+                is_loader = False
+
+        if not is_loader:
+            return pending.result()
+
+        try:
+            model = self._load(key)
+        except Exception as e:
+            with self._lock:
+                del self._loading[key]
+            pending.set_exception(e)
+            raise
+
+        with self._lock:
+            del self._loading[key]
+        pending.set_result(model)
+        return model
+
+    def pin(self, key: str) -> Any:
+        """
+        Load a model if needed and keep it resident until unpin() is called as often
+
+        Args:
+            key: Model name
+
+        Returns:
+            Loaded model
+        """
+        # Pin before loading so the model cannot be evicted as soon as it is loaded
+        with self._lock:
+            self._pins[key] = self._pins.get(key, 0) + 1
+        try:
+            return self.get(key)
+        except Exception:
+            self.unpin(key)
+            raise
+
+    def unpin(self, key: str):
+        with self._lock:
+            count = self._pins.get(key, 0) - 1
+            if count > 0:
+                self._pins[key] = count
+            else:
+                self._pins.pop(key, None)
+
+    def record_inference(self, key: str, seconds: float, audio_seconds: float):
+        """
+        Record one inference run on a model, for its latency statistics
+
+        Args:
+            key: Model name
+            seconds: Inference time
+            audio_seconds: Duration of the audio processed
+        """
+        with self._lock:
+            totals = self._inference.setdefault(key, {"runs": 0, "seconds": 0.0, "audio_seconds": 0.0})
+            totals["runs"] += 1
+            totals["seconds"] += seconds
+            totals["audio_seconds"] += audio_seconds
+
+    def is_loaded(self, key: str) -> bool:
+        with self._lock:
+            return key in self._models
+
+    def evict(self, key: str) -> bool:
+        """Drop a model from the cache, returning whether it was resident"""
+        with self._lock:
+            if key not in self._models:
+                return False
+            self._remove(key)
+            return True
+
+    def clear(self):
+        with self._lock:
+            for key in list(self._models):
+                self._remove(key)
+
+    def stats(self) -> Dict[str, Any]:
+        """Cache counters and the resident models with their sizes"""
+        with self._lock:
+            return {
+                "resident": {key: self._sizes[key] for key in self._models},
+                "resident_bytes": sum(self._sizes.values()),
+                "budget_bytes": self.budget_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "load_seconds": dict(self.load_seconds),
+                "model_bytes": dict(self.model_bytes),
+                "inference": {
+                    key: {
+                        "runs": totals["runs"],
+                        "mean_seconds": round(totals["seconds"] / totals["runs"], 3),
+                        "rtf": round(totals["seconds"] / totals["audio_seconds"], 4) if totals["audio_seconds"] else None,
+                    }
+                    for key, totals in self._inference.items()
+                },
+                "pinned": dict(self._pins),
+            }
+
+    def _load(self, key: str) -> Any:
+        logger.info(f"Loading {self.name} model: {key}")
+        start = time.perf_counter()
+        model = self._loader(key)
+        elapsed = time.perf_counter() - start
+
+        size = model_size_bytes(model)
+        if not size and self._size_estimator is not None:
+            size = self._size_estimator(key)
+        logger.info(f"Loaded {self.name} model {key} ({size / 1024 ** 2:.0f} MB) in {elapsed:.2f}s")
+
+        with self._lock:
+            self.load_seconds[key] = elapsed
+            self.model_bytes[key] = size
+            self._make_room(size)
+            self._models[key] = model
+            self._sizes[key] = size
+        return model
+
+    def _make_room(self, size: int):
+        """Evict least recently used models until size fits (lock held)"""
+        while sum(self._sizes.values()) + size > self.budget_bytes:
+            key = next((key for key in self._models if key not in self._pins), None)
+            if key is None:
+                # Everything left is pinned
+                break
+            logger.info(f"Evicting {self.name} model {key} to stay within memory budget")
+            self._remove(key)
+            self.evictions += 1
+
+        if size > self.budget_bytes:
+            logger.warning(
+                f"{self.name} model of {size / 1024 ** 2:.0f} MB exceeds the cache budget "
+                f"of {self.budget_bytes / 1024 ** 2:.0f} MB"
+            )
+
+    def _remove(self, key: str):
+        del self._models[key]
+        del self._sizes[key]
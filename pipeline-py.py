@@ -0,0 +1,352 @@
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_EXCEPTION, wait
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.services.audio import DecodedAudio
+from app.services.features import load_audio
+from app.services.transcription import (
+    transcribe_audio_segments, format_transcript, get_whisper_language, whisper_model_key
+)
+from app.services.engines import get_engine
+from app.services.cascade import uses_cascade, cascade_key
+from app.services.diarization import diarize_audio, format_diarized_transcript, DIARIZATION_MODEL
+from app.services.alignment import align_segments, align_words
+from app.services.result_cache import result_cache, make_key
+from app.services.thread_budget import thread_budget
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+def _run_stage(name: str, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Tuple[Any, float]:
+    """Run one stage on its share of the thread budget and time it"""
+    with thread_budget.lease(name) as lease:
+        logger.info(f"Starting {name} stage with {lease.threads} threads")
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        return result, time.perf_counter() - start
+
+
+def whisper_cache_key(
+    audio_hash: str,
+    language: str,
+    model: str,
+    word_timestamps: bool,
+    vad_filter: bool,
+    engine: str,
+    cascade: bool
+) -> str:
+    """Cache key of the Whisper segments for an upload and its normalized options"""
+    model = model.lower()
+    return make_key(
+        "whisper",
+        audio_hash,
+        get_whisper_language(language) or "auto",
+        # The float32 and int8 variants of a Whisper model transcribe differently
+        whisper_model_key(model) if engine == "whisper" else model,
+        word_timestamps,
+        vad_filter,
+        engine,
+        # A cascaded transcript also depends on the draft model and the escalation thresholds
+        cascade_key(engine) if uses_cascade(model, cascade) else None
+    )
+
+
+def diarization_cache_key(audio_hash: str) -> str:
+    """Cache key of the diarization segments for an upload"""
+    return make_key("diarization", audio_hash, DIARIZATION_MODEL)
+
+
+def public_segment(segment: Dict[str, Any]) -> Dict[str, Any]:
+    """The fields of a Whisper segment sent to streaming clients"""
+    return {
+        "id": segment.get("id"),
+        "start": segment["start"],
+        "end": segment["end"],
+        "text": segment["text"].strip(),
+    }
+
+
+class SegmentStream:
+    """
+    Reports transcript segments as they arrive, then with speakers once diarization is known
+
+    Every segment is reported as a "segment" event immediately. Once the
+    diarization has been set, each segment is also aligned on its own and
+    reported as one or more "speaker_segment" events; segments that arrived
+    earlier are aligned at that moment. The final diarized transcript aligns
+    the whole transcript at once, so word-level speakers there may differ
+    slightly at segment boundaries.
+    """
+
+    def __init__(self, on_event: Callable[[str, Dict[str, Any]], None], word_level: bool = False):
+        self._on_event = on_event
+        self._align = align_words if word_level else align_segments
+        self._segments: List[Dict[str, Any]] = []
+        self._diarization: Optional[List[Dict[str, Any]]] = None
+        self._lock = threading.Lock()
+
+    def add_segment(self, segment: Dict[str, Any]):
+        with self._lock:
+            self._segments.append(segment)
+            self._on_event("segment", public_segment(segment))
+            if self._diarization is not None:
+                self._emit_speakers([segment])
+
+    def set_diarization(self, diarization: List[Dict[str, Any]]):
+        with self._lock:
+            self._diarization = diarization
+            self._emit_speakers(self._segments)
+
+    def _emit_speakers(self, segments: List[Dict[str, Any]]):
+        for segment in self._align(segments, self._diarization):
+            self._on_event("speaker_segment", {
+                "start": segment["start"],
+                "end": segment["end"],
+                "text": segment["text"].strip(),
+                "speaker": segment["speaker"],
+            })
+
+
+def _cache_lookup(key: Optional[str], use_cache: bool) -> Optional[Any]:
+    if key is None or not use_cache or not settings.RESULT_CACHE_ENABLED:
+        return None
+    return result_cache.get(key)
+
+
+def _cache_store(key: Optional[str], value: Any):
+    if key is not None and settings.RESULT_CACHE_ENABLED:
+        result_cache.put(key, value)
+
+
+def transcribe(
+    file_path: str,
+    language: str,
+    model: str,
+    vad_filter: Optional[bool] = None,
+    audio_hash: Optional[str] = None,
+    use_cache: bool = True,
+    on_event: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+    audio: Optional[DecodedAudio] = None,
+    engine: Optional[str] = None,
+    cascade: Optional[bool] = None
+) -> Dict[str, Any]:
+    """
+    Transcribe an upload, reusing a cached result for the same audio and options
+
+    Args:
+        file_path: Path to the audio file
+        language: Language of the audio
+        model: Whisper model size to use
+        vad_filter: Skip silence before Whisper inference
+        audio_hash: SHA-256 of the upload; caching is skipped without it
+        use_cache: Set to False to bypass cache lookups (the result is still stored)
+        on_event: Called with ("segment", segment) for each segment as soon as it is transcribed
+        audio: Audio already decoded from the upload stream; file_path is then only used as a name
+        engine: Transcription engine (defaults to settings.TRANSCRIPTION_ENGINE)
+        cascade: Draft with a small model and re-decode only uncertain segments
+            with model (defaults to settings.CASCADE_ENABLED)
+
+    Returns:
+        Dictionary with the transcript, stage timings, VAD and cascade reports and cache status
+    """
+    if vad_filter is None:
+        vad_filter = settings.VAD_FILTER_ENABLED
+    engine = get_engine(engine).name
+    if cascade is None:
+        cascade = settings.CASCADE_ENABLED
+
+    key = (
+        whisper_cache_key(audio_hash, language, model, False, vad_filter, engine, cascade) if audio_hash else None
+    )
+    result = _cache_lookup(key, use_cache)
+    cached = result is not None
+    timings = {}
+    stream = SegmentStream(on_event) if on_event is not None else None
+
+    if result is None:
+        with audio if audio is not None else load_audio(file_path, audio_hash) as audio:
+            result, transcription_seconds = _run_stage(
+                "transcription",
+                transcribe_audio_segments, file_path, language, model,
+                audio=audio, vad_filter=vad_filter,
+                on_segment=stream.add_segment if stream is not None else None, engine=engine,
+                cascade=cascade
+            )
+            timings = {"decode": audio.decode_seconds, "transcription": transcription_seconds}
+        _cache_store(key, result)
+    else:
+        if audio is not None:
+            audio.close()
+        if stream is not None:
+            for segment in result["segments"]:
+                stream.add_segment(segment)
+
+    return {
+        "transcript": format_transcript(result),
+        "timings": timings,
+        "vad": result.get("vad"),
+        "cascade": result.get("cascade"),
+        "cached": cached,
+    }
+
+
+def transcribe_and_diarize(
+    file_path: str,
+    language: str,
+    model: str,
+    word_level: bool = False,
+    vad_filter: Optional[bool] = None,
+    audio_hash: Optional[str] = None,
+    use_cache: bool = True,
+    on_event: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+    audio: Optional[DecodedAudio] = None,
+    engine: Optional[str] = None,
+    cascade: Optional[bool] = None
+) -> Dict[str, Any]:
+    """
+    Transcribe and diarize the same audio concurrently, then align the results
+
+    Whisper segments and diarization segments are cached separately, so a
+    rerun with another Whisper model reuses the diarization. Only the stages
+    missing from the cache run, and the audio is decoded (or loaded from the
+    feature cache) only if one does. Both stages read the shared decoded
+    buffer. If either stage fails, the other is cancelled (diarization stops
+    at its next pipeline step, transcription before its next 30 s window or
+    chunk) and the first error is raised.
+
+    Args:
+        file_path: Path to the audio file
+        language: Language of the audio
+        model: Whisper model size to use
+        word_level: Attribute speakers per word and split segments at speaker changes
+        vad_filter: Skip silence before Whisper inference
+        audio_hash: SHA-256 of the upload; caching is skipped without it
+        use_cache: Set to False to bypass cache lookups (results are still stored)
+        on_event: Called with ("segment", segment) for each segment as soon as it is
+            transcribed, and with ("speaker_segment", segment) once its speaker is known
+        audio: Audio already decoded from the upload stream; file_path is then only used as a name
+        engine: Transcription engine (defaults to settings.TRANSCRIPTION_ENGINE)
+        cascade: Draft with a small model and re-decode only uncertain segments
+            with model (defaults to settings.CASCADE_ENABLED)
+
+    Returns:
+        Dictionary with the transcript, diarized transcript, speakers, stage timings,
+        VAD and cascade reports and cache status
+    """
+    if vad_filter is None:
+        vad_filter = settings.VAD_FILTER_ENABLED
+    engine = get_engine(engine).name
+    if cascade is None:
+        cascade = settings.CASCADE_ENABLED
+
+    whisper_key = (
+        whisper_cache_key(audio_hash, language, model, word_level, vad_filter, engine, cascade)
+        if audio_hash else None
+    )
+    diarization_key = diarization_cache_key(audio_hash) if audio_hash else None
+    transcript_result = _cache_lookup(whisper_key, use_cache)
+    diarization_result = _cache_lookup(diarization_key, use_cache)
+    cached = {
+        "transcription": transcript_result is not None,
+        "diarization": diarization_result is not None,
+    }
+    timings = {}
+
+    # Cached stages are reported up front, the others as they produce results
+    stream = SegmentStream(on_event, word_level) if on_event is not None else None
+    on_segment = stream.add_segment if stream is not None else None
+    if stream is not None:
+        if diarization_result is not None:
+            stream.set_diarization(diarization_result)
+        if transcript_result is not None:
+            for segment in transcript_result["segments"]:
+                stream.add_segment(segment)
+
+    def diarize_and_publish(*args: Any, **kwargs: Any) -> List[Dict[str, Any]]:
+        diarization = diarize_audio(*args, **kwargs)
+        if stream is not None:
+            stream.set_diarization(diarization)
+        return diarization
+
+    if transcript_result is None or diarization_result is None:
+        cancel_event = threading.Event()
+
+        with audio if audio is not None else load_audio(file_path, audio_hash) as audio:
+            timings["decode"] = audio.decode_seconds
+
+            if transcript_result is not None:
+                diarization_result, timings["diarization"] = _run_stage(
+                    "diarization",
+                    diarize_and_publish, file_path, audio=audio
+                )
+            elif diarization_result is not None:
+                transcript_result, timings["transcription"] = _run_stage(
+                    "transcription",
+                    transcribe_audio_segments, file_path, language, model,
+                    audio=audio, word_timestamps=word_level, vad_filter=vad_filter,
+                    on_segment=on_segment, engine=engine, cascade=cascade
+                )
+            elif settings.PARALLEL_DIARIZATION:
+                with ThreadPoolExecutor(max_workers=2, thread_name_prefix="diarize-stage") as pool:
+                    transcription_future = pool.submit(
+                        _run_stage, "transcription",
+                        transcribe_audio_segments, file_path, language, model,
+                        audio=audio, word_timestamps=word_level, vad_filter=vad_filter,
+                        on_segment=on_segment, engine=engine, cascade=cascade, cancel_event=cancel_event
+                    )
+                    diarization_future = pool.submit(
+                        _run_stage, "diarization",
+                        diarize_and_publish, file_path, audio=audio, cancel_event=cancel_event
+                    )
+
+                    done, _ = wait([transcription_future, diarization_future], return_when=FIRST_EXCEPTION)
+                    failed = [future for future in done if future.exception() is not None]
+                    if failed:
+                        # Stop the other stage at its next checkpoint; leaving the pool waits for it
+                        cancel_event.set()
+                        transcription_future.cancel()
+                        diarization_future.cancel()
+                        raise failed[0].exception()
+
+                    transcript_result, timings["transcription"] = transcription_future.result()
+                    diarization_result, timings["diarization"] = diarization_future.result()
+            else:
+                transcript_result, timings["transcription"] = _run_stage(
+                    "transcription",
+                    transcribe_audio_segments, file_path, language, model,
+                    audio=audio, word_timestamps=word_level, vad_filter=vad_filter,
+                    on_segment=on_segment, engine=engine, cascade=cascade
+                )
+                diarization_result, timings["diarization"] = _run_stage(
+                    "diarization",
+                    diarize_and_publish, file_path, audio=audio
+                )
+
+        if not cached["transcription"]:
+            _cache_store(whisper_key, transcript_result)
+        if not cached["diarization"]:
+            _cache_store(diarization_key, diarization_result)
+    elif audio is not None:
+        audio.close()
+
+    # Assign a speaker to every transcript segment, or to every word
+    start = time.perf_counter()
+    if word_level:
+        combined = align_words(transcript_result["segments"], diarization_result)
+    else:
+        combined = align_segments(transcript_result["segments"], diarization_result)
+    timings["alignment"] = time.perf_counter() - start
+
+    return {
+        "transcript": format_transcript(transcript_result),
+        "diarized_transcript": format_diarized_transcript(combined),
+        "speakers": sorted(set(seg["speaker"] for seg in diarization_result)),
+        "timings": timings,
+        "vad": transcript_result.get("vad"),
+        "cascade": transcript_result.get("cascade"),
+        "cached": cached,
+    }
@@ -1,103 +1,395 @@
 import os
+import time
 import logging
 import tempfile
+from functools import partial
 from pathlib import Path
-import whisper
-import numpy as np
+import threading
+from typing import Any, Callable, Dict, Optional
 from app.core.config import settings
+from app.services.audio import DecodedAudio, decode_audio
+from app.services.features import precomputed_mel
+from app.services.batching import enable_batching
+from app.services.thread_budget import thread_budget, install_checkpoints, StageCancelled
+from app.services.vad import detect_speech, compact_speech, remap_result
+from app.services.chunking import transcribe_long_audio, transcribe_incrementally
+from app.services.model_registry import ModelRegistry
+from app.services.scheduler import MODEL_MEMORY_GB
+from app.services.engines import get_engine
+from app.services.quantization import quantized_key, split_key, is_quantized, load_quantized_whisper, quantization_report
+from app.services.cascade import transcribe_cascade, uses_cascade
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
-# Cache for loaded models to avoid reloading
-_model_cache = {}
+def _load_whisper_model(key: str):
+    """Import Whisper on first use so the API starts without loading torch"""
+    model_name, quantized = split_key(key)
+    if quantized:
+        model = load_quantized_whisper(model_name)
+    else:
+        import whisper
+        model = whisper.load_model(model_name)
+    # Follow the thread budget as concurrent jobs start and finish
+    install_checkpoints(model)
+    if settings.BATCHING_ENABLED:
+        # Concurrent requests on this model share encoder passes
+        enable_batching(model, key)
+    return model
 
-def get_whisper_model(model_name: str = "base"):
+# Bounded cache for loaded models to avoid reloading
+_model_cache = ModelRegistry(
+    "Whisper",
+    loader=_load_whisper_model,
+    budget_bytes=int(settings.MODEL_CACHE_BUDGET_GB * 1024 ** 3),
+    size_estimator=lambda key: int(MODEL_MEMORY_GB.get(split_key(key)[0], MODEL_MEMORY_GB["large"]) * 1024 ** 3)
+)
+
+def whisper_model_key(model_name: str, quantize: Optional[bool] = None) -> str:
+    """
+    Model cache key of a Whisper model variant
+    
+    Args:
+        model_name: Name of the Whisper model
+        quantize: Int8 variant (defaults to whether the size is listed in
+            settings.WHISPER_QUANTIZE_MODELS)
+        
+    Returns:
+        The model name, with a suffix for the quantized variant
+    """
+    if quantize is None:
+        quantize = is_quantized(model_name)
+    return quantized_key(model_name) if quantize else model_name
+
+def get_whisper_model(model_name: str = "base", quantize: Optional[bool] = None):
     """
     Load and cache a Whisper model
     
     Args:
         model_name: Name of the Whisper model to load
+        quantize: Apply dynamic int8 quantization to the linear layers
+            (defaults to settings.WHISPER_QUANTIZE_MODELS); the quantized model is
+            stored on disk so later startups skip the conversion
         
     Returns:
         Loaded whisper model
     """
-    global _model_cache
+    return _model_cache.get(whisper_model_key(model_name, quantize))
+
+def pin_whisper_model(model_name: str, quantize: Optional[bool] = None):
+    """
+    Load a Whisper model and keep it resident until unpin_whisper_model is called
     
-    if model_name not in _model_cache:
-        logger.info(f"Loading Whisper model: {model_name}")
-        _model_cache[model_name] = whisper.load_model(model_name)
+    Args:
+        model_name: Name of the Whisper model to pin
+        quantize: Pin the int8 variant (defaults to settings.WHISPER_QUANTIZE_MODELS)
+        
+    Returns:
+        Loaded whisper model
+    """
+    return _model_cache.pin(whisper_model_key(model_name, quantize))
+
+def unpin_whisper_model(model_name: str, quantize: Optional[bool] = None):
+    """Allow a pinned Whisper model to be evicted again"""
+    _model_cache.unpin(whisper_model_key(model_name, quantize))
+
+def get_model_cache_stats():
+    """
+    Report hits, misses, load times and evictions of the Whisper model cache
     
-    return _model_cache[model_name]
+    Also compares the measured size and real-time factor of the float32 and
+    int8 variants of each model that has run in both forms.
+    
+    Returns:
+        Dictionary of cache statistics
+    """
+    stats = _model_cache.stats()
+    stats["quantization"] = quantization_report(stats)
+    return stats
 
-def transcribe_audio(file_path: str, language: str = "English", model: str = "base") -> str:
+def get_whisper_language(language: str) -> Optional[str]:
     """
-    Transcribe audio using OpenAI's Whisper model
+    Map a language name to a Whisper language code
+    
+    Args:
+        language: Language of the audio (or "Detect Automatically")
+        
+    Returns:
+        Whisper language code, or None to detect the language automatically
+    """
+    if language.lower() == "detect automatically":
+        return None
+    
+    # Convert common language names to Whisper language codes
+    language_map = {
+        "english": "en",
+        "spanish": "es",
+        "french": "fr",
+        "german": "de",
+        "italian": "it",
+        "portuguese": "pt",
+        "chinese": "zh",
+        "japanese": "ja",
+        # Add more mappings as needed
+    }
+    return language_map.get(language.lower(), language.lower())
+
+def run_whisper(
+    file_path: str,
+    model: str,
+    options: Dict[str, Any],
+    audio: Optional[DecodedAudio] = None,
+    on_segment: Optional[Callable[[Dict[str, Any]], None]] = None,
+    record_latency: bool = True
+) -> Dict[str, Any]:
+    """
+    Run Whisper with prepared options on a file or a decoded buffer
+    
+    Args:
+        file_path: Path to the audio file
+        model: Whisper model size to use
+        options: Whisper transcribe options
+        audio: Already decoded audio; when given, the file is not decoded again
+        on_segment: Called with each segment as soon as it is transcribed
+        record_latency: Count the run in the model's real-time factor
+    
+    Returns:
+        Whisper result with "text", "segments" and "language"
+    """
+    # Long recordings are split at silences and transcribed in parallel
+    if (
+        audio is not None
+        and settings.LONG_AUDIO_ENABLED
+        and audio.duration >= settings.LONG_AUDIO_MIN_SECONDS
+    ):
+        return transcribe_long_audio(audio, model, options, on_segment=on_segment)
+    
+    # Whisper only returns once the whole file is done, so stream by transcribing short chunks in turn
+    if on_segment is not None and audio is not None and audio.duration > settings.STREAM_CHUNK_SECONDS:
+        return transcribe_incrementally(audio, model, options, on_segment)
+    
+    # Load the model (using cache)
+    whisper_model = get_whisper_model(model)
+    
+    # Transcribe the audio, reusing the decoded buffer if we have one
+    if audio is None:
+        source = file_path
+    elif audio.audio_hash is not None and settings.FEATURE_CACHE_ENABLED:
+        # Log-mel frames are shared by every model size, so a rerun skips feature extraction
+        source = precomputed_mel(audio, whisper_model.dims.n_mels)
+    else:
+        source = audio.samples
+    start = time.perf_counter()
+    result = whisper_model.transcribe(source, **options)
+    if audio is not None and record_latency:
+        # Latency per model variant, to compare float32 with int8
+        _model_cache.record_inference(whisper_model_key(model), time.perf_counter() - start, audio.duration)
+    
+    if on_segment is not None:
+        for segment in result["segments"]:
+            on_segment(segment)
+    return result
+
+def _inference(engine: str, model: str, cascade: bool) -> Callable[..., Dict[str, Any]]:
+    """The function running inference: the engine itself, or a cascade from the draft model"""
+    if uses_cascade(model, cascade):
+        return partial(transcribe_cascade, engine=engine)
+    return get_engine(engine).transcribe
+
+def transcribe_speech_only(
+    file_path: str,
+    model: str,
+    options: Dict[str, Any],
+    audio: Optional[DecodedAudio] = None,
+    on_segment: Optional[Callable[[Dict[str, Any]], None]] = None,
+    engine: str = "whisper",
+    cascade: bool = False
+) -> Dict[str, Any]:
+    """
+    Run Whisper only on the speech regions found by voice activity detection
+    
+    Silent stretches are cut out before inference and the timestamps are
+    mapped back to the original recording afterwards.
+    
+    Args:
+        file_path: Path to the audio file
+        model: Whisper model size to use
+        options: Whisper transcribe options
+        audio: Already decoded audio; decoded here if not given
+        on_segment: Called with each segment, on the original timeline, as soon as it is transcribed
+        engine: Transcription engine to run the speech through
+        cascade: Draft the speech with the small model and escalate uncertain segments
+    
+    Returns:
+        Whisper result, with a "vad" entry reporting the skipped audio
+    """
+    owns_audio = audio is None
+    if owns_audio:
+        audio = decode_audio(file_path)
+    
+    try:
+        duration = audio.duration
+        speech = detect_speech(audio.samples, audio.sample_rate)
+        compacted, timeline = compact_speech(audio.samples, audio.sample_rate, speech)
+    finally:
+        if owns_audio:
+            audio.close()
+    
+    speech_seconds = float(timeline.lengths.sum())
+    skipped_seconds = max(0.0, duration - speech_seconds)
+    
+    if len(compacted):
+        remapped_segment = None
+        if on_segment is not None:
+            def remapped_segment(segment):
+                on_segment(remap_result({"segments": [segment]}, timeline)["segments"][0])
+        
+        start = time.perf_counter()
+        result = _inference(engine, model, cascade)(
+            file_path, model, options, DecodedAudio(compacted, 0.0), on_segment=remapped_segment
+        )
+        elapsed = time.perf_counter() - start
+        result = remap_result(result, timeline)
+        # Estimate the skipped audio would have cost the same per second as what we ran
+        time_saved = elapsed / (len(compacted) / audio.sample_rate) * skipped_seconds
+    else:
+        result = {"text": "", "segments": [], "language": options.get("language")}
+        time_saved = 0.0
+    
+    result["vad"] = {
+        "speech_seconds": speech_seconds,
+        "skipped_seconds": skipped_seconds,
+        "skipped_fraction": skipped_seconds / duration if duration else 0.0,
+        "time_saved_seconds": time_saved,
+    }
+    logger.info(
+        f"VAD skipped {skipped_seconds:.1f}s of {duration:.1f}s "
+        f"({result['vad']['skipped_fraction']:.0%}), saving about {time_saved:.1f}s"
+    )
+    return result
+
+def transcribe_audio_segments(
+    file_path: str,
+    language: str = "English",
+    model: str = "base",
+    audio: Optional[DecodedAudio] = None,
+    word_timestamps: bool = False,
+    vad_filter: Optional[bool] = None,
+    on_segment: Optional[Callable[[Dict[str, Any]], None]] = None,
+    engine: Optional[str] = None,
+    cascade: Optional[bool] = None,
+    cancel_event: Optional[threading.Event] = None
+) -> Dict[str, Any]:
+    """
+    Run Whisper on an audio file and return its raw result
     
     Args:
         file_path: Path to the audio file
         language: Language of the audio (or "Detect Automatically")
         model: Whisper model size to use
+        audio: Already decoded audio; when given, the file is not decoded again
+        word_timestamps: Also return per-word timings in each segment's "words"
+        vad_filter: Skip silence before inference (defaults to settings.VAD_FILTER_ENABLED)
+        on_segment: Called with each segment as soon as it is transcribed
+        engine: Transcription engine (defaults to settings.TRANSCRIPTION_ENGINE)
+        cascade: Detect the language and draft with CASCADE_DRAFT_MODEL, re-decoding
+            only low-confidence segments with model (defaults to settings.CASCADE_ENABLED)
+        cancel_event: When set, the run is aborted before the next 30 s window or chunk
     
     Returns:
-        Transcribed text
+        Whisper result with "text", "segments" and "language", plus a "cascade"
+        report of the escalated audio when cascading
     """
-    logger.info(f"Transcribing {Path(file_path).name} with {model} model in {language}")
+    engine = get_engine(engine).name
+    model = model.lower()
+    if cascade is None:
+        cascade = settings.CASCADE_ENABLED
+    logger.info(f"Transcribing {Path(file_path).name} with {model} model on {engine} in {language}")
     
     # Map language input to Whisper format
-    whisper_language = None
-    if language.lower() != "detect automatically":
-        # Convert common language names to Whisper language codes
-        language_map = {
-            "english": "en",
-            "spanish": "es",
-            "french": "fr",
-            "german": "de",
-            "italian": "it",
-            "portuguese": "pt",
-            "chinese": "zh",
-            "japanese": "ja",
-            # Add more mappings as needed
-        }
-        whisper_language = language_map.get(language.lower(), language.lower())
+    whisper_language = get_whisper_language(language)
+    
+    if vad_filter is None:
+        vad_filter = settings.VAD_FILTER_ENABLED
     
     try:
-        # Load the model (using cache)
-        whisper_model = get_whisper_model(model)
-        
         # Set transcription options
         options = {
             "verbose": False,
             "fp16": False,  # Set to True if using GPU
+            "word_timestamps": word_timestamps,
         }
         
         # Set language if specified
         if whisper_language:
             options["language"] = whisper_language
         
-        # Transcribe the audio
-        result = whisper_model.transcribe(file_path, **options)
-        
-        # Format the output
-        transcript_text = result["text"].strip()
-        
-        # Add timestamps if available
-        if "segments" in result:
-            timestamp_transcript = "\n\n=== Detailed Transcript with Timestamps ===\n\n"
-            for segment in result["segments"]:
-                start_time = format_timestamp(segment["start"])
-                end_time = format_timestamp(segment["end"])
-                text = segment["text"].strip()
-                timestamp_transcript += f"[{start_time} --> {end_time}] {text}\n"
-            
-            transcript_text += timestamp_transcript
-        
-        return transcript_text
+        with thread_budget.cancellable(cancel_event):
+            if vad_filter:
+                return transcribe_speech_only(
+                    file_path, model, options, audio, on_segment=on_segment, engine=engine, cascade=cascade
+                )
+            return _inference(engine, model, cascade)(file_path, model, options, audio, on_segment=on_segment)
         
+    except StageCancelled:
+        logger.info(f"Transcription of {Path(file_path).name} cancelled")
+        raise
     except Exception as e:
         logger.error(f"Error transcribing audio: {str(e)}")
         raise RuntimeError(f"Transcription failed: {str(e)}")
 
+def format_transcript(result: Dict[str, Any]) -> str:
+    """
+    Format a Whisper result as plain text followed by a timestamped transcript
+    
+    Args:
+        result: Whisper result with "text" and optionally "segments"
+        
+    Returns:
+        Formatted transcript text
+    """
+    transcript_text = result["text"].strip()
+    
+    # Add timestamps if available
+    if "segments" in result:
+        timestamp_transcript = "\n\n=== Detailed Transcript with Timestamps ===\n\n"
+        for segment in result["segments"]:
+            start_time = format_timestamp(segment["start"])
+            end_time = format_timestamp(segment["end"])
+            text = segment["text"].strip()
+            timestamp_transcript += f"[{start_time} --> {end_time}] {text}\n"
+        
+        transcript_text += timestamp_transcript
+    
+    return transcript_text
+
+def transcribe_audio(
+    file_path: str,
+    language: str = "English",
+    model: str = "base",
+    audio: Optional[DecodedAudio] = None,
+    engine: Optional[str] = None,
+    cascade: Optional[bool] = None
+) -> str:
+    """
+    Transcribe audio using OpenAI's Whisper model
+    
+    Args:
+        file_path: Path to the audio file
+        language: Language of the audio (or "Detect Automatically")
+        model: Whisper model size to use
+        audio: Already decoded audio; when given, the file is not decoded again
+        engine: Transcription engine: whisper, faster-whisper or mock
+            (defaults to settings.TRANSCRIPTION_ENGINE)
+        cascade: Detect the language and draft with a small model, re-decoding only
+            low-confidence segments with model (defaults to settings.CASCADE_ENABLED)
+    
+    Returns:
+        Transcribed text
+    """
+    result = transcribe_audio_segments(file_path, language, model, audio=audio, engine=engine, cascade=cascade)
+    return format_transcript(result)
+
 def format_timestamp(seconds: float) -> str:
     """
     Format seconds into HH:MM:SS.mmm
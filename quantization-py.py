@@ -0,0 +1,138 @@
+import os
+import re
+import time
+import logging
+import threading
+from typing import Any, Dict, Tuple
+
+from app.core.config import settings
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Suffix of the model cache key of a quantized Whisper model ("base" -> "base-int8")
+QUANTIZED_SUFFIX = "-int8"
+
+
+def quantized_key(model_name: str) -> str:
+    """Model cache key of the int8 variant of a Whisper model"""
+    return f"{model_name}{QUANTIZED_SUFFIX}"
+
+
+def is_quantized(model_name: str) -> bool:
+    """Whether a Whisper model size is served as its int8 variant (WHISPER_QUANTIZE_MODELS)"""
+    return model_name.lower() in {name.lower() for name in settings.WHISPER_QUANTIZE_MODELS}
+
+
+def split_key(key: str) -> Tuple[str, bool]:
+    """(Whisper model name, whether it is quantized) for a model cache key"""
+    if key.endswith(QUANTIZED_SUFFIX):
+        return key[:-len(QUANTIZED_SUFFIX)], True
+    return key, False
+
+
+def quantize_whisper(model: Any) -> Any:
+    """
+    Apply dynamic int8 quantization to the linear layers of a Whisper model
+
+    Linear weights are stored as int8 and activations are quantized on the
+    fly, which cuts their memory by four and speeds up CPU inference.
+    Convolutions, embeddings and layer norms stay in float32.
+
+    Args:
+        model: Float32 Whisper model on the CPU
+
+    Returns:
+        The quantized model
+    """
+    import torch
+
+    # Whisper subclasses nn.Linear only to cast weights to the input dtype,
+    # which is a no-op in float32; quantize_dynamic only converts exact nn.Linear
+    for module in model.modules():
+        if isinstance(module, torch.nn.Linear) and type(module) is not torch.nn.Linear:
+            module.__class__ = torch.nn.Linear
+
+    return torch.quantization.quantize_dynamic(model.cpu().float(), {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def _cache_path(model_name: str) -> str:
+    """Where the quantized model is stored; versioned so an upgrade re-quantizes"""
+    import torch
+    import whisper
+
+    versions = re.sub(r"[^\w.]", "_", f"whisper{whisper.__version__}-torch{torch.__version__}")
+    return os.path.join(settings.WHISPER_QUANTIZED_DIR, f"{model_name}{QUANTIZED_SUFFIX}-{versions}.pt")
+
+
+def load_quantized_whisper(model_name: str) -> Any:
+    """
+    Load the int8 Whisper model from disk, quantizing and storing it on first use
+
+    The whole quantized module is saved, so a later startup reads the
+    smaller int8 file and skips both loading the float32 checkpoint and the
+    conversion.
+
+    Args:
+        model_name: Whisper model size
+
+    Returns:
+        The quantized model
+    """
+    import torch
+    import whisper
+
+    path = _cache_path(model_name)
+    if os.path.exists(path):
+        try:
+            start = time.perf_counter()
+            # A pickled module from our own cache directory, not a weights file from elsewhere
+            model = torch.load(path, map_location="cpu", weights_only=False)
+            logger.info(f"Loaded quantized {model_name} model from {path} in {time.perf_counter() - start:.2f}s")
+            return model
+        except Exception as e:
+            logger.warning(f"Could not load quantized {model_name} model from {path}, quantizing again: {e}")
+
+    start = time.perf_counter()
+    model = quantize_whisper(whisper.load_model(model_name, device="cpu"))
+    logger.info(f"Quantized {model_name} model to int8 in {time.perf_counter() - start:.2f}s")
+
+    # Write then rename so a crash never leaves a partial file behind
+    os.makedirs(settings.WHISPER_QUANTIZED_DIR, exist_ok=True)
+    temp_path = f"{path}.{threading.get_ident()}.tmp"
+    try:
+        torch.save(model, temp_path)
+        os.replace(temp_path, path)
+    except Exception as e:
+        logger.warning(f"Could not store quantized {model_name} model: {e}")
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    return model
+
+
+def quantization_report(stats: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """
+    Compare the float32 and int8 variants of each Whisper model measured so far
+
+    Args:
+        stats: Whisper model cache statistics
+
+    Returns:
+        Per model size: measured bytes and real-time factor of each variant,
+        and the int8/float32 ratios once both have been measured
+    """
+    report: Dict[str, Dict[str, Any]] = {}
+    for key in set(stats["model_bytes"]) | set(stats["inference"]):
+        model_name, quantized = split_key(key)
+        variant = "int8" if quantized else "float32"
+        entry = report.setdefault(model_name, {})
+        entry[f"{variant}_bytes"] = stats["model_bytes"].get(key)
+        entry[f"{variant}_rtf"] = stats["inference"].get(key, {}).get("rtf")
+
+    for entry in report.values():
+        for measure in ("bytes", "rtf"):
+            float_value = entry.get(f"float32_{measure}")
+            int8_value = entry.get(f"int8_{measure}")
+            if float_value and int8_value:
+                entry[f"{measure}_ratio"] = round(int8_value / float_value, 3)
+    return report
@@ -0,0 +1,187 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from typing import Any, BinaryIO, Callable, Dict, Optional, Tuple
+
+from app.core.config import settings
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Bump when a change to the pipeline makes cached results stale
+PIPELINE_VERSION = "1"
+
+
+def _json_default(value: Any) -> Any:
+    """Serialize numpy scalars and arrays that end up in Whisper results"""
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def make_key(namespace: str, *parts: Any) -> str:
+    """
+    Build a cache key from a namespace and the values that determine the result
+
+    Args:
+        namespace: Kind of entry, e.g. "whisper" or "diarization"
+        *parts: Audio hash and normalized options
+
+    Returns:
+        Cache key usable as a file name
+    """
+    digest = hashlib.sha256(json.dumps([PIPELINE_VERSION, *parts]).encode("utf-8")).hexdigest()
+    return f"{namespace}-{digest}"
+
+
+class DiskCache:
+    """
+    Directory of cache files bounded by total size and age
+
+    An in-memory index tracks the size and last access of every file. The
+    cache stays under max_bytes by evicting the least recently used files
+    and drops files older than the TTL. Hits and misses are counted per
+    namespace, the part of the key before the first "-".
+    """
+
+    # File extension of the entries
+    suffix = ""
+
+    def __init__(self, directory: str, max_bytes: int, ttl_seconds: float):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        # key -> (size in bytes, last access time, creation time)
+        self._index: Dict[str, Tuple[int, float, float]] = {}
+        self._hits: Dict[str, int] = {}
+        self._misses: Dict[str, int] = {}
+        self._evictions = 0
+        self._load_index()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._index),
+                "size_bytes": sum(entry[0] for entry in self._index.values()),
+                "max_bytes": self.max_bytes,
+                "hits": dict(self._hits),
+                "misses": dict(self._misses),
+                "evictions": self._evictions,
+            }
+
+    def contains(self, key: str) -> bool:
+        """Whether key is cached and fresh, without counting a hit or miss"""
+        with self._lock:
+            entry = self._index.get(key)
+            return entry is not None and time.time() - entry[2] <= self.ttl_seconds
+
+    def _lookup(self, key: str) -> Optional[str]:
+        """Path of the entry for key if it is cached, counting the hit or miss"""
+        namespace = key.split("-", 1)[0]
+        with self._lock:
+            entry = self._index.get(key)
+            if entry is not None and time.time() - entry[2] > self.ttl_seconds:
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self._misses[namespace] = self._misses.get(namespace, 0) + 1
+                return None
+            self._index[key] = (entry[0], time.time(), entry[2])
+            self._hits[namespace] = self._hits.get(namespace, 0) + 1
+        return self._path(key)
+
+    def _store(self, key: str, write: Callable[[BinaryIO], None]):
+        """Write an entry with write(file), evicting old entries to stay within the size budget"""
+        path = self._path(key)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+
+        # Write then rename so readers never see a partial entry
+        try:
+            with open(temp_path, "wb") as f:
+                write(f)
+            os.replace(temp_path, path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+        created_at = time.time()
+        with self._lock:
+            self._index[key] = (os.path.getsize(path), created_at, created_at)
+            self._evict()
+
+    def _discard(self, key: str, reason: Exception):
+        logger.warning(f"Dropping unreadable cache entry {key}: {reason}")
+        with self._lock:
+            self._remove(key)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}{self.suffix}")
+
+    def _load_index(self):
+        """Rebuild the index from the entries already on disk"""
+        for name in os.listdir(self.directory):
+            if not name.endswith(self.suffix) or name.endswith(".tmp"):
+                continue
+            stat = os.stat(os.path.join(self.directory, name))
+            self._index[name[:len(name) - len(self.suffix)]] = (stat.st_size, stat.st_atime, stat.st_mtime)
+        with self._lock:
+            self._evict()
+
+    def _evict(self):
+        """Drop expired entries, then least recently used ones (lock held)"""
+        now = time.time()
+        for key in [key for key, entry in self._index.items() if now - entry[2] > self.ttl_seconds]:
+            self._remove(key)
+            self._evictions += 1
+
+        total = sum(entry[0] for entry in self._index.values())
+        for key in sorted(self._index, key=lambda k: self._index[k][1]):
+            if total <= self.max_bytes:
+                break
+            total -= self._index[key][0]
+            self._remove(key)
+            self._evictions += 1
+
+    def _remove(self, key: str):
+        self._index.pop(key, None)
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+
+class ResultCache(DiskCache):
+    """On-disk cache of pipeline results keyed by content hash, one JSON file per entry"""
+
+    suffix = ".json"
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for key, or None"""
+        path = self._lookup(key)
+        if path is None:
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)["value"]
+        except (OSError, ValueError, KeyError) as e:
+            self._discard(key, e)
+            return None
+
+    def put(self, key: str, value: Any):
+        """Store a value, evicting old entries to stay within the size budget"""
+        data = json.dumps({"created_at": time.time(), "value": value}, default=_json_default)
+        self._store(key, lambda f: f.write(data.encode("utf-8")))
+
+
+result_cache = ResultCache(
+    settings.RESULT_CACHE_DIR,
+    max_bytes=int(settings.RESULT_CACHE_MAX_MB * 1024 ** 2),
+    ttl_seconds=settings.RESULT_CACHE_TTL_SECONDS
+)
@@ -0,0 +1,251 @@
+import os
+import math
+import time
+import wave
+import logging
+import threading
+import subprocess
+from collections import deque
+from typing import Callable, Deque, Dict, Any, Optional, Tuple
+
+from app.core.config import settings
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Approximate processing seconds per second of audio on CPU, per model size
+MODEL_COMPUTE_FACTORS = {
+    "tiny": 0.1,
+    "base": 0.2,
+    "small": 0.6,
+    "medium": 1.5,
+    "large": 3.0,
+}
+
+# Approximate resident memory of each model, in GB
+MODEL_MEMORY_GB = {
+    "tiny": 1.0,
+    "base": 1.0,
+    "small": 2.0,
+    "medium": 5.0,
+    "large": 10.0,
+}
+
+# Decoded audio is 16 kHz mono float32
+PCM_BYTES_PER_SECOND = 16000 * 4
+
+# Rough compressed bitrate used when the duration cannot be probed (128 kbps)
+FALLBACK_BYTES_PER_SECOND = 16000
+
+
+class QueueFullError(Exception):
+    """Raised when the scheduler queue cannot accept more work"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Server is busy, retry after {retry_after} seconds")
+        self.retry_after = retry_after
+
+
+def probe_duration(file_path: str) -> Optional[float]:
+    """
+    Read the audio duration from the container header without decoding
+
+    Args:
+        file_path: Path to the audio file
+
+    Returns:
+        Duration in seconds, or None if it could not be determined
+    """
+    try:
+        result = subprocess.run(
+            [
+                "ffprobe", "-v", "error",
+                "-show_entries", "format=duration",
+                "-of", "default=noprint_wrappers=1:nokey=1",
+                file_path
+            ],
+            capture_output=True,
+            text=True,
+            timeout=10
+        )
+        if result.returncode == 0 and result.stdout.strip():
+            return float(result.stdout.strip())
+    except (OSError, ValueError, subprocess.TimeoutExpired) as e:
+        logger.debug(f"ffprobe failed for {file_path}: {e}")
+
+    # Plain WAV files can be probed from the header alone
+    try:
+        with wave.open(file_path, "rb") as wav_file:
+            return wav_file.getnframes() / float(wav_file.getframerate())
+    except (wave.Error, EOFError, OSError):
+        return None
+
+
+class WorkCost:
+    """Estimated cost of processing one audio file with one model"""
+
+    def __init__(self, duration: float, model: str):
+        self.duration = duration
+        self.model = model
+        # Estimated processing time in seconds
+        self.compute = duration * MODEL_COMPUTE_FACTORS.get(model, MODEL_COMPUTE_FACTORS["large"])
+        # Memory needed for the decoded audio, on top of the model weights
+        self.buffer_gb = duration * PCM_BYTES_PER_SECOND / 1024 ** 3
+        self.fast_lane = duration <= settings.SCHEDULER_FAST_LANE_SECONDS
+
+    @classmethod
+    def for_file(cls, file_path: str, model: str) -> "WorkCost":
+        """Estimate the cost of a saved upload from its probed duration"""
+        duration = probe_duration(file_path)
+        if duration is None:
+            duration = os.path.getsize(file_path) / FALLBACK_BYTES_PER_SECOND
+            logger.info(f"Could not probe duration, estimating {duration:.1f}s from file size")
+        return cls(duration, model)
+
+
+class AdmissionScheduler:
+    """
+    Admission control in front of the job pool
+
+    Work is held in two FIFO lanes and only started while the in-flight
+    work fits the CPU and memory budget. Short clips go to a fast lane that
+    has CPU slots reserved for it, so they never wait behind long recordings.
+    """
+
+    def __init__(
+        self,
+        cpu_slots: int,
+        memory_budget_gb: float,
+        max_queue: int,
+        fast_lane_reserve: int = 1
+    ):
+        self.cpu_slots = cpu_slots
+        self.memory_budget_gb = memory_budget_gb
+        self.max_queue = max_queue
+        self.fast_lane_reserve = min(fast_lane_reserve, max(cpu_slots - 1, 0))
+
+        self._fast_queue: Deque[Tuple[WorkCost, Callable[[], None]]] = deque()
+        self._slow_queue: Deque[Tuple[WorkCost, Callable[[], None]]] = deque()
+        self._running: Dict[int, WorkCost] = {}
+        self._started_at: Dict[int, float] = {}
+        self._lock = threading.Lock()
+        self._rejected = 0
+
+    def check_capacity(self):
+        """Reject early, before an upload is read, if the queue is already full"""
+        with self._lock:
+            if self._queued_count() >= self.max_queue:
+                self._rejected += 1
+                raise QueueFullError(self._retry_after())
+
+    def submit(self, cost: WorkCost, start: Callable[[], None]):
+        """
+        Queue work and start it as soon as the budget allows
+
+        Args:
+            cost: Estimated cost of the work
+            start: Callback that hands the work to the worker pool
+
+        Raises:
+            QueueFullError: If the queue is full
+        """
+        with self._lock:
+            if self._queued_count() >= self.max_queue:
+                self._rejected += 1
+                raise QueueFullError(self._retry_after())
+
+            lane = self._fast_queue if cost.fast_lane else self._slow_queue
+            lane.append((cost, start))
+            logger.info(
+                f"Admitted {cost.duration:.1f}s of audio for {cost.model} "
+                f"({'fast' if cost.fast_lane else 'slow'} lane)"
+            )
+            ready = self._dispatch()
+
+        for start_callback in ready:
+            start_callback()
+
+    def release(self, cost: WorkCost):
+        """Return the budget held by finished work and start queued work"""
+        with self._lock:
+            self._running.pop(id(cost), None)
+            self._started_at.pop(id(cost), None)
+            ready = self._dispatch()
+
+        for start_callback in ready:
+            start_callback()
+
+    def stats(self) -> Dict[str, Any]:
+        """Current queue and budget usage"""
+        with self._lock:
+            return {
+                "running": len(self._running),
+                "queued_fast": len(self._fast_queue),
+                "queued_slow": len(self._slow_queue),
+                "cpu_slots": self.cpu_slots,
+                "memory_in_use_gb": round(self._memory_in_use(), 2),
+                "memory_budget_gb": self.memory_budget_gb,
+                "queued_compute_seconds": round(self._queued_compute(), 1),
+                "rejected": self._rejected,
+            }
+
+    def _dispatch(self):
+        """Move queued work into the running set while it fits (lock held)"""
+        ready = []
+        while True:
+            if self._fast_queue and self._fits(self._fast_queue[0][0], self.cpu_slots):
+                cost, start = self._fast_queue.popleft()
+            elif self._slow_queue and self._fits(
+                self._slow_queue[0][0], self.cpu_slots - self.fast_lane_reserve
+            ):
+                cost, start = self._slow_queue.popleft()
+            else:
+                break
+            self._running[id(cost)] = cost
+            self._started_at[id(cost)] = time.monotonic()
+            ready.append(start)
+        return ready
+
+    def _fits(self, cost: WorkCost, slots: int) -> bool:
+        # Always let work through on an idle server, however large it is
+        if not self._running:
+            return True
+        if len(self._running) >= slots:
+            return False
+        return self._memory_in_use(extra=cost) <= self.memory_budget_gb
+
+    def _memory_in_use(self, extra: Optional[WorkCost] = None) -> float:
+        costs = list(self._running.values())
+        if extra is not None:
+            costs.append(extra)
+        # Each model is resident once, however many jobs share it
+        models = set(cost.model for cost in costs)
+        model_gb = sum(MODEL_MEMORY_GB.get(model, MODEL_MEMORY_GB["large"]) for model in models)
+        return model_gb + sum(cost.buffer_gb for cost in costs)
+
+    def _queued_count(self) -> int:
+        return len(self._fast_queue) + len(self._slow_queue)
+
+    def _queued_compute(self) -> float:
+        queued = list(self._fast_queue) + list(self._slow_queue)
+        running = sum(cost.compute for cost in self._running.values())
+        return running + sum(cost.compute for cost, _ in queued)
+
+    def _retry_after(self) -> int:
+        # A queue slot frees up when the next running job is expected to finish
+        now = time.monotonic()
+        remaining = [
+            self._started_at[key] + cost.compute - now
+            for key, cost in self._running.items()
+        ]
+        if not remaining:
+            return 1
+        return max(1, math.ceil(min(remaining)))
+
+
+scheduler = AdmissionScheduler(
+    cpu_slots=settings.JOB_WORKERS,
+    memory_budget_gb=settings.SCHEDULER_MEMORY_BUDGET_GB,
+    max_queue=settings.SCHEDULER_MAX_QUEUE,
+    fast_lane_reserve=settings.SCHEDULER_FAST_LANE_RESERVE
+)
@@ -0,0 +1,171 @@
+import time
+import logging
+import threading
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+from app.core.config import settings
+from app.services.audio import DecodedAudio
+from app.services.transcription import get_whisper_model
+from app.services.diarization import get_diarization_pipeline
+from app.services.engines import TranscriptionEngine, get_engine
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Whisper and pyannote both work on 16 kHz audio
+SAMPLE_RATE = 16000
+
+# Readiness state, updated by the preload thread
+_state: Dict[str, Any] = {
+    "ready": False,
+    "stage": "pending",
+    "loaded": [],
+    "failed": [],
+    "errors": [],
+    "started_at": None,
+    "finished_at": None,
+}
+_state_lock = threading.Lock()
+
+
+def synthetic_audio(seconds: float = 5.0) -> "np.ndarray":
+    """Quiet noise used to exercise the models once before serving traffic"""
+    import numpy as np
+
+    rng = np.random.default_rng(0)
+    return (rng.standard_normal(int(seconds * SAMPLE_RATE)) * 0.01).astype(np.float32)
+
+
+def warm_up_whisper(model_name: str):
+    """
+    Load a Whisper model and run one inference on synthetic audio
+
+    Args:
+        model_name: Name of the Whisper model to warm up
+    """
+    model = get_whisper_model(model_name)
+    model.transcribe(synthetic_audio(), language="en", fp16=False, verbose=None)
+
+
+def warm_up_engine(engine: TranscriptionEngine, model_name: str):
+    """
+    Load a model of any engine and run one inference on synthetic audio
+
+    Args:
+        engine: Engine the model runs on
+        model_name: Name of the model to warm up
+    """
+    if engine.name == "whisper":
+        warm_up_whisper(model_name)
+        return
+    engine.transcribe(
+        "warm-up", model_name, {"language": "en"}, DecodedAudio(synthetic_audio(), 0.0), record_latency=False
+    )
+
+
+def warm_up_diarization():
+    """Load the diarization pipeline and run it once on synthetic audio"""
+    import torch
+
+    pipeline = get_diarization_pipeline()
+    waveform = torch.from_numpy(synthetic_audio()).unsqueeze(0)
+    pipeline({"waveform": waveform, "sample_rate": SAMPLE_RATE})
+
+
+def _set_state(**kwargs):
+    with _state_lock:
+        _state.update(kwargs)
+
+
+def _preload(models: List[str], diarization: bool, warm_up: bool):
+    _set_state(stage="loading", started_at=time.time())
+
+    engine = get_engine()
+    steps = [(f"{engine.name}:{name}", name) for name in models]
+    if diarization:
+        steps.append(("diarization", None))
+
+    for label, model_name in steps:
+        start = time.perf_counter()
+        try:
+            if model_name is None and warm_up:
+                warm_up_diarization()
+            elif model_name is None:
+                get_diarization_pipeline()
+            elif warm_up:
+                warm_up_engine(engine, model_name)
+            else:
+                engine.load(model_name)
+        except Exception as e:
+            logger.error(f"Preloading {label} failed: {str(e)}")
+            with _state_lock:
+                _state["failed"].append(label)
+                _state["errors"].append(f"{label}: {str(e)}")
+            continue
+
+        logger.info(f"Preloaded {label} in {time.perf_counter() - start:.2f}s")
+        with _state_lock:
+            _state["loaded"].append(label)
+
+    # A model that failed to load stays failed until a restart, so serve the
+    # others rather than keep the service unhealthy; requests for the failed
+    # models load them on demand and report their own errors. With nothing
+    # loaded every request would cold-load or fail, so stay unready then.
+    with _state_lock:
+        if not _state["failed"]:
+            _state["stage"] = "ready"
+        elif _state["loaded"]:
+            _state["stage"] = "degraded"
+        else:
+            _state["stage"] = "failed"
+        _state["ready"] = _state["stage"] != "failed"
+        _state["finished_at"] = time.time()
+
+
+def start_preload() -> threading.Thread:
+    """
+    Preload and warm up the configured models in a background thread
+
+    The API keeps answering health checks while this runs; readiness turns
+    true once every configured model has been tried and at least one of
+    them loaded. Models that failed are listed under "failed" and the stage
+    is then "degraded", or "failed" (and not ready) when none loaded.
+
+    Returns:
+        The preload thread
+    """
+    thread = threading.Thread(
+        target=_preload,
+        args=(settings.PRELOAD_MODELS, settings.PRELOAD_DIARIZATION, settings.WARMUP_ENABLED),
+        name="model-preload",
+        daemon=True
+    )
+    thread.start()
+    return thread
+
+
+def preload_now(warm_up: bool = True, models: Optional[List[str]] = None):
+    """
+    Preload the configured models in the calling thread
+
+    Used before forking inference workers, which must inherit loaded models.
+
+    Args:
+        warm_up: Run one inference per model after loading
+        models: Transcription models to load (defaults to settings.PRELOAD_MODELS)
+    """
+    _preload(settings.PRELOAD_MODELS if models is None else models, settings.PRELOAD_DIARIZATION, warm_up)
+
+
+def readiness() -> Dict[str, Any]:
+    """Current readiness state"""
+    with _state_lock:
+        return {
+            **_state,
+            "loaded": list(_state["loaded"]),
+            "failed": list(_state["failed"]),
+            "errors": list(_state["errors"]),
+        }
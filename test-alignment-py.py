@@ -0,0 +1,135 @@
+"""
+Equivalence tests for speaker alignment
+
+align_segments must match the reference combine_transcript_with_diarization
+exactly, and assign_word_speakers must match a brute-force computation of
+each word's overlap with every speaker, on random inputs and edge cases.
+"""
+import random
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pytest
+
+from app.services.alignment import align_segments, align_words, assign_word_speakers
+from app.services.diarization import combine_transcript_with_diarization
+
+SEED = 0
+TRIALS = 2000
+
+
+def _interval(rng: random.Random) -> Tuple[float, float]:
+    # A coarse half-second grid makes ties, touching edges and empty intervals common
+    start = rng.randrange(0, 40) / 2
+    return start, start + rng.randrange(0, 12) / 2
+
+
+def random_case(rng: random.Random) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Small random transcript segments and speaker turns"""
+    transcript = []
+    for i in range(rng.randrange(0, 15)):
+        start, end = _interval(rng)
+        transcript.append({"start": start, "end": end, "text": f" t{i}"})
+
+    turns = []
+    for _ in range(rng.randrange(0, 15)):
+        start, end = _interval(rng)
+        turns.append({"start": start, "end": end, "speaker": rng.choice("ABCD")})
+    return transcript, turns
+
+
+def _covered(start: float, end: float, turns: List[Dict[str, Any]]) -> float:
+    """Time between start and end covered by the union of the turns"""
+    covered = 0.0
+    reached = start
+    for turn_start, turn_end in sorted((max(start, turn["start"]), min(end, turn["end"])) for turn in turns):
+        turn_start = max(turn_start, reached)
+        if turn_end > turn_start:
+            covered += turn_end - turn_start
+            reached = turn_end
+    return covered
+
+
+def reference_word_speakers(words: List[Tuple[float, float]], turns: List[Dict[str, Any]]) -> List[str]:
+    """Every word against every speaker, ties to the speaker seen first, gaps from the previous word"""
+    labels: List[str] = []
+    for turn in turns:
+        if turn["end"] > turn["start"] and turn["speaker"] not in labels:
+            labels.append(turn["speaker"])
+
+    best: List[Optional[str]] = []
+    for start, end in words:
+        overlaps = [_covered(start, end, [turn for turn in turns if turn["speaker"] == label]) for label in labels]
+        best.append(labels[overlaps.index(max(overlaps))] if overlaps and max(overlaps) > 0 else None)
+
+    known = [label for label in best if label is not None]
+    if not known:
+        return ["UNKNOWN"] * len(words)
+    filled = []
+    previous = known[0]
+    for label in best:
+        previous = label or previous
+        filled.append(previous)
+    return filled
+
+
+def word_speakers(words: List[Tuple[float, float]], turns: List[Dict[str, Any]]) -> List[str]:
+    starts = np.array([start for start, _ in words], dtype=np.float64)
+    ends = np.array([end for _, end in words], dtype=np.float64)
+    return assign_word_speakers(starts, ends, turns)
+
+
+# (words or segments as (start, end), turns)
+EDGE_CASES = {
+    "zero_length_turn_only_speaker": (
+        [(0.0, 1.0), (1.0, 2.0)],
+        [{"start": 0, "end": 2, "speaker": "A"}, {"start": 1, "end": 1, "speaker": "B"}],
+    ),
+    "all_turns_zero_length": (
+        [(0.0, 1.0), (1.0, 2.0)],
+        [{"start": 1, "end": 1, "speaker": "A"}, {"start": 2, "end": 2, "speaker": "B"}],
+    ),
+    "no_turns": (
+        [(0.0, 1.0), (1.0, 2.0)],
+        [],
+    ),
+    "no_words": (
+        [],
+        [{"start": 0, "end": 2, "speaker": "A"}],
+    ),
+    "word_on_boundary": (
+        [(1.0, 2.0), (2.0, 3.0), (2.0, 2.0)],
+        [{"start": 0, "end": 2, "speaker": "A"}, {"start": 2, "end": 4, "speaker": "B"}],
+    ),
+}
+
+
+@pytest.mark.parametrize("words, turns", list(EDGE_CASES.values()), ids=list(EDGE_CASES))
+def test_edge_cases(words, turns):
+    transcript = [{"start": start, "end": end, "text": f" w{i}"} for i, (start, end) in enumerate(words)]
+    assert align_segments(transcript, turns) == combine_transcript_with_diarization(transcript, turns)
+    assert word_speakers(words, turns) == reference_word_speakers(words, turns)
+    # Segments without word timings are treated as single words
+    assert [seg["speaker"] for seg in align_words(transcript, turns)] == reference_word_speakers(words, turns)
+
+
+def test_word_on_boundary_goes_to_the_turn_it_overlaps():
+    words, turns = EDGE_CASES["word_on_boundary"]
+    assert word_speakers(words, turns)[:2] == ["A", "B"]
+
+
+def test_segments_match_reference():
+    rng = random.Random(SEED)
+    for _ in range(TRIALS):
+        transcript, turns = random_case(rng)
+        assert align_segments(transcript, turns) == combine_transcript_with_diarization(transcript, turns), (
+            transcript, turns
+        )
+
+
+def test_words_match_reference():
+    rng = random.Random(SEED + 1)
+    for _ in range(TRIALS):
+        transcript, turns = random_case(rng)
+        words = [(seg["start"], seg["end"]) for seg in transcript]
+        assert word_speakers(words, turns) == reference_word_speakers(words, turns), (words, turns)
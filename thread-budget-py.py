@@ -0,0 +1,247 @@
+import os
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from app.core.config import settings
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+class StageCancelled(Exception):
+    """Raised at a checkpoint of a stage whose cancel event has been set"""
+    pass
+
+
+def _cgroup_cpu_limit() -> Optional[float]:
+    """CPUs allowed by the container's cgroup CPU quota, or None if unlimited"""
+    # cgroup v2: "<quota> <period>" or "max <period>"
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()[:2]
+        if quota != "max":
+            return int(quota) / int(period)
+        return None
+    except (OSError, ValueError):
+        pass
+
+    # cgroup v1
+    try:
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us") as f:
+            quota = int(f.read())
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us") as f:
+            period = int(f.read())
+        if quota > 0 and period > 0:
+            return quota / period
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def usable_cpus() -> List[int]:
+    """CPUs this process may run on, from its affinity mask"""
+    try:
+        return sorted(os.sched_getaffinity(0))
+    except AttributeError:
+        # Not available on macOS or Windows
+        return list(range(os.cpu_count() or 1))
+
+
+def available_cpus() -> int:
+    """
+    Number of cores inference can keep busy
+
+    The smallest of the affinity mask, the cgroup CPU quota (as set by
+    `docker run --cpus`) and settings.TORCH_THREADS when it is set.
+    """
+    count = len(usable_cpus())
+    limit = _cgroup_cpu_limit()
+    if limit is not None:
+        count = min(count, max(1, int(limit)))
+    if settings.TORCH_THREADS:
+        count = min(count, settings.TORCH_THREADS)
+    return max(1, count)
+
+
+class ThreadLease:
+    """The share of the thread budget held by one running inference stage"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.threads = 1
+        self.cpus: Optional[List[int]] = None
+        # What the calling thread was last configured with
+        self.applied: Optional[tuple] = None
+
+
+class ThreadBudget:
+    """
+    Splits the available cores among concurrently running inference stages
+
+    Every Whisper or pyannote stage holds a lease while it runs. The cores
+    are divided evenly among the leases, and the split is recomputed
+    whenever a stage starts or finishes. A stage adopts its new share at the
+    next checkpoint: once per 30 s Whisper window, per pyannote pipeline
+    step, or per streamed chunk. With pinning enabled, each lease also gets
+    its own set of cores.
+
+    Torch's intra-op thread count is per calling thread under OpenMP, so
+    leases apply to the thread that acquired them. The same checkpoints
+    stop a stage early once its cancel event is set (see cancellable).
+    """
+
+    def __init__(self, total: Optional[int] = None, pin: bool = False):
+        self.total = total or available_cpus()
+        self.pin = pin
+        self._cpus = usable_cpus()
+        self._leases: List[ThreadLease] = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.peak_leases = 0
+
+    def resize(self, total: int, cpus: Optional[List[int]] = None):
+        """Change the number of cores to share, e.g. in a worker process given a slice of the machine"""
+        with self._lock:
+            self.total = max(1, total)
+            if cpus is not None:
+                self._cpus = cpus
+            self._rebalance()
+
+    @contextmanager
+    def lease(self, name: str) -> Iterator[ThreadLease]:
+        """
+        Hold a share of the budget for the duration of a stage
+
+        Applies the share to the calling thread on entry and restores the
+        thread's previous lease, if any, on exit.
+
+        Args:
+            name: Stage name, for stats and logs
+
+        Yields:
+            The lease
+        """
+        lease = ThreadLease(name)
+        previous = getattr(self._local, "lease", None)
+        with self._lock:
+            self._leases.append(lease)
+            self.peak_leases = max(self.peak_leases, len(self._leases))
+            self._rebalance()
+        self._local.lease = lease
+        try:
+            self.checkpoint()
+            yield lease
+        finally:
+            self._local.lease = previous
+            with self._lock:
+                self._leases.remove(lease)
+                self._rebalance()
+            if previous is not None:
+                previous.applied = None
+                self.checkpoint()
+            elif lease.applied is not None and lease.applied[1] is not None:
+                # Job threads are reused; unpin this one for whatever it runs next
+                try:
+                    os.sched_setaffinity(0, self._cpus)
+                except (AttributeError, OSError):
+                    pass
+
+    @contextmanager
+    def cancellable(self, cancel_event: Optional[threading.Event]) -> Iterator[None]:
+        """
+        Make the calling thread's checkpoints raise StageCancelled once cancel_event is set
+
+        Args:
+            cancel_event: Event requesting cancellation; None leaves the stage uncancellable
+        """
+        previous = getattr(self._local, "cancel_event", None)
+        self._local.cancel_event = cancel_event
+        try:
+            yield
+        finally:
+            self._local.cancel_event = previous
+
+    def checkpoint(self):
+        """
+        Apply the calling thread's current share if it changed since it was last applied
+
+        Raises:
+            StageCancelled: If the calling thread's stage has been cancelled
+        """
+        cancel_event = getattr(self._local, "cancel_event", None)
+        if cancel_event is not None and cancel_event.is_set():
+            raise StageCancelled("Stage cancelled")
+
+        lease = getattr(self._local, "lease", None)
+        if lease is None:
+            return
+        with self._lock:
+            wanted = (lease.threads, tuple(lease.cpus) if lease.cpus else None)
+        if wanted == lease.applied:
+            return
+
+        import torch
+
+        torch.set_num_threads(wanted[0])
+        if wanted[1] is not None:
+            try:
+                # pid 0 is the calling thread; OpenMP threads started from it inherit the mask
+                os.sched_setaffinity(0, wanted[1])
+            except (AttributeError, OSError) as e:
+                logger.warning(f"Could not pin {lease.name} to cores {list(wanted[1])}: {e}")
+        if lease.applied is not None:
+            logger.info(f"Rebalanced {lease.name} stage to {wanted[0]} threads")
+        lease.applied = wanted
+
+    def stats(self) -> Dict[str, Any]:
+        """Budget size and the share of each running stage"""
+        with self._lock:
+            return {
+                "total_threads": self.total,
+                "cgroup_cpu_limit": _cgroup_cpu_limit(),
+                "pinning": self.pin,
+                "peak_stages": self.peak_leases,
+                "stages": [
+                    {"name": lease.name, "threads": lease.threads, "cpus": lease.cpus}
+                    for lease in self._leases
+                ],
+            }
+
+    def _rebalance(self):
+        """Divide the cores evenly among the leases, oldest first (lock held)"""
+        count = len(self._leases)
+        if count == 0:
+            return
+        share, extra = divmod(self.total, count)
+        next_cpu = 0
+        for index, lease in enumerate(self._leases):
+            # More stages than cores: each still gets one thread
+            lease.threads = max(1, share + (1 if index < extra else 0))
+            if self.pin and count <= self.total:
+                lease.cpus = self._cpus[next_cpu:next_cpu + lease.threads] or None
+                next_cpu += lease.threads
+            elif self.pin:
+                lease.cpus = list(self._cpus[:self.total])
+            else:
+                lease.cpus = None
+
+
+def install_checkpoints(model: Any):
+    """
+    Make a Whisper model re-check its thread share and cancellation before each decoded window
+
+    whisper.transcribe calls model.decode once per 30 s window, from the
+    thread running the stage.
+    """
+    decode = model.decode
+
+    def decode_with_checkpoint(*args: Any, **kwargs: Any):
+        thread_budget.checkpoint()
+        return decode(*args, **kwargs)
+
+    model.decode = decode_with_checkpoint
+
+
+thread_budget = ThreadBudget(pin=settings.THREAD_PINNING)
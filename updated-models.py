@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Any, Optional, List, Dict
 
 
 class TranscriptionRequest(BaseModel):
@@ -10,6 +10,10 @@ class TranscriptionRequest(BaseModel):
 class TranscriptionResponse(BaseModel):
     transcript: str = Field(..., description="Transcribed text")
     file_name: str = Field(..., description="Original filename")
+    timings: Optional[Dict[str, float]] = Field(None, description="Seconds spent in each processing stage")
+    vad: Optional[Dict[str, float]] = Field(None, description="Silence skipped by voice activity detection")
+    cascade: Optional[Dict[str, Any]] = Field(None, description="Audio re-decoded by the requested model after a small-model draft")
+    cached: bool = Field(False, description="Whether the transcript came from the result cache")
 
 
 class DiarizationResponse(BaseModel):
@@ -17,3 +21,28 @@ class DiarizationResponse(BaseModel):
     diarized_transcript: str = Field(..., description="Transcript with speaker labels")
     speakers: List[str] = Field(..., description="List of identified speakers")
     file_name: str = Field(..., description="Original filename")
+    timings: Optional[Dict[str, float]] = Field(None, description="Seconds spent in each processing stage")
+    vad: Optional[Dict[str, float]] = Field(None, description="Silence skipped by voice activity detection")
+    cascade: Optional[Dict[str, Any]] = Field(None, description="Audio re-decoded by the requested model after a small-model draft")
+    cached: Optional[Dict[str, bool]] = Field(None, description="Which stages came from the result cache")
+
+
+class JobResponse(BaseModel):
+    job_id: str = Field(..., description="Identifier of the processing job")
+    task: str = Field(..., description="Task run by the job (transcribe or diarize)")
+    file_name: str = Field(..., description="Original filename")
+    status: str = Field(..., description="Job status: queued, running, completed or failed")
+    error: Optional[str] = Field(None, description="Error message if the job failed")
+    created_at: float = Field(..., description="Unix time the job was queued")
+    started_at: Optional[float] = Field(None, description="Unix time the job started running")
+    finished_at: Optional[float] = Field(None, description="Unix time the job finished")
+
+
+class UploadResponse(BaseModel):
+    upload_id: str = Field(..., description="Identifier of the resumable upload")
+    file_name: str = Field(..., description="Original filename")
+    size: Optional[int] = Field(None, description="Declared total size in bytes")
+    received: int = Field(..., description="Bytes received so far; the offset of the next chunk")
+    complete: bool = Field(..., description="Whether all declared bytes have arrived")
+    created_at: float = Field(..., description="Unix time the upload was started")
+    updated_at: float = Field(..., description="Unix time data was last received")
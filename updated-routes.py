@@ -1,16 +1,211 @@
-from fastapi import APIRouter, File, UploadFile, HTTPException, BackgroundTasks, Query
-from fastapi.responses import JSONResponse
-from typing import Optional
-import shutil
-import os
+from fastapi import APIRouter, File, Form, UploadFile, HTTPException, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.requests import ClientDisconnect
+from typing import Optional, Dict, Any, List, Tuple, Callable, AsyncIterator
+import asyncio
+from functools import partial
+import json
 from app.core.config import settings
-from app.services.transcription import transcribe_audio
-from app.services.diarization import diarize_audio, combine_transcript_with_diarization, format_diarized_transcript
-from app.api.models import TranscriptionResponse, DiarizationResponse
-import uuid
+from app.services.transcription import get_model_cache_stats
+from app.services.engines import ENGINES, get_engine_stats
+from app.services.pipeline import transcribe, transcribe_and_diarize
+from app.services.jobs import job_manager, JOB_COMPLETED, JOB_FAILED
+from app.services.scheduler import scheduler, QueueFullError, WorkCost
+from app.services.startup import readiness
+from app.services.result_cache import result_cache
+from app.services.features import get_feature_cache_stats
+from app.services.batching import get_batching_stats
+from app.services.transcription import get_whisper_model
+from app.services.live import LiveTranscriber, run_live_session, acquire_live_session, release_live_session
+from app.services.uploads import store_upload, is_archive, extract_archive, remove_upload
+from app.services.uploads import upload_sessions, UploadOffsetError, UPLOAD_CHUNK_SIZE
+from app.services.ingest import ingest_stream, iterate_from_loop
+from app.services.audio import DecodedAudio
+from app.services.decode_pool import decode_pool
+from app.services.workers import worker_supervisor
+from app.services.thread_budget import thread_budget
+from app.services.batch import BatchItem, run_batch
+from app.api.models import TranscriptionResponse, DiarizationResponse, JobResponse, UploadResponse
 
 router = APIRouter()
 
+def save_upload(file: UploadFile) -> Tuple[str, str]:
+    """Save an uploaded file under a unique name and return its path and SHA-256"""
+    return store_upload(file.file, file.filename)
+
+
+def run_transcription(
+    file_path: str,
+    file_name: str,
+    language: str,
+    model: str,
+    vad_filter: Optional[bool] = None,
+    audio_hash: Optional[str] = None,
+    use_cache: bool = True,
+    on_event: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+    audio: Optional[DecodedAudio] = None,
+    engine: Optional[str] = None,
+    cascade: Optional[bool] = None
+) -> Dict[str, Any]:
+    """Transcribe a saved upload and build the transcription response"""
+    result = transcribe(
+        file_path, language, model,
+        vad_filter=vad_filter, audio_hash=audio_hash, use_cache=use_cache, on_event=on_event, audio=audio,
+        engine=engine, cascade=cascade
+    )
+
+    result["file_name"] = file_name
+    return result
+
+
+def run_diarization(
+    file_path: str,
+    file_name: str,
+    language: str,
+    model: str,
+    word_level: bool = False,
+    vad_filter: Optional[bool] = None,
+    audio_hash: Optional[str] = None,
+    use_cache: bool = True,
+    on_event: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+    audio: Optional[DecodedAudio] = None,
+    engine: Optional[str] = None,
+    cascade: Optional[bool] = None
+) -> Dict[str, Any]:
+    """Transcribe and diarize a saved upload and build the diarization response"""
+    result = transcribe_and_diarize(
+        file_path, language, model,
+        word_level=word_level, vad_filter=vad_filter,
+        audio_hash=audio_hash, use_cache=use_cache, on_event=on_event, audio=audio, engine=engine,
+        cascade=cascade
+    )
+
+    result["file_name"] = file_name
+    return result
+
+
+TASKS = {
+    "transcribe": run_transcription,
+    "diarize": run_diarization,
+}
+
+
+def job_task(task: str) -> Callable[..., Dict[str, Any]]:
+    """The function a job runs for task: in an inference worker process when they are running"""
+    if worker_supervisor.running:
+        return partial(worker_supervisor.run_task, TASKS[task])
+    return TASKS[task]
+
+
+def check_engine(engine: Optional[str]):
+    """Reject an unknown engine with a 400 before the upload is read"""
+    if engine is not None and engine.lower() not in ENGINES:
+        raise HTTPException(status_code=400, detail=f"Unknown engine: {engine} (expected one of {', '.join(ENGINES)})")
+
+
+def busy_error(e: QueueFullError) -> HTTPException:
+    """Build a 429 response telling the client when to retry"""
+    return HTTPException(
+        status_code=429,
+        detail=str(e),
+        headers={"Retry-After": str(e.retry_after)}
+    )
+
+
+async def submit_file(
+    task: str,
+    file_name: str,
+    file_path: str,
+    audio_hash: str,
+    language: str,
+    model: str,
+    cleanup_path: Optional[str] = None,
+    **options: Any
+):
+    """Estimate the cost of a saved file and queue it on the job pool"""
+    cost = await run_in_threadpool(WorkCost.for_file, file_path, model)
+    return job_manager.submit(
+        task,
+        file_name,
+        partial(job_task(task), audio_hash=audio_hash, **options),
+        file_path,
+        file_name,
+        language,
+        model,
+        cleanup_path=cleanup_path,
+        cost=cost,
+        decode_path=file_path,
+        audio_hash=audio_hash
+    )
+
+
+async def submit_upload(task: str, file: UploadFile, language: str, model: str, **options: Any):
+    """Save the upload off the event loop and queue it on the job pool"""
+    try:
+        # Reject before reading the upload if we are already saturated
+        scheduler.check_capacity()
+
+        temp_file_path, audio_hash = await run_in_threadpool(save_upload, file)
+        return await submit_file(
+            task, file.filename, temp_file_path, audio_hash, language, model,
+            cleanup_path=temp_file_path, **options
+        )
+    except QueueFullError as e:
+        raise busy_error(e)
+
+
+def sse_event(event: str, data: Dict[str, Any]) -> str:
+    """Format one Server-Sent Events message"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def stream_upload(task: str, file: UploadFile, language: str, model: str, **options: Any) -> StreamingResponse:
+    """
+    Queue an upload and stream its segments as Server-Sent Events
+
+    The stream opens with a "job" event, then carries "segment" (and, when
+    diarizing, "speaker_segment") events as they are produced, and ends with
+    a "summary" event holding the full response, or an "error" event.
+    Admission errors are raised before the stream starts.
+    """
+    loop = asyncio.get_running_loop()
+    events: asyncio.Queue = asyncio.Queue()
+
+    def on_event(event: str, data: Dict[str, Any]):
+        # Called from the worker thread
+        loop.call_soon_threadsafe(events.put_nowait, (event, data))
+
+    job = await submit_upload(task, file, language, model, on_event=on_event, **options)
+
+    async def event_stream() -> AsyncIterator[str]:
+        yield sse_event("job", job.to_dict())
+
+        finished = asyncio.ensure_future(asyncio.wrap_future(job.future))
+        while not finished.done():
+            next_event = asyncio.ensure_future(events.get())
+            await asyncio.wait({next_event, finished}, return_when=asyncio.FIRST_COMPLETED)
+            if next_event.done():
+                yield sse_event(*next_event.result())
+            else:
+                next_event.cancel()
+
+        # Events are queued before the job finishes, so drain what is left
+        while not events.empty():
+            yield sse_event(*events.get_nowait())
+
+        try:
+            yield sse_event("summary", finished.result())
+        except Exception as e:
+            yield sse_event("error", {"detail": f"Error processing audio: {str(e)}"})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        # Keep proxies from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 
 @router.get("/")
 async def health_check():
@@ -18,80 +213,562 @@ async def health_check():
     return {"status": "healthy", "message": "Whisper Diarizer API is running!"}
 
 
+@router.get("/ready")
+async def readiness_check():
+    """Endpoint to check if the models are loaded and warmed up"""
+    state = readiness()
+    return JSONResponse(status_code=200 if state["ready"] else 503, content=state)
+
+
 @router.post("/transcribe", response_model=TranscriptionResponse)
 async def transcribe_audio_endpoint(
-    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     language: Optional[str] = Query(settings.DEFAULT_LANGUAGE, description="Language of the audio"),
     model: Optional[str] = Query(settings.DEFAULT_MODEL, description="Whisper model size to use"),
+    vad_filter: Optional[bool] = Query(None, description="Skip silence before transcription (defaults to server setting)"),
+    no_cache: bool = Query(False, description="Recompute instead of reusing a cached result"),
+    engine: Optional[str] = Query(None, description="Inference engine: whisper, faster-whisper or mock (defaults to server setting)"),
+    cascade: Optional[bool] = Query(None, description="Draft with a small model and re-decode only uncertain segments (defaults to server setting)"),
 ):
     """
     Transcribe an audio file using Whisper
     """
-    # Generate unique filename to avoid collisions
-    file_id = str(uuid.uuid4())
-    temp_file_path = os.path.join(settings.UPLOAD_DIR, f"{file_id}_{file.filename}")
-    
+    check_engine(engine)
     try:
-        # Save uploaded file temporarily
-        with open(temp_file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-            
-        # Process the audio file
-        transcript = transcribe_audio(temp_file_path, language, model)
-        
-        # Clean up file in background after response is sent
-        background_tasks.add_task(os.remove, temp_file_path)
-        
-        return {"transcript": transcript, "file_name": file.filename}
-    
+        # Run on the job pool and wait without blocking the event loop
+        job = await submit_upload(
+            "transcribe", file, language, model,
+            vad_filter=vad_filter, use_cache=not no_cache, engine=engine, cascade=cascade
+        )
+        return await asyncio.wrap_future(job.future)
+
+    except HTTPException:
+        raise
     except Exception as e:
-        # Make sure to clean up if there's an error
-        if os.path.exists(temp_file_path):
-            os.remove(temp_file_path)
         raise HTTPException(status_code=500, detail=f"Error processing audio: {str(e)}")
 
 
 @router.post("/diarize", response_model=DiarizationResponse)
 async def diarize_audio_endpoint(
-    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     language: Optional[str] = Query(settings.DEFAULT_LANGUAGE, description="Language of the audio"),
     model: Optional[str] = Query(settings.DEFAULT_MODEL, description="Whisper model size to use"),
+    word_level: bool = Query(False, description="Attribute speakers per word and split segments at speaker changes"),
+    vad_filter: Optional[bool] = Query(None, description="Skip silence before transcription (defaults to server setting)"),
+    no_cache: bool = Query(False, description="Recompute instead of reusing a cached result"),
+    engine: Optional[str] = Query(None, description="Inference engine: whisper, faster-whisper or mock (defaults to server setting)"),
+    cascade: Optional[bool] = Query(None, description="Draft with a small model and re-decode only uncertain segments (defaults to server setting)"),
 ):
     """
     Transcribe audio and identify different speakers (diarization)
     """
-    # Generate unique filename to avoid collisions
-    file_id = str(uuid.uuid4())
-    temp_file_path = os.path.join(settings.UPLOAD_DIR, f"{file_id}_{file.filename}")
-    
+    check_engine(engine)
+    try:
+        # Run on the job pool and wait without blocking the event loop
+        job = await submit_upload(
+            "diarize", file, language, model,
+            word_level=word_level, vad_filter=vad_filter, use_cache=not no_cache, engine=engine, cascade=cascade
+        )
+        return await asyncio.wrap_future(job.future)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error processing audio: {str(e)}")
+
+
+@router.post("/transcribe/stream")
+async def transcribe_stream_endpoint(
+    file: UploadFile = File(...),
+    language: Optional[str] = Query(settings.DEFAULT_LANGUAGE, description="Language of the audio"),
+    model: Optional[str] = Query(settings.DEFAULT_MODEL, description="Whisper model size to use"),
+    vad_filter: Optional[bool] = Query(None, description="Skip silence before transcription (defaults to server setting)"),
+    no_cache: bool = Query(False, description="Recompute instead of reusing a cached result"),
+    engine: Optional[str] = Query(None, description="Inference engine: whisper, faster-whisper or mock (defaults to server setting)"),
+    cascade: Optional[bool] = Query(None, description="Draft with a small model and re-decode only uncertain segments (defaults to server setting)"),
+):
+    """
+    Transcribe an audio file, streaming segments as Server-Sent Events while they are produced
+    """
+    check_engine(engine)
+    try:
+        return await stream_upload(
+            "transcribe", file, language, model,
+            vad_filter=vad_filter, use_cache=not no_cache, engine=engine, cascade=cascade
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error processing audio: {str(e)}")
+
+
+@router.post("/diarize/stream")
+async def diarize_stream_endpoint(
+    file: UploadFile = File(...),
+    language: Optional[str] = Query(settings.DEFAULT_LANGUAGE, description="Language of the audio"),
+    model: Optional[str] = Query(settings.DEFAULT_MODEL, description="Whisper model size to use"),
+    word_level: bool = Query(False, description="Attribute speakers per word and split segments at speaker changes"),
+    vad_filter: Optional[bool] = Query(None, description="Skip silence before transcription (defaults to server setting)"),
+    no_cache: bool = Query(False, description="Recompute instead of reusing a cached result"),
+    engine: Optional[str] = Query(None, description="Inference engine: whisper, faster-whisper or mock (defaults to server setting)"),
+    cascade: Optional[bool] = Query(None, description="Draft with a small model and re-decode only uncertain segments (defaults to server setting)"),
+):
+    """
+    Transcribe and diarize an audio file, streaming segments and then speaker-labelled
+    segments as Server-Sent Events
+    """
+    check_engine(engine)
     try:
-        # Save uploaded file temporarily
-        with open(temp_file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        
-        # Get raw transcription with segments
-        transcript_result = transcribe_audio(temp_file_path, language, model)
-        
-        # Perform speaker diarization
-        diarization_result = diarize_audio(temp_file_path)
-        
-        # Format as a diarized transcript
-        diarized_transcript = format_diarized_transcript(diarization_result)
-        
-        # Clean up file in background after response is sent
-        background_tasks.add_task(os.remove, temp_file_path)
-        
-        return {
-            "transcript": transcript_result,
-            "diarized_transcript": diarized_transcript,
-            "speakers": list(set(seg["speaker"] for seg in diarization_result)),
-            "file_name": file.filename
-        }
-    
+        return await stream_upload(
+            "diarize", file, language, model,
+            word_level=word_level, vad_filter=vad_filter, use_cache=not no_cache, engine=engine, cascade=cascade
+        )
+    except HTTPException:
+        raise
     except Exception as e:
-        # Make sure to clean up if there's an error
-        if os.path.exists(temp_file_path):
-            os.remove(temp_file_path)
         raise HTTPException(status_code=500, detail=f"Error processing audio: {str(e)}")
+
+
+@router.websocket("/live")
+async def live_transcription_endpoint(
+    websocket: WebSocket,
+    language: str = Query(settings.DEFAULT_LANGUAGE, description="Language of the audio"),
+    model: str = Query(settings.DEFAULT_MODEL, description="Whisper model size to use"),
+    format: str = Query("s16le", description="Audio format: s16le, f32le, opus (Ogg) or webm"),
+    sample_rate: int = Query(16000, description="Sample rate of raw PCM input"),
+):
+    """
+    Transcribe live audio sent as binary frames
+
+    Sends "partial" hypotheses while someone speaks and "final" segments
+    once they pause. Send the text message "stop" (or close the stream) to
+    flush the remaining audio and receive a "summary".
+    """
+    if not acquire_live_session():
+        # 1013: try again later
+        await websocket.close(code=1013, reason="Too many live sessions")
+        return
+
+    try:
+        await websocket.accept()
+        # Check the parameters before spending time on the model
+        try:
+            transcriber = LiveTranscriber(model, language, input_format=format, sample_rate=sample_rate)
+        except (ValueError, RuntimeError) as e:
+            await websocket.send_json({"type": "error", "detail": str(e)})
+            await websocket.close(code=1003)
+            return
+        try:
+            # Reuse the resident model, loading it before audio starts to count
+            await run_in_threadpool(get_whisper_model, model)
+        except Exception as e:
+            transcriber.close()
+            await websocket.send_json({"type": "error", "detail": f"Could not load model {model}: {str(e)}"})
+            await websocket.close(code=1011)
+            return
+        await websocket.send_json({"type": "ready"})
+
+        async def receive_frame() -> Optional[bytes]:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+            if message.get("bytes") is not None:
+                return message["bytes"]
+            return None if message.get("text", "").strip().lower() == "stop" else b""
+
+        await run_live_session(transcriber, receive_frame, websocket.send_json)
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        release_live_session()
+
+
+@router.get("/scheduler")
+async def scheduler_stats():
+    """Current admission queue depths and budget usage, decode pool depths, worker occupancy and thread shares"""
+    return {
+        **scheduler.stats(),
+        "decode": decode_pool.stats(),
+        "jobs": job_manager.stats(),
+        "threads": thread_budget.stats(),
+    }
+
+
+@router.get("/models")
+async def model_cache_stats():
+    """Resident Whisper models, model cache counters, encoder batching counters, inference workers and other engines' models"""
+    return {
+        **get_model_cache_stats(),
+        "batching": get_batching_stats(),
+        "workers": worker_supervisor.stats(),
+        "engines": {name: stats for name, stats in get_engine_stats().items() if name != "whisper"},
+    }
+
+
+@router.get("/cache")
+async def result_cache_stats():
+    """Result and feature cache sizes and hit/miss counters"""
+    return {
+        "results": result_cache.stats(),
+        "features": get_feature_cache_stats(),
+    }
+
+
+@router.post("/jobs", response_model=JobResponse, status_code=202)
+async def create_job_endpoint(
+    file: UploadFile = File(...),
+    task: str = Query("transcribe", description="Task to run: transcribe or diarize"),
+    language: Optional[str] = Query(settings.DEFAULT_LANGUAGE, description="Language of the audio"),
+    model: Optional[str] = Query(settings.DEFAULT_MODEL, description="Whisper model size to use"),
+    word_level: bool = Query(False, description="Diarize only: attribute speakers per word"),
+    vad_filter: Optional[bool] = Query(None, description="Skip silence before transcription (defaults to server setting)"),
+    no_cache: bool = Query(False, description="Recompute instead of reusing a cached result"),
+    engine: Optional[str] = Query(None, description="Inference engine: whisper, faster-whisper or mock (defaults to server setting)"),
+    cascade: Optional[bool] = Query(None, description="Draft with a small model and re-decode only uncertain segments (defaults to server setting)"),
+):
+    """
+    Queue an audio file for processing and return the job id immediately
+    """
+    if task not in TASKS:
+        raise HTTPException(status_code=400, detail=f"Unknown task: {task}")
+    check_engine(engine)
+
+    options = {"vad_filter": vad_filter, "use_cache": not no_cache, "engine": engine, "cascade": cascade}
+    if task == "diarize":
+        options["word_level"] = word_level
+    try:
+        job = await submit_upload(task, file, language, model, **options)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error queueing audio: {str(e)}")
+
+    return job.to_dict()
+
+
+# Per-file options accepted by the batch endpoint
+BATCH_OPTIONS = {"task", "language", "model", "word_level", "vad_filter", "no_cache", "engine", "cascade"}
+
+
+def expand_batch_upload(file: UploadFile) -> List[Tuple[str, str, str]]:
+    """Save one batch upload, unpacking it if it is an archive, and return (name, path, SHA-256) per file"""
+    path, audio_hash = save_upload(file)
+    if not is_archive(file.filename):
+        return [(file.filename, path, audio_hash)]
+    try:
+        return extract_archive(path)
+    finally:
+        remove_upload(path)
+
+
+@router.post("/batch")
+async def batch_endpoint(
+    files: List[UploadFile] = File(..., description="Audio files, or zip/tar archives of audio files"),
+    options: Optional[str] = Form(None, description="JSON object of per-file options keyed by file name"),
+    task: str = Query("transcribe", description="Default task: transcribe or diarize"),
+    language: Optional[str] = Query(settings.DEFAULT_LANGUAGE, description="Default language of the audio"),
+    model: Optional[str] = Query(settings.DEFAULT_MODEL, description="Default Whisper model size"),
+    word_level: bool = Query(False, description="Diarize only: attribute speakers per word"),
+    vad_filter: Optional[bool] = Query(None, description="Skip silence before transcription (defaults to server setting)"),
+    no_cache: bool = Query(False, description="Recompute instead of reusing a cached result"),
+    engine: Optional[str] = Query(None, description="Inference engine: whisper, faster-whisper or mock (defaults to server setting)"),
+    cascade: Optional[bool] = Query(None, description="Draft with a small model and re-decode only uncertain segments (defaults to server setting)"),
+):
+    """
+    Process many audio files in one request, streaming one NDJSON line per file as it finishes
+
+    Files are grouped by model and language so each model is loaded once for
+    its group. Per-file overrides of task, language, model, word_level,
+    vad_filter, no_cache, engine and cascade can be given in the options form field, keyed by
+    file name (for archives, by the name of the file inside the archive).
+    """
+    try:
+        overrides = json.loads(options) if options else {}
+    except json.JSONDecodeError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid options JSON: {str(e)}")
+    if not isinstance(overrides, dict) or not all(isinstance(value, dict) for value in overrides.values()):
+        raise HTTPException(status_code=400, detail="Options must map file names to objects")
+    for file_name, file_options in overrides.items():
+        unknown = set(file_options) - BATCH_OPTIONS
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown options for {file_name}: {', '.join(sorted(unknown))}")
+
+    defaults = {
+        "task": task, "language": language, "model": model,
+        "word_level": word_level, "vad_filter": vad_filter, "no_cache": no_cache, "engine": engine,
+        "cascade": cascade,
+    }
+
+    saved: List[Tuple[str, str, str]] = []
+    try:
+        for file in files:
+            saved.extend(await run_in_threadpool(expand_batch_upload, file))
+
+        items = []
+        for index, (file_name, path, audio_hash) in enumerate(saved):
+            item_options = {**defaults, **overrides.get(file_name, {})}
+            if item_options["task"] not in TASKS:
+                raise HTTPException(status_code=400, detail=f"Unknown task for {file_name}: {item_options['task']}")
+            check_engine(item_options["engine"])
+            task_options = {
+                "vad_filter": item_options["vad_filter"],
+                "use_cache": not item_options["no_cache"],
+                "engine": item_options["engine"],
+                "cascade": item_options["cascade"],
+            }
+            if item_options["task"] == "diarize":
+                task_options["word_level"] = item_options["word_level"]
+            items.append(BatchItem(
+                index, file_name, path, audio_hash,
+                item_options["task"], item_options["language"], item_options["model"], task_options
+            ))
+    except ValueError as e:
+        for _, path, _ in saved:
+            remove_upload(path)
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        for _, path, _ in saved:
+            remove_upload(path)
+        if isinstance(e, HTTPException):
+            raise
+        raise HTTPException(status_code=500, detail=f"Error saving batch: {str(e)}")
+
+    if not items:
+        raise HTTPException(status_code=400, detail="No audio files in the batch")
+
+    async def result_lines() -> AsyncIterator[str]:
+        async for line in run_batch(items, {task: job_task(task) for task in TASKS}):
+            yield json.dumps(line) + "\n"
+
+    return StreamingResponse(
+        result_lines(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.post("/ingest", response_model=JobResponse, status_code=202)
+async def ingest_endpoint(
+    request: Request,
+    file_name: str = Query(..., description="Original name of the file"),
+    task: str = Query("transcribe", description="Task to run: transcribe or diarize"),
+    language: Optional[str] = Query(settings.DEFAULT_LANGUAGE, description="Language of the audio"),
+    model: Optional[str] = Query(settings.DEFAULT_MODEL, description="Whisper model size to use"),
+    word_level: bool = Query(False, description="Diarize only: attribute speakers per word"),
+    vad_filter: Optional[bool] = Query(None, description="Skip silence before transcription (defaults to server setting)"),
+    no_cache: bool = Query(False, description="Recompute instead of reusing a cached result"),
+    engine: Optional[str] = Query(None, description="Inference engine: whisper, faster-whisper or mock (defaults to server setting)"),
+    cascade: Optional[bool] = Query(None, description="Draft with a small model and re-decode only uncertain segments (defaults to server setting)"),
+):
+    """
+    Queue raw audio sent as the request body, decoding it while it arrives
+
+    Unlike the multipart endpoints, the upload is never written to
+    UPLOAD_DIR: the body is piped into ffmpeg and the PCM is kept in memory
+    (long recordings still spill to a memory-mapped file). MP4-family files
+    whose index sits at the end cannot be read from a pipe; those are
+    spooled to disk and decoded from the file.
+    """
+    if task not in TASKS:
+        raise HTTPException(status_code=400, detail=f"Unknown task: {task}")
+    check_engine(engine)
+
+    options = {"vad_filter": vad_filter, "use_cache": not no_cache, "engine": engine, "cascade": cascade}
+    if task == "diarize":
+        options["word_level"] = word_level
+    try:
+        # Reject before reading the body if we are already saturated
+        scheduler.check_capacity()
+
+        loop = asyncio.get_running_loop()
+        upload = await run_in_threadpool(ingest_stream, iterate_from_loop(request.stream(), loop), file_name)
+        if upload.spooled:
+            return (await submit_file(
+                task, file_name, upload.path, upload.audio_hash, language, model,
+                cleanup_path=upload.path, **options
+            )).to_dict()
+
+        try:
+            job = job_manager.submit(
+                task,
+                file_name,
+                partial(job_task(task), audio_hash=upload.audio_hash, audio=upload.audio, **options),
+                file_name,
+                file_name,
+                language,
+                model,
+                cost=WorkCost(upload.audio.duration, model)
+            )
+        except Exception:
+            upload.audio.close()
+            raise
+        return job.to_dict()
+    except QueueFullError as e:
+        raise busy_error(e)
+    except ClientDisconnect:
+        raise HTTPException(status_code=400, detail="Client disconnected during upload")
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error ingesting audio: {str(e)}")
+
+
+def get_upload_session(upload_id: str):
+    session = upload_sessions.get(upload_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail=f"Upload not found: {upload_id}")
+    return session
+
+
+def offset_conflict(e: UploadOffsetError) -> HTTPException:
+    """Build a 409 response telling the client where to resume"""
+    return HTTPException(status_code=409, detail=str(e), headers={"Upload-Offset": str(e.offset)})
+
+
+@router.post("/uploads", response_model=UploadResponse, status_code=201)
+async def create_upload_endpoint(
+    file_name: str = Query(..., description="Original name of the file"),
+    size: Optional[int] = Query(None, ge=0, description="Total size in bytes, if known"),
+):
+    """
+    Start a resumable upload
+
+    Send the data with PUT /uploads/{upload_id}?offset=N, check progress with
+    GET /uploads/{upload_id}, and turn the finished upload into a job with
+    POST /uploads/{upload_id}/complete. Uploads idle for longer than
+    UPLOAD_SESSION_TTL_SECONDS are deleted.
+    """
+    session = await run_in_threadpool(upload_sessions.create, file_name, size)
+    return session.to_dict()
+
+
+@router.put("/uploads/{upload_id}", response_model=UploadResponse)
+async def upload_chunk_endpoint(
+    upload_id: str,
+    request: Request,
+    offset: int = Query(..., ge=0, description="Byte offset of the data in the file"),
+):
+    """
+    Append the request body to a resumable upload
+
+    The offset must equal the bytes received so far; otherwise a 409 with
+    an Upload-Offset header says where to continue. If the connection drops,
+    everything that reached the server is kept and the upload resumes there.
+    """
+    session = await run_in_threadpool(get_upload_session, upload_id)
+
+    position = offset
+    buffer = bytearray()
+    try:
+        try:
+            async for chunk in request.stream():
+                buffer += chunk
+                # Write in large blocks so the threadpool hop is amortized
+                if len(buffer) >= UPLOAD_CHUNK_SIZE:
+                    position = await run_in_threadpool(session.write, position, [bytes(buffer)])
+                    buffer.clear()
+        except ClientDisconnect:
+            # Keep what arrived; the client resumes from the reported offset
+            pass
+        if buffer:
+            await run_in_threadpool(session.write, position, [bytes(buffer)])
+    except UploadOffsetError as e:
+        raise offset_conflict(e)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return session.to_dict()
+
+
+@router.get("/uploads/{upload_id}", response_model=UploadResponse)
+async def get_upload_endpoint(upload_id: str):
+    """
+    Get the progress of a resumable upload
+    """
+    session = await run_in_threadpool(get_upload_session, upload_id)
+    return session.to_dict()
+
+
+@router.delete("/uploads/{upload_id}")
+async def delete_upload_endpoint(upload_id: str):
+    """
+    Abort a resumable upload and delete its data
+    """
+    if not await run_in_threadpool(upload_sessions.discard, upload_id):
+        raise HTTPException(status_code=404, detail=f"Upload not found: {upload_id}")
+    return {"upload_id": upload_id, "deleted": True}
+
+
+@router.post("/uploads/{upload_id}/complete", response_model=JobResponse, status_code=202)
+async def complete_upload_endpoint(
+    upload_id: str,
+    task: str = Query("transcribe", description="Task to run: transcribe or diarize"),
+    language: Optional[str] = Query(settings.DEFAULT_LANGUAGE, description="Language of the audio"),
+    model: Optional[str] = Query(settings.DEFAULT_MODEL, description="Whisper model size to use"),
+    word_level: bool = Query(False, description="Diarize only: attribute speakers per word"),
+    vad_filter: Optional[bool] = Query(None, description="Skip silence before transcription (defaults to server setting)"),
+    no_cache: bool = Query(False, description="Recompute instead of reusing a cached result"),
+    engine: Optional[str] = Query(None, description="Inference engine: whisper, faster-whisper or mock (defaults to server setting)"),
+    cascade: Optional[bool] = Query(None, description="Draft with a small model and re-decode only uncertain segments (defaults to server setting)"),
+):
+    """
+    Finish a resumable upload and queue it for processing
+
+    The SHA-256 used for result caching was computed while the data arrived,
+    so the file is not read again. If the server is busy the upload is kept
+    and this call can be retried.
+    """
+    if task not in TASKS:
+        raise HTTPException(status_code=400, detail=f"Unknown task: {task}")
+    check_engine(engine)
+
+    options = {"vad_filter": vad_filter, "use_cache": not no_cache, "engine": engine, "cascade": cascade}
+    if task == "diarize":
+        options["word_level"] = word_level
+    try:
+        scheduler.check_capacity()
+        session, file_path, audio_hash = await run_in_threadpool(upload_sessions.finalize, upload_id)
+
+        # Clean up when the job is done rather than on rejection, so the upload survives a 429
+        job = await submit_file(task, session.file_name, file_path, audio_hash, language, model, **options)
+        job.future.add_done_callback(lambda _: remove_upload(file_path))
+        upload_sessions.release(upload_id)
+    except QueueFullError as e:
+        raise busy_error(e)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Upload not found: {upload_id}")
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error queueing audio: {str(e)}")
+
+    return job.to_dict()
+
+
+@router.get("/jobs/{job_id}", response_model=JobResponse)
+async def get_job_endpoint(job_id: str):
+    """
+    Get the status of a processing job
+    """
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+    return job.to_dict()
+
+
+@router.get("/jobs/{job_id}/result")
+async def get_job_result_endpoint(job_id: str):
+    """
+    Get the output of a completed processing job
+    """
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+    if job.status == JOB_FAILED:
+        raise HTTPException(status_code=500, detail=f"Error processing audio: {job.error}")
+    if job.status != JOB_COMPLETED:
+        raise HTTPException(status_code=409, detail=f"Job is {job.status}")
+    return job.result
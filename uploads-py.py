@@ -0,0 +1,465 @@
+import os
+import json
+import time
+import uuid
+import hashlib
+import logging
+import tarfile
+import zipfile
+import threading
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Bytes read from an upload at a time while saving and hashing it
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Archive extensions unpacked by the batch endpoint
+ARCHIVE_SUFFIXES = (".zip", ".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tar.xz")
+
+
+def store_upload(source: BinaryIO, file_name: str) -> Tuple[str, str]:
+    """
+    Copy an uploaded stream into UPLOAD_DIR under a unique name, hashing it on the way
+
+    Args:
+        source: Readable binary stream
+        file_name: Original name of the file
+
+    Returns:
+        Tuple of (saved path, SHA-256 hex digest)
+    """
+    # Generate unique filename to avoid collisions
+    path = os.path.join(settings.UPLOAD_DIR, f"{uuid.uuid4()}_{Path(file_name).name}")
+
+    # Hash while copying so the upload is only read once
+    digest = hashlib.sha256()
+    try:
+        with open(path, "wb") as buffer:
+            while True:
+                chunk = source.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                buffer.write(chunk)
+    except Exception:
+        # Make sure to clean up a partially written file
+        if os.path.exists(path):
+            os.remove(path)
+        raise
+
+    return path, digest.hexdigest()
+
+
+def is_archive(file_name: str) -> bool:
+    return file_name.lower().endswith(ARCHIVE_SUFFIXES)
+
+
+def extract_archive(archive_path: str) -> List[Tuple[str, str, str]]:
+    """
+    Unpack the regular files of a zip or tar archive into UPLOAD_DIR
+
+    Members are streamed out one at a time and hashed as they are written.
+    Directory structure is flattened; hidden files (such as macOS resource
+    forks) are skipped.
+
+    Args:
+        archive_path: Path to the archive
+
+    Returns:
+        List of (member name, saved path, SHA-256 hex digest) in archive order
+
+    Raises:
+        ValueError: If the file is not a readable archive
+    """
+    extracted: List[Tuple[str, str, str]] = []
+    try:
+        if zipfile.is_zipfile(archive_path):
+            with zipfile.ZipFile(archive_path) as archive:
+                for info in archive.infolist():
+                    name = Path(info.filename).name
+                    if info.is_dir() or not name or name.startswith("."):
+                        continue
+                    with archive.open(info) as member:
+                        extracted.append((name, *store_upload(member, name)))
+        elif tarfile.is_tarfile(archive_path):
+            # Stream mode reads the archive front to back without seeking
+            with tarfile.open(archive_path, mode="r|*") as archive:
+                for info in archive:
+                    name = Path(info.name).name
+                    if not info.isfile() or not name or name.startswith("."):
+                        continue
+                    member = archive.extractfile(info)
+                    extracted.append((name, *store_upload(member, name)))
+        else:
+            raise ValueError(f"Not a zip or tar archive: {Path(archive_path).name}")
+    except (zipfile.BadZipFile, tarfile.TarError) as e:
+        for _, path, _ in extracted:
+            os.remove(path)
+        raise ValueError(f"Could not read archive: {str(e)}")
+    except Exception:
+        for _, path, _ in extracted:
+            os.remove(path)
+        raise
+
+    logger.info(f"Extracted {len(extracted)} files from {Path(archive_path).name}")
+    return extracted
+
+
+def remove_upload(path: str):
+    """Delete a saved upload if it still exists"""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class UploadOffsetError(Exception):
+    """Raised when a chunk does not start where the upload left off"""
+
+    def __init__(self, offset: int):
+        super().__init__(f"Upload continues at byte {offset}")
+        self.offset = offset
+
+
+class UploadSession:
+    """
+    A resumable upload being written to UPLOAD_DIR/partial
+
+    Chunks must arrive in order, each starting at the number of bytes
+    received so far, so the SHA-256 is updated as the data is written and
+    is ready as soon as the last byte lands. Session metadata is kept next
+    to the partial file until the finished file is handed to a job, so an
+    upload can be resumed, or submitted again, after a restart.
+    """
+
+    def __init__(self, upload_id: str, file_name: str, size: Optional[int], created_at: float):
+        self.upload_id = upload_id
+        self.file_name = file_name
+        self.size = size
+        self.created_at = created_at
+        self.updated_at = created_at
+        self.received = 0
+        self.path: Optional[str] = None
+        self._digest = hashlib.sha256()
+        self._lock = threading.Lock()
+
+    @property
+    def part_path(self) -> str:
+        return os.path.join(partial_dir(), f"{self.upload_id}.part")
+
+    @property
+    def meta_path(self) -> str:
+        return os.path.join(partial_dir(), f"{self.upload_id}.json")
+
+    @property
+    def final_path(self) -> str:
+        return final_upload_path(self.upload_id, self.file_name)
+
+    @property
+    def is_complete(self) -> bool:
+        return self.size is not None and self.received == self.size
+
+    def write(self, offset: int, chunks: Any) -> int:
+        """
+        Append chunks to the upload, starting at offset
+
+        Bytes are counted as received as soon as they are written, so if the
+        connection drops part way through, the upload resumes after the last
+        chunk that made it to disk.
+
+        Args:
+            offset: Byte offset the chunks start at
+            chunks: Iterable of byte strings
+
+        Returns:
+            Bytes received so far
+
+        Raises:
+            UploadOffsetError: If offset is not where the upload left off, or another write is in progress
+            ValueError: If the data runs past the declared size
+        """
+        if not self._lock.acquire(blocking=False):
+            raise UploadOffsetError(self.received)
+        try:
+            if self.path is not None:
+                raise ValueError("Upload is already finalized")
+            if offset != self.received:
+                raise UploadOffsetError(self.received)
+            with open(self.part_path, "ab") as part:
+                for chunk in chunks:
+                    if self.size is not None and self.received + len(chunk) > self.size:
+                        raise ValueError(f"Upload is larger than the declared {self.size} bytes")
+                    part.write(chunk)
+                    part.flush()
+                    self._digest.update(chunk)
+                    self.received += len(chunk)
+                    self.updated_at = time.time()
+            return self.received
+        finally:
+            self._lock.release()
+
+    def finalize(self) -> Tuple[str, str]:
+        """
+        Move the finished upload into UPLOAD_DIR
+
+        Calling it again returns the same file, so a finished upload can be
+        submitted again if the first attempt was turned away.
+
+        Returns:
+            Tuple of (saved path, SHA-256 hex digest)
+
+        Raises:
+            ValueError: If bytes are still missing
+        """
+        with self._lock:
+            if self.path is None:
+                if self.size is not None and self.received != self.size:
+                    raise ValueError(f"Upload has {self.received} of {self.size} bytes")
+                if not os.path.exists(self.part_path):
+                    # Nothing was sent: an empty file
+                    open(self.part_path, "wb").close()
+                os.replace(self.part_path, self.final_path)
+                self.path = self.final_path
+            return self.path, self._digest.hexdigest()
+
+    def discard(self):
+        """Delete the partial data, or the finished file if it was never handed off"""
+        remove_upload(self.part_path)
+        remove_upload(self.meta_path)
+        if self.path is not None:
+            remove_upload(self.path)
+
+    def save_metadata(self):
+        with open(self.meta_path, "w") as meta:
+            json.dump({"file_name": self.file_name, "size": self.size, "created_at": self.created_at}, meta)
+
+    @classmethod
+    def restore(cls, upload_id: str) -> Optional["UploadSession"]:
+        """
+        Rebuild a session from its files on disk, e.g. after a restart
+
+        The hash state is not persisted, so the partial data is read once
+        to recompute it. An upload finalized but never handed to a job (the
+        server was busy) comes back finalized, with its finished file.
+        """
+        session = cls(upload_id, "", None, 0.0)
+        try:
+            with open(session.meta_path) as meta:
+                metadata = json.load(meta)
+        except (OSError, ValueError):
+            return None
+
+        session.file_name = metadata["file_name"]
+        session.size = metadata["size"]
+        session.created_at = metadata["created_at"]
+        if os.path.exists(session.part_path):
+            data_path = session.part_path
+        elif os.path.exists(session.final_path):
+            data_path = session.path = session.final_path
+        else:
+            session.updated_at = os.path.getmtime(session.meta_path)
+            return session
+
+        with open(data_path, "rb") as data:
+            while True:
+                chunk = data.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                session._digest.update(chunk)
+                session.received += len(chunk)
+        session.updated_at = os.path.getmtime(data_path)
+        return session
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "upload_id": self.upload_id,
+            "file_name": self.file_name,
+            "size": self.size,
+            "received": self.received,
+            "complete": self.is_complete,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+        }
+
+
+def partial_dir() -> str:
+    path = os.path.join(settings.UPLOAD_DIR, "partial")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def final_upload_path(upload_id: str, file_name: str) -> str:
+    """Where a resumable upload's file is moved once all of it has arrived"""
+    return os.path.join(settings.UPLOAD_DIR, f"{upload_id}_{Path(file_name).name}")
+
+
+class UploadSessionStore:
+    """
+    Tracks resumable uploads and removes the ones abandoned part way
+
+    Sessions with no data for longer than the TTL are deleted together with
+    their partial or finished files, as are the files of sessions no longer
+    in memory (left by a restart). Purging runs when an upload starts and
+    periodically once start_purging has been called.
+    """
+
+    def __init__(self, ttl: float = 86400):
+        self._sessions: Dict[str, UploadSession] = {}
+        self._lock = threading.Lock()
+        self._ttl = ttl
+        self._stop_purging = threading.Event()
+        self._purge_thread: Optional[threading.Thread] = None
+
+    def create(self, file_name: str, size: Optional[int] = None) -> UploadSession:
+        """
+        Start a resumable upload
+
+        Args:
+            file_name: Original name of the file
+            size: Total size in bytes, if known up front
+
+        Returns:
+            The new session
+        """
+        self.purge_stale()
+        session = UploadSession(str(uuid.uuid4()), Path(file_name).name, size, time.time())
+        session.save_metadata()
+        with self._lock:
+            self._sessions[session.upload_id] = session
+        logger.info(f"Started upload {session.upload_id} for {session.file_name}")
+        return session
+
+    def get(self, upload_id: str) -> Optional[UploadSession]:
+        """Look up a session, restoring it from disk if this process has not seen it"""
+        with self._lock:
+            session = self._sessions.get(upload_id)
+        if session is not None:
+            return session
+
+        # Only ids this store could have created map to files on disk
+        try:
+            upload_id = str(uuid.UUID(upload_id))
+        except ValueError:
+            return None
+        session = UploadSession.restore(upload_id)
+        if session is None:
+            return None
+        with self._lock:
+            session = self._sessions.setdefault(upload_id, session)
+        logger.info(f"Resumed upload {upload_id} at byte {session.received}")
+        return session
+
+    def finalize(self, upload_id: str) -> Tuple[UploadSession, str, str]:
+        """
+        Complete an upload, moving its file into UPLOAD_DIR
+
+        The session is kept until release() is called, so the finished file
+        is still cleaned up if it is never handed to a job.
+
+        Returns:
+            Tuple of (session, saved path, SHA-256 hex digest)
+
+        Raises:
+            KeyError: If the upload does not exist
+            ValueError: If bytes are still missing
+        """
+        session = self.get(upload_id)
+        if session is None:
+            raise KeyError(upload_id)
+        path, digest = session.finalize()
+        logger.info(f"Finished upload {upload_id}: {session.received} bytes")
+        return session, path, digest
+
+    def release(self, upload_id: str):
+        """Forget a finalized upload whose file now belongs to a job"""
+        with self._lock:
+            session = self._sessions.pop(upload_id, None)
+        if session is not None:
+            remove_upload(session.meta_path)
+
+    def discard(self, upload_id: str) -> bool:
+        """Abort an upload and delete its data"""
+        session = self.get(upload_id)
+        if session is None:
+            return False
+        with self._lock:
+            self._sessions.pop(upload_id, None)
+        session.discard()
+        return True
+
+    def purge_stale(self) -> int:
+        """
+        Delete sessions idle for longer than the TTL and orphaned partial files
+
+        Returns:
+            Number of sessions and orphaned files removed
+        """
+        cutoff = time.time() - self._ttl
+        with self._lock:
+            stale = [session for session in self._sessions.values() if session.updated_at < cutoff]
+            for session in stale:
+                del self._sessions[session.upload_id]
+            live = set(self._sessions)
+
+        for session in stale:
+            logger.info(f"Removing stale upload {session.upload_id} ({session.received} bytes received)")
+            session.discard()
+
+        # Group partial and metadata files by upload; a restart leaves them without a session
+        files: Dict[str, List[str]] = {}
+        for entry in os.scandir(partial_dir()):
+            upload_id, _, suffix = entry.name.partition(".")
+            files.setdefault(upload_id, []).append(entry.path)
+            if suffix == "json":
+                # A finalized upload that never went to a job keeps its file in UPLOAD_DIR
+                try:
+                    with open(entry.path) as meta:
+                        files[upload_id].append(final_upload_path(upload_id, json.load(meta)["file_name"]))
+                except (OSError, ValueError, KeyError):
+                    pass
+
+        removed = len(stale)
+        for upload_id, paths in files.items():
+            if upload_id in live:
+                continue
+            paths = [path for path in paths if os.path.exists(path)]
+            try:
+                last_write = max(os.path.getmtime(path) for path in paths)
+            except (FileNotFoundError, ValueError):
+                continue
+            if last_write < cutoff:
+                for path in paths:
+                    remove_upload(path)
+                    removed += 1
+        return removed
+
+    def start_purging(self, interval: float):
+        """Run purge_stale every interval seconds in a background thread"""
+        if self._purge_thread is not None:
+            return
+        self._stop_purging.clear()
+
+        def purge_periodically():
+            while not self._stop_purging.wait(interval):
+                try:
+                    removed = self.purge_stale()
+                    if removed:
+                        logger.info(f"Purged {removed} stale uploads and files")
+                except Exception as e:
+                    logger.error(f"Could not purge stale uploads: {str(e)}")
+
+        self._purge_thread = threading.Thread(target=purge_periodically, name="upload-purge", daemon=True)
+        self._purge_thread.start()
+
+    def stop_purging(self):
+        """Stop the periodic purge"""
+        self._stop_purging.set()
+        self._purge_thread = None
+
+
+upload_sessions = UploadSessionStore(settings.UPLOAD_SESSION_TTL_SECONDS)
@@ -0,0 +1,233 @@
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Energy is measured over 30 ms frames
+FRAME_SECONDS = 0.03
+
+# Frames processed per block, to bound memory on memory-mapped recordings
+BLOCK_FRAMES = 2000
+
+# Audio quieter than this is always treated as silence
+MIN_SPEECH_DB = -55.0
+
+
+def frame_energy_db(samples: np.ndarray, sample_rate: int) -> np.ndarray:
+    """
+    RMS energy of consecutive frames, in dB
+
+    Args:
+        samples: Mono float32 audio
+        sample_rate: Sample rate of the audio
+
+    Returns:
+        Energy of each frame in dB
+    """
+    frame_length = int(FRAME_SECONDS * sample_rate)
+    frame_count = len(samples) // frame_length
+    energy = np.empty(frame_count, dtype=np.float32)
+
+    for first in range(0, frame_count, BLOCK_FRAMES):
+        last = min(first + BLOCK_FRAMES, frame_count)
+        block = np.asarray(samples[first * frame_length:last * frame_length], dtype=np.float32)
+        frames = block.reshape(last - first, frame_length)
+        rms = np.sqrt(np.mean(frames * frames, axis=1))
+        energy[first:last] = 20 * np.log10(rms + 1e-10)
+
+    return energy
+
+
+def _runs(mask: np.ndarray) -> List[Tuple[int, int]]:
+    """Start and end (exclusive) frame index of every run of True values"""
+    padded = np.concatenate(([False], mask, [False]))
+    changes = np.flatnonzero(padded[1:] != padded[:-1])
+    return list(zip(changes[::2].tolist(), changes[1::2].tolist()))
+
+
+def detect_speech(
+    samples: np.ndarray,
+    sample_rate: int,
+    margin_db: Optional[float] = None,
+    min_speech_seconds: float = 0.25,
+    min_silence_seconds: float = 0.5,
+    pad_seconds: float = 0.1,
+    noise_floor_db: Optional[float] = None
+) -> List[Tuple[float, float]]:
+    """
+    Find speech regions with an adaptive energy threshold
+
+    The threshold sits margin_db above the noise floor (the 10th percentile
+    of frame energy). Pauses shorter than min_silence_seconds are bridged,
+    blips shorter than min_speech_seconds are dropped, and every region is
+    padded so word onsets are not clipped.
+
+    Args:
+        samples: Mono float32 audio
+        sample_rate: Sample rate of the audio
+        margin_db: dB above the noise floor counted as speech (defaults to settings.VAD_MARGIN_DB)
+        min_speech_seconds: Shortest speech region kept
+        min_silence_seconds: Shortest pause that separates two regions
+        pad_seconds: Padding added around each region
+        noise_floor_db: Noise floor to use instead of measuring it on these samples
+
+    Returns:
+        List of (start, end) speech regions in seconds
+    """
+    if margin_db is None:
+        margin_db = settings.VAD_MARGIN_DB
+
+    energy = frame_energy_db(samples, sample_rate)
+    if len(energy) == 0:
+        return []
+
+    noise_floor = float(np.percentile(energy, 10)) if noise_floor_db is None else noise_floor_db
+    threshold = max(noise_floor + margin_db, MIN_SPEECH_DB)
+
+    regions = []
+    for start, end in _runs(energy > threshold):
+        start_time = start * FRAME_SECONDS
+        end_time = end * FRAME_SECONDS
+        # Bridge short pauses
+        if regions and start_time - regions[-1][1] < min_silence_seconds:
+            regions[-1][1] = end_time
+        else:
+            regions.append([start_time, end_time])
+
+    duration = len(samples) / sample_rate
+    speech = []
+    for start_time, end_time in regions:
+        if end_time - start_time < min_speech_seconds:
+            continue
+        start_time = max(0.0, start_time - pad_seconds)
+        end_time = min(duration, end_time + pad_seconds)
+        if speech and start_time <= speech[-1][1]:
+            speech[-1] = (speech[-1][0], end_time)
+        else:
+            speech.append((start_time, end_time))
+
+    return speech
+
+
+def silence_gaps(speech: List[Tuple[float, float]], duration: float) -> List[Tuple[float, float]]:
+    """
+    Complement of the speech regions over the whole recording
+
+    Args:
+        speech: Speech regions in seconds, sorted and disjoint
+        duration: Length of the recording in seconds
+
+    Returns:
+        List of (start, end) silent stretches in seconds
+    """
+    gaps = []
+    previous_end = 0.0
+    for start, end in speech:
+        if start > previous_end:
+            gaps.append((previous_end, start))
+        previous_end = end
+    if duration > previous_end:
+        gaps.append((previous_end, duration))
+    return gaps
+
+
+class SpeechTimeline:
+    """
+    Maps times in audio made of concatenated speech regions back to the original recording
+
+    Region i starts at compact_starts[i] in the compacted audio and at
+    original_starts[i] in the original, and lasts lengths[i] seconds.
+    """
+
+    def __init__(self, compact_starts: np.ndarray, original_starts: np.ndarray, lengths: np.ndarray):
+        self.compact_starts = compact_starts
+        self.original_starts = original_starts
+        self.lengths = lengths
+
+    def to_original(self, times: np.ndarray) -> np.ndarray:
+        """Original-recording time of each compacted-audio time"""
+        times = np.asarray(times, dtype=np.float64)
+        if len(self.compact_starts) == 0:
+            return times
+        index = np.maximum(np.searchsorted(self.compact_starts, times, side="right") - 1, 0)
+        # Times inside the gap after a region are clamped to the end of that region
+        offset = np.clip(times - self.compact_starts[index], 0.0, self.lengths[index])
+        return self.original_starts[index] + offset
+
+
+def compact_speech(
+    samples: np.ndarray,
+    sample_rate: int,
+    speech: List[Tuple[float, float]],
+    gap_seconds: float = 0.2
+) -> Tuple[np.ndarray, SpeechTimeline]:
+    """
+    Concatenate the speech regions of a recording, separated by short silences
+
+    Args:
+        samples: Mono float32 audio
+        sample_rate: Sample rate of the audio
+        speech: Speech regions in seconds
+        gap_seconds: Silence inserted between regions so words do not run together
+
+    Returns:
+        Tuple of (compacted audio, timeline mapping it back to the original)
+    """
+    gap = np.zeros(int(gap_seconds * sample_rate), dtype=np.float32)
+    pieces = []
+    compact_starts, original_starts, lengths = [], [], []
+    position = 0
+    for start, end in speech:
+        first = int(start * sample_rate)
+        last = int(end * sample_rate)
+        if last <= first:
+            continue
+        compact_starts.append(position / sample_rate)
+        original_starts.append(first / sample_rate)
+        lengths.append((last - first) / sample_rate)
+        pieces.append(np.asarray(samples[first:last], dtype=np.float32))
+        pieces.append(gap)
+        position += (last - first) + len(gap)
+
+    compacted = np.concatenate(pieces) if pieces else np.zeros(0, dtype=np.float32)
+    timeline = SpeechTimeline(
+        np.array(compact_starts, dtype=np.float64),
+        np.array(original_starts, dtype=np.float64),
+        np.array(lengths, dtype=np.float64)
+    )
+    return compacted, timeline
+
+
+def remap_result(result: Dict[str, Any], timeline: SpeechTimeline) -> Dict[str, Any]:
+    """
+    Move the timestamps of a Whisper result from compacted audio to the original timeline
+
+    Args:
+        result: Whisper result computed on compacted audio
+        timeline: Mapping produced by compact_speech
+
+    Returns:
+        The same result with segment and word timestamps remapped
+    """
+    segments = result.get("segments", [])
+    starts = timeline.to_original([segment["start"] for segment in segments])
+    ends = timeline.to_original([segment["end"] for segment in segments])
+
+    remapped = []
+    for segment, start, end in zip(segments, starts, ends):
+        segment = {**segment, "start": float(start), "end": float(end)}
+        if segment.get("words"):
+            word_starts = timeline.to_original([word["start"] for word in segment["words"]])
+            word_ends = timeline.to_original([word["end"] for word in segment["words"]])
+            segment["words"] = [
+                {**word, "start": float(word_start), "end": float(word_end)}
+                for word, word_start, word_end in zip(segment["words"], word_starts, word_ends)
+            ]
+        remapped.append(segment)
+
+    return {**result, "segments": remapped}
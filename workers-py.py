@@ -0,0 +1,389 @@
+import gc
+import signal
+import logging
+import itertools
+import threading
+import multiprocessing
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from app.core.config import settings
+from app.services.audio import DecodedAudio, map_pcm
+from app.services.decode_pool import decode_pool
+from app.services.transcription import pin_whisper_model
+from app.services.engines import get_engine
+from app.services.quantization import split_key
+from app.services.diarization import get_diarization_pipeline
+from app.services.thread_budget import thread_budget, available_cpus, usable_cpus
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+def share_weights(obj: Any, depth: int = 3, seen: Optional[Set[int]] = None) -> int:
+    """
+    Move the parameters and buffers of every torch module reachable from obj
+    into shared memory, so forked workers map the same pages
+
+    Whisper models are modules themselves; a pyannote pipeline holds its
+    models a few attributes down, hence the shallow walk.
+
+    Args:
+        obj: Model or pipeline
+        depth: Attribute levels to search for modules
+
+    Returns:
+        Number of modules moved
+    """
+    import torch
+
+    seen = seen if seen is not None else set()
+    if id(obj) in seen or depth < 0:
+        return 0
+    seen.add(id(obj))
+
+    if isinstance(obj, torch.nn.Module):
+        obj.share_memory()
+        return 1
+
+    shared = 0
+    children = obj.values() if isinstance(obj, dict) else getattr(obj, "__dict__", {}).values()
+    for child in children:
+        if isinstance(child, (str, bytes, int, float, bool)) or child is None:
+            continue
+        shared += share_weights(child, depth - 1, seen)
+    return shared
+
+
+def _worker_main(index: int, conn, threads: int, cpus: List[int], warm_up: bool):
+    """Loop of an inference worker: run tasks sent by the supervisor and send back results"""
+    # Inherited handlers belong to the server's event loop; let the supervisor stop us
+    signal.set_wakeup_fd(-1)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    import torch
+    torch.set_num_threads(threads)
+    # Concurrent stages in this worker split its slice of the machine
+    thread_budget.resize(threads, cpus)
+
+    send_lock = threading.Lock()
+    engine = get_engine()
+
+    def send(message: tuple):
+        # Pipeline stages emit events from their own threads
+        with send_lock:
+            conn.send(message)
+
+    def report_warm():
+        # Requests name models without the int8 suffix
+        send(("warm", [split_key(key)[0] for key in engine.stats().get("resident", {})]))
+
+    # Only whisper models are loaded before the fork; other engines load theirs here
+    if warm_up or engine.name != "whisper":
+        from app.services.startup import warm_up_engine
+        for model_name in settings.PRELOAD_MODELS:
+            try:
+                if warm_up:
+                    warm_up_engine(engine, model_name)
+                else:
+                    engine.load(model_name)
+            except Exception as e:
+                logger.error(f"Worker {index} could not load {engine.name} model {model_name}: {str(e)}")
+    report_warm()
+
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            break
+        if message is None:
+            break
+
+        request_id, func, args, kwargs, audio_source, stream_events = message
+        if stream_events:
+            kwargs["on_event"] = lambda event, data, request_id=request_id: send(("event", request_id, event, data))
+        if audio_source is not None:
+            pcm_path, decode_seconds, owns_file = audio_source
+            kwargs["audio"] = DecodedAudio(map_pcm(pcm_path), decode_seconds, pcm_path, owns_file=owns_file)
+            kwargs["audio"].audio_hash = kwargs.get("audio_hash")
+
+        try:
+            send(("result", request_id, func(*args, **kwargs)))
+        except Exception as e:
+            send(("error", request_id, str(e)))
+        report_warm()
+
+    conn.close()
+
+
+class _Worker:
+    """Supervisor-side handle of one inference worker process"""
+
+    def __init__(self, index: int, process, conn):
+        self.index = index
+        self.process = process
+        self.conn = conn
+        self.send_lock = threading.Lock()
+        self.alive = True
+        self.warm: Set[str] = set()
+        self.pending: Dict[int, Future] = {}
+        self.listeners: Dict[int, Callable[[str, Dict[str, Any]], None]] = {}
+        self.completed = 0
+
+    @property
+    def in_flight(self) -> int:
+        return len(self.pending)
+
+
+class WorkerSupervisor:
+    """
+    Pre-forked inference workers sharing the preloaded model weights
+
+    The configured models are loaded once in the server process and their
+    weights moved to shared memory, then the workers are forked, so N
+    workers cost one copy of the weights instead of N. This applies to the
+    whisper engine; other engines (CTranslate2 starts its thread pool as a
+    model loads) load their models in each worker after the fork. Job threads in the
+    server hand tasks to the workers and wait for their results.
+
+    Requests are routed by model affinity: to the least busy worker that
+    already has the model loaded, unless all of those have
+    WORKER_AFFINITY_MAX_QUEUE requests in flight and another worker is idle.
+    Models loaded after the fork are private to the worker that loaded
+    them, so affinity keeps them from being loaded in every worker.
+    """
+
+    def __init__(self):
+        self._workers: List[_Worker] = []
+        self._lock = threading.Lock()
+        self._request_ids = itertools.count()
+        self._stopping = False
+        self.shared_models: List[str] = []
+
+    @property
+    def running(self) -> bool:
+        return bool(self._workers)
+
+    def start(self, processes: int, threads: Optional[int] = None):
+        """
+        Load the configured models, share their weights and fork the workers
+
+        Must run before the server starts handling requests: forking a
+        process with busy threads can leave locks held in the children.
+
+        Args:
+            processes: Number of worker processes
+            threads: Torch threads per worker (defaults to an even split of the available CPUs)
+        """
+        from app.services.startup import preload_now
+
+        if not threads:
+            threads = max(1, available_cpus() // processes)
+        cpus = usable_cpus()
+
+        # Loading only: running inference here would start OpenMP threads before the fork
+        if get_engine().name == "whisper":
+            preload_now(warm_up=False)
+            for model_name in settings.PRELOAD_MODELS:
+                try:
+                    model = pin_whisper_model(model_name)
+                except Exception:
+                    continue
+                share_weights(model)
+                self.shared_models.append(model_name)
+        else:
+            # The workers load the engine's models themselves
+            preload_now(warm_up=False, models=[])
+        if settings.PRELOAD_DIARIZATION:
+            try:
+                share_weights(get_diarization_pipeline())
+            except Exception as e:
+                logger.error(f"Could not share the diarization pipeline: {str(e)}")
+
+        # Keep the preloaded objects out of garbage collection so refcount
+        # updates in the workers do not copy the pages holding them
+        gc.freeze()
+
+        context = multiprocessing.get_context("fork")
+        for index in range(processes):
+            parent_conn, child_conn = context.Pipe()
+            # Cores the worker's stages are pinned to when THREAD_PINNING is on
+            worker_cpus = cpus[index * threads:(index + 1) * threads] or cpus
+            process = context.Process(
+                target=_worker_main,
+                args=(index, child_conn, threads, worker_cpus, settings.WARMUP_ENABLED),
+                name=f"inference-worker-{index}",
+                daemon=True
+            )
+            process.start()
+            child_conn.close()
+
+            worker = _Worker(index, process, parent_conn)
+            worker.warm.update(self.shared_models)
+            self._workers.append(worker)
+
+        # Start listening only once every fork is done
+        for worker in self._workers:
+            threading.Thread(
+                target=self._listen, args=(worker,), name=f"inference-worker-{worker.index}-results", daemon=True
+            ).start()
+
+        logger.info(
+            f"Started {processes} inference workers with {threads} threads each, "
+            f"sharing {', '.join(self.shared_models) or 'no models'}"
+        )
+
+    def run_task(
+        self,
+        func: Callable[..., Dict[str, Any]],
+        file_path: str,
+        file_name: str,
+        language: str,
+        model: str,
+        on_event: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+        audio: Optional[DecodedAudio] = None,
+        **options: Any
+    ) -> Dict[str, Any]:
+        """
+        Run a route task in a worker and wait for its result
+
+        Called like the task itself. Audio decoded ahead of time (by the
+        decode pool, or from a streamed upload) is always handed over by
+        file, spilling in-memory samples first rather than pickling them
+        through the pipe. The worker takes over deleting that file, and this
+        process drops its own mapping once the task is sent.
+
+        Args:
+            func: Task function, run as func(file_path, file_name, language, model, **options)
+            on_event: Receives the task's streamed events, relayed from the worker
+
+        Returns:
+            The task's result
+        """
+        if audio is None:
+            audio = decode_pool.take(file_path)
+        audio_source = None
+        if audio is not None:
+            audio.spill()
+            audio_source = (audio.pcm_path, audio.decode_seconds, audio.owns_file)
+
+        request_id = next(self._request_ids)
+        future: Future = Future()
+        with self._lock:
+            worker = self._choose(model)
+            worker.pending[request_id] = future
+            if on_event is not None:
+                worker.listeners[request_id] = on_event
+
+        message = (request_id, func, (file_path, file_name, language, model), options, audio_source, on_event is not None)
+        try:
+            with worker.send_lock:
+                worker.conn.send(message)
+        except (OSError, ValueError) as e:
+            with self._lock:
+                worker.pending.pop(request_id, None)
+                worker.listeners.pop(request_id, None)
+            if audio is not None:
+                # The worker never got the file, so it is still ours to delete
+                audio.close()
+            raise RuntimeError(f"Could not reach inference worker {worker.index}: {str(e)}")
+        if audio is not None:
+            # The file now belongs to the worker; only drop our mapping
+            audio.owns_file = False
+            audio.close()
+        return future.result()
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-worker state and the models shared by all of them"""
+        with self._lock:
+            return {
+                "shared_models": list(self.shared_models),
+                "workers": [
+                    {
+                        "index": worker.index,
+                        "pid": worker.process.pid,
+                        "alive": worker.alive,
+                        "in_flight": worker.in_flight,
+                        "completed": worker.completed,
+                        "warm_models": sorted(worker.warm),
+                    }
+                    for worker in self._workers
+                ],
+            }
+
+    def shutdown(self, timeout: float = 5.0):
+        """Ask the workers to exit, terminating any that do not"""
+        self._stopping = True
+        for worker in self._workers:
+            try:
+                with worker.send_lock:
+                    worker.conn.send(None)
+            except (OSError, ValueError):
+                pass
+        for worker in self._workers:
+            worker.process.join(timeout)
+            if worker.process.is_alive():
+                worker.process.terminate()
+        self._workers = []
+
+    def _choose(self, model: str) -> _Worker:
+        """Pick the worker for a request by model affinity, then load (lock held)"""
+        alive = [worker for worker in self._workers if worker.alive]
+        if not alive:
+            raise RuntimeError("No inference workers are running")
+
+        least_busy = min(alive, key=lambda worker: worker.in_flight)
+        warm = [worker for worker in alive if model in worker.warm]
+        if not warm:
+            return least_busy
+        best = min(warm, key=lambda worker: worker.in_flight)
+        if best.in_flight >= settings.WORKER_AFFINITY_MAX_QUEUE and least_busy.in_flight == 0:
+            # Loading the model again beats queueing behind a backlog
+            return least_busy
+        return best
+
+    def _listen(self, worker: _Worker):
+        """Deliver a worker's results and events until it exits"""
+        while True:
+            try:
+                message = worker.conn.recv()
+            except (EOFError, OSError):
+                break
+
+            kind = message[0]
+            if kind == "warm":
+                with self._lock:
+                    # Shared models stay warm even if the worker's registry evicts its reference
+                    worker.warm = set(message[1]) | set(self.shared_models)
+                continue
+            if kind == "event":
+                listener = worker.listeners.get(message[1])
+                if listener is not None:
+                    listener(message[2], message[3])
+                continue
+
+            with self._lock:
+                future = worker.pending.pop(message[1], None)
+                worker.listeners.pop(message[1], None)
+                worker.completed += 1
+            if future is None:
+                continue
+            if kind == "result":
+                future.set_result(message[2])
+            else:
+                future.set_exception(RuntimeError(message[2]))
+
+        with self._lock:
+            worker.alive = False
+            pending = list(worker.pending.values())
+            worker.pending.clear()
+            worker.listeners.clear()
+        if not self._stopping:
+            worker.process.join(1.0)
+            logger.error(f"Inference worker {worker.index} exited with code {worker.process.exitcode}")
+        for future in pending:
+            future.set_exception(RuntimeError(f"Inference worker {worker.index} exited"))
+
+
+worker_supervisor = WorkerSupervisor()